@@ -1,19 +1,38 @@
 from __future__ import annotations
 
+import heapq
+import itertools
+import json
 import math
 import random
+import time
 import uuid
+from collections import deque
 from dataclasses import dataclass
+from functools import cached_property, partial
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
 
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
 import systems.strategy as strat
-from systems.equity import Equity
-from systems.gateway_in import YF_ENDPOINT
+from systems.equity import MarketState
+from systems.impact import ImpactModel, make_impact
+from systems.ledger import Ledger
+from systems.metrics import periods_per_year
+from systems.profiler import PROFILER, Profiler, profile_markdown
+from systems.results_sink import DiskSink, MemorySink, ResultsSink, TableSchema
+from systems.bar_cache import BarCache
+from systems.gateway_in import YF_ENDPOINT, BarRow, MarketData
+
+
+# one strategy or several per symbol
+StrategySpec = Union[strat.Strategy, Sequence[strat.Strategy]]
+
+ORDER_STATUSES = ["NEW", "PARTIALLY_FILLED", "FILLED", "CANCELLED", "EXPIRED"]
+MAX_PLOT_POINTS = 5_000
 
 
 @dataclass
@@ -23,7 +42,18 @@ class Order:
     side: str  # BUY or SELL
     qty: int
     submitted_at: pd.Timestamp
-    status: str = "NEW"
+    status: str = "NEW"  # NEW, PARTIALLY_FILLED, FILLED, CANCELLED, EXPIRED
+    order_type: str = "MARKET"  # MARKET or LIMIT
+    limit_price: Optional[float] = None
+    filled_qty: int = 0
+
+    @property
+    def remaining(self) -> int:
+        return self.qty - self.filled_qty
+
+    @property
+    def is_open(self) -> bool:
+        return self.status in ("NEW", "PARTIALLY_FILLED")
 
 
 @dataclass
@@ -40,16 +70,107 @@ class Fill:
 
 @dataclass
 class BacktestResult:
-    equity_curve: pd.DataFrame
-    trades: pd.DataFrame
+    """
+    Metrics and config of one run. The equity, trade and order records stay in `sink`;
+    equity_curve / trades / orders materialize a table as a DataFrame on first access,
+    render_report reads them through sink.chunks() instead.
+    """
+
     metrics: Dict[str, float]
     config: Dict[str, object]
-    orders: pd.DataFrame
+    sink: ResultsSink
+    profile: Optional[Dict[str, object]] = None  # Profiler.snapshot() of the run when profiling is on
+
+    @cached_property
+    def equity_curve(self) -> pd.DataFrame:
+        return self.sink.frame("equity")
+
+    @cached_property
+    def trades(self) -> pd.DataFrame:
+        return self.sink.frame("trades")
+
+    @cached_property
+    def orders(self) -> pd.DataFrame:
+        # rows are written when an order closes; present them in submission order
+        orders = self.sink.frame("orders")
+        if orders.empty:
+            return orders
+        return orders.sort_values("seq", kind="stable").drop(columns="seq").reset_index(drop=True)
+
+
+class _SideBook:
+    """
+    Resting orders on one side of one symbol: market orders FIFO, limit orders in a
+    price-time heap. Cancelled orders are dropped lazily when they reach the front.
+    """
+
+    def __init__(self, side: str):
+        self.side = side
+        self.market: deque = deque()
+        self.limits: List[Tuple[float, int, Order]] = []  # (price key, seq, order)
+        self.open: Dict[str, Order] = {}
+
+    def add(self, order: Order, seq: int):
+        self.open[order.order_id] = order
+        if order.order_type == "LIMIT":
+            # best price first: highest bid for buys, lowest offer for sells
+            key = -order.limit_price if self.side == "BUY" else order.limit_price
+            heapq.heappush(self.limits, (key, seq, order))
+        else:
+            self.market.append(order)
+
+    def marketable(self, order: Order, price: float) -> bool:
+        if order.order_type != "LIMIT":
+            return True
+        return price <= order.limit_price if self.side == "BUY" else price >= order.limit_price
+
+    def next_order(self, price: float) -> Optional[Order]:
+        """
+        Front of the queue if it can trade at `price`, market orders before limits
+        """
+        while self.market and not self.market[0].is_open:
+            self.market.popleft()
+        if self.market:
+            return self.market[0]
+        while self.limits and not self.limits[0][2].is_open:
+            heapq.heappop(self.limits)
+        if self.limits and self.marketable(self.limits[0][2], price):
+            return self.limits[0][2]
+        return None
+
+    def set_aside(self):
+        """
+        Takes the order next_order() just returned off the front; restore() puts it back
+        """
+        return self.market.popleft() if self.market else heapq.heappop(self.limits)
+
+    def restore(self, held: list):
+        for entry in reversed(held):
+            if isinstance(entry, tuple):
+                heapq.heappush(self.limits, entry)
+            else:
+                self.market.appendleft(entry)
+
+    def __len__(self):
+        return len(self.open)
 
 
 class MatchingEngine:
     """
-    Simulates fills, partial fills, and cancellations against bar data.
+    Simulated order book for the backtester.
+    Orders rest per symbol and side until filled, cancelled or expired. Each bar, every side
+    may trade up to fill_rate * bar volume (participation cap), market orders first (FIFO),
+    then limit orders in price-time priority. An order that reaches the impact model's
+    per-order cap sits out the rest of the bar without losing its place in the queue.
+    Only orders that can trade are touched, so a bar costs O(fills * log n) however many
+    orders are resting.
+    cancel_prob: chance that an order is cancelled on arrival.
+    expire_after: bars an order may rest before it expires (None = good till cancelled).
+    on_close: called with each order once it is filled, cancelled or expired.
+    rng: numpy Generator for the cancel draws, pulled in blocks of draw_block; without one
+    the engine uses the global `random` module.
+    impact: ImpactModel (systems/impact.py) pricing each bar's fills, or a model name;
+    None keeps FixedSlippage(slippage_bps). spread(symbol) feeds spread-aware models.
     """
 
     def __init__(
@@ -58,48 +179,184 @@ class MatchingEngine:
         cancel_prob: float = 0.05,
         slippage_bps: float = 1.5,
         commission_per_share: float = 0.0,
+        expire_after: Optional[int] = None,
+        on_close: Optional[Callable[[Order], None]] = None,
+        rng: Optional[np.random.Generator] = None,
+        draw_block: int = 4096,
+        impact: Union[ImpactModel, str, None] = None,
+        spread: Optional[Callable[[str], Optional[float]]] = None,
     ):
         self.fill_rate = fill_rate
         self.cancel_prob = cancel_prob
         self.slippage_bps = slippage_bps
         self.commission_per_share = commission_per_share
-
-    def execute(
-        self,
-        order: Order,
-        bar_price: float,
-        bar_volume: float,
-        timestamp: pd.Timestamp,
-    ) -> Tuple[Order, Optional[Fill]]:
-        if random.random() < self.cancel_prob:
+        self.expire_after = expire_after
+        self.on_close = on_close
+        self.rng = rng
+        self.draw_block = draw_block
+        self.impact = make_impact(impact, slippage_bps)
+        self.spread = spread
+        self._draws = np.empty(0)
+        self._draw_pos = 0
+        self.books: Dict[str, Dict[str, _SideBook]] = {}
+        self._index: Dict[str, Tuple[Order, _SideBook]] = {}
+        self._expiry: deque = deque()  # (bar number, order) in submission order
+        self.active: Dict[str, None] = {}  # symbols that may have open orders, insertion-ordered
+        self._seq = itertools.count()
+        self._bar = 0
+
+    def _book(self, symbol: str, side: str) -> _SideBook:
+        sides = self.books.get(symbol)
+        if sides is None:
+            sides = self.books[symbol] = {"BUY": _SideBook("BUY"), "SELL": _SideBook("SELL")}
+        return sides[side]
+
+    def _uniform(self) -> float:
+        if self.rng is None:
+            return random.random()
+        if self._draw_pos == len(self._draws):
+            self._draws = self.rng.random(self.draw_block)
+            self._draw_pos = 0
+        u = self._draws[self._draw_pos]
+        self._draw_pos += 1
+        return u
+
+    def submit(self, order: Order) -> Order:
+        """
+        Queues an order; it trades from the next match() on its symbol (including the current bar)
+        """
+        if self._uniform() < self.cancel_prob:
             order.status = "CANCELLED"
-            return order, None
-
-        potential_qty = int(bar_volume * self.fill_rate)
-        filled_qty = min(order.qty, max(potential_qty, 0))
-        if filled_qty <= 0:
-            order.status = "OPEN"
-            return order, None
-
-        slip_mult = 1 + (self.slippage_bps / 10_000) * (
-            1 if order.side == "BUY" else -1
-        )
-        fill_price = bar_price * slip_mult
-        partial = filled_qty < order.qty
-        order.status = "PARTIALLY_FILLED" if partial else "FILLED"
-
-        commission = self.commission_per_share * filled_qty
-        fill = Fill(
-            order_id=order.order_id,
-            symbol=order.symbol,
-            side=order.side,
-            qty=filled_qty,
-            price=fill_price,
-            timestamp=timestamp,
-            partial=partial,
-            commission=commission,
-        )
-        return order, fill
+            if self.on_close is not None:
+                self.on_close(order)
+            return order
+        if order.order_type == "LIMIT" and order.limit_price is None:
+            raise ValueError("limit orders need a limit_price")
+        book = self._book(order.symbol, order.side)
+        book.add(order, next(self._seq))
+        self.active[order.symbol] = None
+        self._index[order.order_id] = (order, book)
+        if self.expire_after is not None:
+            self._expiry.append((self._bar + self.expire_after, order))
+        return order
+
+    def _close(self, order: Order, status: str):
+        order.status = status
+        entry = self._index.pop(order.order_id, None)
+        if entry is not None:
+            entry[1].open.pop(order.order_id, None)
+        if self.on_close is not None:
+            self.on_close(order)
+
+    def cancel(self, order_id: str) -> bool:
+        """
+        Cancels the unfilled remainder of an open order; False if it is no longer open
+        """
+        entry = self._index.get(order_id)
+        if entry is None:
+            return False
+        self._close(entry[0], "CANCELLED")
+        return True
+
+    def cancel_side(self, symbol: str, side: str) -> int:
+        """
+        Cancels every open order on one side of a symbol, returns how many
+        """
+        book = self.books.get(symbol, {}).get(side)
+        if book is None:
+            return 0
+        orders = list(book.open.values())
+        for order in orders:
+            self._close(order, "CANCELLED")
+        return len(orders)
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[Order]:
+        return [o for o, _ in self._index.values() if symbol is None or o.symbol == symbol]
+
+    def next_bar(self):
+        """
+        Advances the bar clock and expires orders that have rested expire_after bars
+        """
+        self._bar += 1
+        while self._expiry and self._expiry[0][0] < self._bar:
+            _, order = self._expiry.popleft()
+            if order.is_open:
+                self._close(order, "EXPIRED")
+
+    def match(
+        self, symbol: str, bar_price: float, bar_volume: float, timestamp: pd.Timestamp
+    ) -> List[Fill]:
+        sides = self.books.get(symbol)
+        if sides is None:
+            return []
+        if not (sides["BUY"].open or sides["SELL"].open):
+            self.active.pop(symbol, None)
+            return []
+        fills: List[Fill] = []
+        impact = self.impact
+        order_cap = impact.order_cap(bar_volume)
+        for side, book in sides.items():
+            if not book.open:
+                continue
+            cap = max(int(bar_volume * self.fill_rate), 0)
+            taken: List[Tuple[Order, int]] = []
+            held: list = []
+            while cap > 0:
+                order = book.next_order(bar_price)
+                if order is None:
+                    break
+                qty = min(order.remaining, cap)
+                if order_cap is not None:
+                    qty = min(qty, order_cap)
+                    if qty <= 0:
+                        break
+                cap -= qty
+                order.filled_qty += qty
+                taken.append((order, qty))
+                if order.remaining > 0:
+                    order.status = "PARTIALLY_FILLED"
+                    if order_cap is not None:
+                        # capped for this bar: the orders behind it get the rest of the
+                        # volume, and it goes back to the front for the next bar
+                        held.append(book.set_aside())
+                else:
+                    self._close(order, "FILLED")
+            if held:
+                book.restore(held)
+            if not taken:
+                continue
+
+            # one cost evaluation for every fill on this side of the bar, vectorized over
+            # fill sizes when the model depends on them
+            spread = self.spread(symbol) if impact.uses_spread and self.spread is not None else None
+            sign = 1 if side == "BUY" else -1
+            if impact.size_dependent:
+                qtys = np.fromiter((q for _, q in taken), dtype=np.float64, count=len(taken))
+                bps = np.asarray(impact.cost_bps(qtys, bar_price, bar_volume, spread), dtype=np.float64)
+                prices = np.broadcast_to(bar_price * (1 + sign * bps / 10_000), qtys.shape).tolist()
+            else:
+                bps = impact.cost_bps(None, bar_price, bar_volume, spread)
+                prices = [bar_price * (1 + sign * bps / 10_000)] * len(taken)
+            for (order, qty), price in zip(taken, prices):
+                if order.order_type == "LIMIT":
+                    price = (
+                        min(price, order.limit_price)
+                        if side == "BUY"
+                        else max(price, order.limit_price)
+                    )
+                fills.append(
+                    Fill(
+                        order_id=order.order_id,
+                        symbol=symbol,
+                        side=side,
+                        qty=qty,
+                        price=price,
+                        timestamp=timestamp,
+                        partial=order.remaining > 0,
+                        commission=self.commission_per_share * qty,
+                    )
+                )
+        return fills
 
 
 class BACKTESTING_ENGINE:
@@ -110,8 +367,8 @@ class BACKTESTING_ENGINE:
     def __init__(
         self,
         symbols: List[str],
-        strategy: strat.Strategy,
-        data_endpoint,
+        strategy: Union[strat.Strategy, Mapping[str, StrategySpec]],
+        data_endpoint=None,
         initial_cash: float = 100_000,
         order_size: int = 100,
         fill_rate: float = 0.9,
@@ -120,35 +377,124 @@ class BACKTESTING_ENGINE:
         commission_per_share: float = 0.0,
         data_period: str = "365d",
         data_interval: str = "60m",
+        batch_signals: bool = True,
+        market_data: Optional[MarketData] = None,
+        state: Optional[MarketState] = None,
+        order_type: str = "market",
+        limit_offset_bps: float = 0.0,
+        expire_after: Optional[int] = None,
+        cancel_on_reverse: bool = True,
+        results_sink: Optional[ResultsSink] = None,
+        warmup_bars: int = 0,
+        rng: Optional[np.random.Generator] = None,
+        signals: Optional[np.ndarray] = None,
+        impact_model: Union[ImpactModel, str, None] = None,
     ):
         self.symbols = symbols
-        self.strategy = strategy
+        # single-strategy runs keep `strategy`; portfolios pass {symbol: strategy or [strategies]}
+        self.strategy = strategy if isinstance(strategy, strat.Strategy) else None
+        self.slots = self._strategy_slots(strategy)
         self.data_endpoint_cls = data_endpoint
         self.initial_cash = initial_cash
-        self.cash = initial_cash
         self.order_size = order_size
-        self.positions = {sym: 0 for sym in self.symbols}
-        self.avg_price = {sym: 0.0 for sym in self.symbols}
-        self.eq = {sym: Equity(sym) for sym in self.symbols}
-        self.equity_curve: List[Dict[str, object]] = []
-        self.trades: List[Dict[str, object]] = []
-        self.orders: List[Dict[str, object]] = []
-        self.realized_pnl = 0.0
-        self.total_commissions = 0.0
+        # each engine owns its Equity objects; the strategy is bound to them in run()
+        self.state = state if state is not None else MarketState()
+        self.eq = {sym: self.state.equity(sym) for sym in self.symbols}
+        # equity, trade and order records stream here; DiskSink keeps long runs out of memory
+        self.results_sink = results_sink if results_sink is not None else MemorySink()
+        self._order_seq: Dict[str, int] = {}  # open order id -> submission number
         self.matching_engine = MatchingEngine(
             fill_rate=fill_rate,
             cancel_prob=cancel_prob,
             slippage_bps=slippage_bps,
             commission_per_share=commission_per_share,
+            expire_after=expire_after,
+            on_close=self._log_order,
+            rng=rng,
+            impact=impact_model,
+            spread=self._spread,
         )
+        if order_type.upper() not in ("MARKET", "LIMIT"):
+            raise ValueError(f"order_type must be 'market' or 'limit', got {order_type!r}")
+        # limit orders are priced limit_offset_bps through (BUY below / SELL above) the signal bar's close
+        self.order_type = order_type.upper()
+        self.limit_offset_bps = limit_offset_bps
+        self.cancel_on_reverse = cancel_on_reverse
+        # leading bars that only build strategy history: no orders, fills or equity points
+        self.warmup_bars = warmup_bars
+        # recorded (bars x slots) signals from signal_matrix(), replayed instead of the strategies
+        self.signals = signals
         self.period = data_period
         self.interval = data_interval
-
-        self.endpoint = self.data_endpoint_cls(
-            self.symbols, self.period, self.interval
+        self.batch_signals = batch_signals
+        # per-run stage timings, merged into the process-wide PROFILER when the run ends
+        self.profiler = Profiler(enabled=PROFILER.enabled, threadsafe=False)
+
+        self.endpoint = None
+        if market_data is None:
+            self.endpoint = self.data_endpoint_cls(
+                self.symbols, self.period, self.interval
+            )
+            self.endpoint.data_grabber()
+            # columnar replay when the endpoint can align its data into matrices
+            if hasattr(self.endpoint, "align"):
+                market_data = self.endpoint.align()
+        self.market_data = market_data
+        if self.market_data is not None:
+            self._cols = [self.market_data.col[sym] for sym in self.symbols]
+            # engine symbols in MarketData column order need no per-bar gather
+            self._all_cols = self._cols == list(range(len(self.market_data.symbols)))
+            self._stream_iter = self.market_data.rows()
+        else:
+            self._stream_iter = self.endpoint.stream()
+        # symbols whose Equity is fed every bar; run() narrows this to event-driven strategies
+        self._tracked = list(self.symbols)
+        self.periods_per_year = periods_per_year(self.interval)
+        self.ledger = Ledger(
+            self.symbols, initial_cash, sink=self.results_sink, periods_per_year=self.periods_per_year
         )
-        self.endpoint.data_grabber()
-        self._stream_iter = self.endpoint.stream()
+
+    def _strategy_slots(self, strategy) -> List[Tuple[str, strat.Strategy]]:
+        """
+        Flattens the strategy argument into (symbol, strategy) pairs in evaluation order
+        """
+        if isinstance(strategy, strat.Strategy):
+            mapping = {strategy.symbol: [strategy]}
+        else:
+            mapping = strategy
+        slots = []
+        for sym, spec in mapping.items():
+            sym = sym.upper()
+            if sym not in self.symbols:
+                raise ValueError(f"strategy symbol {sym} is not in symbols {self.symbols}")
+            for member in [spec] if isinstance(spec, strat.Strategy) else spec:
+                if member.symbol != sym:
+                    raise ValueError(f"{type(member).__name__} for {member.symbol} listed under {sym}")
+                slots.append((sym, member))
+        if not slots:
+            raise ValueError("no strategies to run")
+        return slots
+
+    @property
+    def cash(self) -> float:
+        return self.ledger.cash
+
+    @property
+    def realized_pnl(self) -> float:
+        return self.ledger.realized_pnl
+
+    @property
+    def total_commissions(self) -> float:
+        return self.ledger.total_commissions
+
+    @property
+    def positions(self) -> Dict[str, float]:
+        return dict(zip(self.symbols, self.ledger.positions.tolist()))
+
+    def _spread(self, symbol: str) -> Optional[float]:
+        # latest quoted spread when quotes are fed into Equity; bar replays have none
+        eq = self.eq.get(symbol)
+        return eq.quotes["Spread"] if eq is not None else None
 
     def _scalar(self, value) -> float:
         try:
@@ -164,13 +510,25 @@ class BACKTESTING_ENGINE:
     def _mark_price(self, symbol: str, price: float, size: float, ts):
         self.eq[symbol].update_trade(price=price, size=size, timestamp=ts)
 
+    def _bar_value(self, bars, symbol: str, field: str) -> float:
+        if isinstance(bars, BarRow):
+            return getattr(bars, field)[bars.data.col[symbol]]
+        return self._scalar(bars[symbol][field])
+
     def load_next_tick(self):
         try:
             ts, bars = next(self._stream_iter)
         except StopIteration:
             return None
 
-        for sym in self.symbols:
+        if isinstance(bars, BarRow):
+            close, volume, col = bars.close, bars.volume, bars.data.col
+            for sym in self._tracked:
+                j = col[sym]
+                self._mark_price(sym, close[j], volume[j], ts)
+            return ts, bars
+
+        for sym in self._tracked:
             bar = bars[sym]
             close_px = self._scalar(bar["close"])
             vol = self._scalar(bar["volume"])
@@ -178,180 +536,241 @@ class BACKTESTING_ENGINE:
 
         return ts, bars
 
-    def _update_positions_from_fill(self, fill: Fill) -> float:
-        sym = fill.symbol
-        side = fill.side
-        qty = fill.qty
-        price = fill.price
-        pos = self.positions.get(sym, 0)
-        avg_price = self.avg_price.get(sym, 0.0)
-        realized = 0.0
-
-        if side == "BUY":
-            if pos < 0:
-                closing = min(qty, -pos)
-                realized += (avg_price - price) * closing
-                self.cash -= price * closing
-                pos += closing
-                qty -= closing
-                if pos == 0:
-                    avg_price = 0.0
-            if qty > 0:
-                self.cash -= price * qty
-                if pos >= 0:
-                    new_qty = pos + qty
-                    avg_price = (
-                        (avg_price * pos + price * qty) / new_qty if new_qty else 0.0
-                    )
-                    pos = new_qty
-                else:
-                    pos += qty
-                    avg_price = price
-        elif side == "SELL":
-            if pos > 0:
-                closing = min(qty, pos)
-                realized += (price - avg_price) * closing
-                self.cash += price * closing
-                pos -= closing
-                qty -= closing
-                if pos == 0:
-                    avg_price = 0.0
-            if qty > 0:
-                self.cash += price * qty
-                if pos <= 0:
-                    new_qty = pos - qty
-                    avg_price = (
-                        (avg_price * abs(pos) + price * qty) / abs(new_qty)
-                        if new_qty
-                        else 0.0
-                    )
-                    pos = new_qty
-                else:
-                    pos -= qty
-                    avg_price = price
+    def _precompute_signals(self) -> Tuple[Optional[np.ndarray], List[int]]:
+        """
+        Fast path: for every strategy with a batch API, its whole signal series up front.
+        Returns a (bars x batch strategies) int8 matrix (+1 BUY, -1 SELL, 0 none) and the
+        slot index of each column; (None, []) when no strategy can run in batch.
+        """
+        if self.signals is not None:
+            return np.asarray(self.signals, dtype=np.int8), list(range(len(self.slots)))
+        if not self.batch_signals or self.market_data is None:
+            return None, []
+        batch_idx = [k for k, (_, s) in enumerate(self.slots) if s.supports_batch]
+        if not batch_idx:
+            return None, []
+        matrix = np.zeros((len(self.market_data), len(batch_idx)), dtype=np.int8)
+        for c, k in enumerate(batch_idx):
+            sym, strategy = self.slots[k]
+            signals = strategy.compute_signals(self.market_data.column(sym, "close"))
+            matrix[:, c] = (signals == "BUY").astype(np.int8) - (signals == "SELL").astype(np.int8)
+        return matrix, batch_idx
+
+    def signal_matrix(self) -> np.ndarray:
+        """
+        Every slot's signal on every bar as a (bars x slots) int8 matrix (+1 BUY, -1 SELL).
+        Signals depend only on prices, so the matrix can be passed back as `signals=` to
+        replay the same decisions under different execution settings without the strategies.
+        """
+        if self.market_data is None:
+            raise ValueError("signal_matrix() needs market_data")
+        self._reset_state()
+        matrix, batch_idx = self._precompute_signals()
+        out = np.zeros((len(self.market_data), len(self.slots)), dtype=np.int8)
+        if matrix is not None:
+            out[:, batch_idx] = matrix
+        event_idx = [k for k in range(len(self.slots)) if k not in set(batch_idx)]
+        self._tracked = list(dict.fromkeys(self.slots[k][0] for k in event_idx))
+        if event_idx:
+            for i in range(len(self.market_data)):
+                self.load_next_tick()
+                for k in event_idx:
+                    signal = self.slots[k][1].compute_signal()
+                    if signal in ("BUY", "SELL"):
+                        out[i, k] = 1 if signal == "BUY" else -1
+        return out
+
+    def _reset_state(self):
+        """
+        Starts every run from empty Equity history and binds the strategy to this
+        engine's MarketState, so runs never share or leak price history.
+        """
+        for eq in self.eq.values():
+            eq.reset()
+        for _, strategy in self.slots:
+            strategy.bind(self.state)
+        self.ledger.reset()
+        if self.market_data is not None:
+            self._stream_iter = self.market_data.rows()
+        self.results_sink.create(
+            "orders",
+            TableSchema(
+                {
+                    "seq": "i8",
+                    "timestamp": "ts",
+                    "symbol": "cat",
+                    "side": "cat",
+                    "qty": "i8",
+                    "status": "cat",
+                    "order_type": "cat",
+                    "limit_price": "f8",
+                    "filled_qty": "i8",
+                },
+                categories={
+                    "symbol": self.symbols,
+                    "side": ["BUY", "SELL"],
+                    "status": ORDER_STATUSES,
+                    "order_type": ["MARKET", "LIMIT"],
+                },
+            ),
+        )
+        self._order_seq = {}
+        self._n_orders = 0
+
+    def _submit_order(self, symbol: str, side: str, price: float, ts) -> Order:
+        """
+        Turns a signal into a resting order; a reversal first cancels what is left
+        of orders on the other side
+        """
+        if self.cancel_on_reverse:
+            self.matching_engine.cancel_side(symbol, "SELL" if side == "BUY" else "BUY")
+        limit_price = None
+        if self.order_type == "LIMIT":
+            offset = self.limit_offset_bps / 10_000
+            limit_price = price * (1 - offset if side == "BUY" else 1 + offset)
+        order = Order(
+            order_id=str(uuid.uuid4()),
+            symbol=symbol,
+            side=side,
+            qty=self.order_size,
+            submitted_at=ts,
+            order_type=self.order_type,
+            limit_price=limit_price,
+        )
+        if self._n_orders == 0:
+            self.results_sink.set_tz("orders", getattr(ts, "tzinfo", None))
+        self._order_seq[order.order_id] = self._n_orders
+        self._n_orders += 1
+        return self.matching_engine.submit(order)
+
+    def _log_order(self, order: Order):
+        """
+        Streams an order to the "orders" table once it reaches its final state
+        """
+        self.results_sink.append(
+            "orders",
+            seq=self._order_seq.pop(order.order_id),
+            timestamp=order.submitted_at,
+            symbol=order.symbol,
+            side=order.side,
+            qty=order.qty,
+            status=order.status,
+            order_type=order.order_type,
+            limit_price=np.nan if order.limit_price is None else order.limit_price,
+            filled_qty=order.filled_qty,
+        )
 
-        self.positions[sym] = pos
-        self.avg_price[sym] = avg_price
-        self.realized_pnl += realized
-        self.total_commissions += fill.commission
-        return realized
+    def _update_positions_from_fill(self, fill: Fill) -> float:
+        return self.ledger.apply_fill(
+            fill.symbol, fill.side, fill.qty, fill.price, fill.commission, fill.partial
+        )
 
     def _record_equity(self, ts, bars):
-        equity_val = self.cash
-        for sym in self.symbols:
-            price = self._scalar(bars[sym]["close"])
-            equity_val += self.positions.get(sym, 0) * price
-        self.equity_curve.append({"timestamp": ts, "equity": equity_val})
-
-    def _orders_per_year(self) -> float:
-        interval = self.interval
-        if interval.endswith("m"):
-            minutes = int(interval[:-1])
-            bars_per_day = max(1, 390 // minutes)
-        elif interval.endswith("h"):
-            hours = int(interval[:-1])
-            bars_per_day = max(1, int(6.5 // hours))
+        if isinstance(bars, BarRow):
+            prices = bars.close if self._all_cols else bars.close[self._cols]
         else:
-            bars_per_day = 1
-        return bars_per_day * 252
+            prices = np.fromiter(
+                (self._bar_value(bars, sym, "close") for sym in self.symbols),
+                dtype=np.float64,
+                count=len(self.symbols),
+            )
+        self.ledger.mark(ts, prices)
 
     def compute_metrics(self) -> Dict[str, float]:
-        eq_df = pd.DataFrame(self.equity_curve)
-        metrics: Dict[str, float] = {}
-        if eq_df.empty:
+        """
+        Reads the ledger's running metrics; O(1), so it can also be polled mid-run
+        """
+        metrics = self.ledger.metrics.summary()
+        if not metrics:
             return metrics
-
-        eq_df["returns"] = eq_df["equity"].pct_change()
-        returns = eq_df["returns"].dropna()
-        periods_per_year = self._orders_per_year()
-
-        if not returns.empty and returns.std() != 0:
-            sharpe = math.sqrt(periods_per_year) * returns.mean() / returns.std()
-            metrics["sharpe"] = sharpe
-        else:
-            metrics["sharpe"] = float("nan")
-
-        running_max = eq_df["equity"].cummax()
-        drawdown = (eq_df["equity"] - running_max) / running_max
-        metrics["max_drawdown_pct"] = drawdown.min() * 100
-        metrics["final_equity"] = eq_df["equity"].iloc[-1]
-        metrics["total_return_pct"] = (
-            (eq_df["equity"].iloc[-1] - eq_df["equity"].iloc[0])
-            / eq_df["equity"].iloc[0]
-            * 100
-        )
-
-        trades_df = pd.DataFrame(self.trades)
-        if not trades_df.empty:
-            wins = trades_df.loc[trades_df["realized_pnl"] > 0, "realized_pnl"]
-            losses = trades_df.loc[trades_df["realized_pnl"] < 0, "realized_pnl"]
-            metrics["win_rate"] = len(wins) / len(trades_df)
-            metrics["avg_win"] = wins.mean() if not wins.empty else 0.0
-            metrics["avg_loss"] = losses.mean() if not losses.empty else 0.0
-            if not wins.empty and not losses.empty:
-                metrics["win_loss_ratio"] = abs(wins.mean() / losses.mean())
-            else:
-                metrics["win_loss_ratio"] = float("nan")
         metrics["realized_pnl"] = self.realized_pnl
         metrics["commissions"] = self.total_commissions
         return metrics
 
     def run(self) -> BacktestResult:
-        target = self.strategy.symbol.upper()
+        """
+        One replay for every (symbol, strategy) pair with shared cash and positions.
+        Batch strategies only cost work on bars where they signal, event-driven ones are
+        evaluated every bar, and matching only visits symbols with open orders.
+        """
+        prof = self.profiler if PROFILER.enabled else None
+        if prof is not None:
+            prof.reset()
+            run_start = t = time.perf_counter()
+        self._reset_state()
+        matrix, batch_idx = self._precompute_signals()
+        if prof is not None:
+            prof.lap("precompute_signals", t)
+        batch_set = set(batch_idx)
+        event_idx = [k for k in range(len(self.slots)) if k not in batch_set]
+        # only event-driven strategies read Equity history during the replay
+        self._tracked = list(dict.fromkeys(self.slots[k][0] for k in event_idx))
+        if matrix is not None:
+            rows, cols = np.nonzero(matrix)
+            sides = matrix[rows, cols]
+            slot_of = np.asarray(batch_idx)[cols]
+            starts = np.searchsorted(rows, np.arange(len(self.market_data) + 1))
+
+        me = self.matching_engine
+        bar_idx = 0
         while True:
+            if prof is not None:
+                t = time.perf_counter()
             tick = self.load_next_tick()
             if tick is None:
                 break
-
             ts, bars = tick
-            signal = self.strategy.compute_signal()
-            price = self._scalar(bars[target]["close"])
-            volume = self._scalar(bars[target]["volume"])
-
-            if signal in ("BUY", "SELL"):
-                order = Order(
-                    order_id=str(uuid.uuid4()),
-                    symbol=target,
-                    side=signal,
-                    qty=self.order_size,
-                    submitted_at=ts,
-                    status="NEW",
-                )
-                order, fill = self.matching_engine.execute(order, price, volume, ts)
-                self.orders.append(
-                    {
-                        "timestamp": ts,
-                        "symbol": target,
-                        "side": signal,
-                        "qty": self.order_size,
-                        "status": order.status,
-                    }
-                )
-                if fill:
-                    realized = self._update_positions_from_fill(fill)
-                    self.trades.append(
-                        {
-                            "timestamp": ts,
-                            "symbol": target,
-                            "side": signal,
-                            "qty": fill.qty,
-                            "price": fill.price,
-                            "partial": fill.partial,
-                            "realized_pnl": realized,
-                            "commission": fill.commission,
-                            "position_after": self.positions[target],
-                        }
-                    )
+            if prof is not None:
+                t = prof.lap("stream", t)
+
+            signals: List[Tuple[int, int]] = []
+            if matrix is not None:
+                lo, hi = starts[bar_idx], starts[bar_idx + 1]
+                signals.extend(zip(slot_of[lo:hi].tolist(), sides[lo:hi].tolist()))
+            for k in event_idx:
+                signal = self.slots[k][1].compute_signal()
+                if signal in ("BUY", "SELL"):
+                    signals.append((k, 1 if signal == "BUY" else -1))
+            if matrix is not None and event_idx:
+                signals.sort()
+            bar_idx += 1
+            if prof is not None:
+                t = prof.lap("compute_signal", t)
+            if bar_idx <= self.warmup_bars:
+                continue
+
+            me.next_bar()
+            for k, side in signals:
+                sym = self.slots[k][0]
+                price = self._bar_value(bars, sym, "close")
+                self._submit_order(sym, "BUY" if side > 0 else "SELL", price, ts)
+            if prof is not None:
+                t = prof.lap("submit", t)
+            # match every active symbol, then book the fills; matching never reads the ledger
+            fills: List[Fill] = []
+            for sym in list(me.active):
+                price = self._bar_value(bars, sym, "close")
+                volume = self._bar_value(bars, sym, "volume")
+                fills.extend(me.match(sym, price, volume, ts))
+            if prof is not None:
+                t = prof.lap("match", t)
+            for fill in fills:
+                self._update_positions_from_fill(fill)
 
             self._record_equity(ts, bars)
-
-        eq_df = pd.DataFrame(self.equity_curve)
-        trades_df = pd.DataFrame(self.trades)
-        orders_df = pd.DataFrame(self.orders)
+            if prof is not None:
+                prof.lap("accounting", t)
+
+        # orders still resting at the end are logged with their current status
+        open_orders = me.open_orders()
+        for order in open_orders:
+            self._log_order(order)
+        self.ledger.close()
         metrics = self.compute_metrics()
         config = {
             "symbols": self.symbols,
-            "strategy": type(self.strategy).__name__,
+            "strategy": type(self.strategy).__name__ if self.strategy is not None else "Portfolio",
+            "n_strategies": len(self.slots),
             "order_size": self.order_size,
             "initial_cash": self.initial_cash,
             "data_period": self.period,
@@ -359,14 +778,60 @@ class BACKTESTING_ENGINE:
             "fill_rate": self.matching_engine.fill_rate,
             "cancel_prob": self.matching_engine.cancel_prob,
             "slippage_bps": self.matching_engine.slippage_bps,
+            "impact_model": repr(self.matching_engine.impact),
+            "order_type": self.order_type,
+            "expire_after": self.matching_engine.expire_after,
+            "open_orders": len(open_orders),
+            "warmup_bars": self.warmup_bars,
+            "batch_signals": len(batch_idx) == len(self.slots),
         }
-        return BacktestResult(
-            equity_curve=eq_df,
-            trades=trades_df,
-            metrics=metrics,
-            config=config,
-            orders=orders_df,
+        profile = None
+        if prof is not None:
+            prof.lap("run", run_start)
+            prof.count("bars", self.ledger.metrics.bars)
+            prof.count("orders", self._n_orders)
+            prof.count("fills", self.ledger.metrics.fills)
+            PROFILER.merge(prof)
+            profile = prof.snapshot()
+        return BacktestResult(metrics=metrics, config=config, sink=self.results_sink, profile=profile)
+
+
+def load_market_data(
+    symbols: List[str], data_endpoint, data_period: str, data_interval: str
+) -> MarketData:
+    """
+    Downloads and aligns bars once so several backtests can replay the same arrays.
+    """
+    endpoint = data_endpoint(symbols, data_period, data_interval)
+    endpoint.data_grabber()
+    return endpoint.align()
+
+
+def run_strategies(
+    strategies: List[Tuple[str, strat.Strategy]],
+    market_data: MarketData,
+    symbols: Optional[List[str]] = None,
+    results_dir: Optional[Path] = None,
+    **engine_kwargs,
+) -> Dict[str, BacktestResult]:
+    """
+    Runs each (name, strategy) against the same immutable MarketData.
+    Every run gets its own MarketState, so results are independent of order.
+    results_dir: stream each run's records to results_dir/<name> on disk instead of memory.
+    """
+    symbols = symbols or market_data.symbols
+    results: Dict[str, BacktestResult] = {}
+    for name, strategy in strategies:
+        sink = DiskSink(Path(results_dir) / name.lower()) if results_dir is not None else None
+        engine = BACKTESTING_ENGINE(
+            symbols=symbols,
+            strategy=strategy,
+            market_data=market_data,
+            results_sink=sink,
+            **engine_kwargs,
         )
+        results[name] = engine.run()
+    return results
 
 
 def plot_equity_curve(dates, equity_values, path: Path, strategy_name="Strategy"):
@@ -383,14 +848,37 @@ def plot_equity_curve(dates, equity_values, path: Path, strategy_name="Strategy"
     plt.close(fig)
 
 
+def _decimated_equity(sink: ResultsSink, max_points: int = MAX_PLOT_POINTS) -> pd.DataFrame:
+    """
+    Every k-th point of the equity table, read in chunks, so plotting stays cheap on long runs
+    """
+    step = max(1, math.ceil(sink.num_rows("equity") / max_points))
+    parts, offset = [], 0
+    for chunk in sink.chunks("equity"):
+        parts.append(chunk.iloc[(-offset) % step :: step])
+        offset += len(chunk)
+    return pd.concat(parts, ignore_index=True)
+
+
 def render_report(result: BacktestResult, report_path: Path, equity_path: Path):
+    """
+    Markdown report and equity curve PNG of one run. A profiled run also gets a stage
+    latency section, and its timings are written next to the report as <report>_profile.json.
+    """
+    with PROFILER.stage("render_report"):
+        _render_report(result, report_path, equity_path)
+
+
+def _render_report(result: BacktestResult, report_path: Path, equity_path: Path):
     report_path.parent.mkdir(parents=True, exist_ok=True)
     equity_path.parent.mkdir(parents=True, exist_ok=True)
+    sink = result.sink
 
-    if not result.equity_curve.empty:
+    if sink.num_rows("equity"):
+        curve = _decimated_equity(sink)
         plot_equity_curve(
-            result.equity_curve["timestamp"],
-            result.equity_curve["equity"],
+            curve["timestamp"],
+            curve["equity"],
             equity_path,
             strategy_name=result.config["strategy"],
         )
@@ -409,15 +897,16 @@ def render_report(result: BacktestResult, report_path: Path, equity_path: Path):
         md.append("- No metrics computed (no equity curve).")
 
     md.append("\n## Trade Summary")
-    if not result.trades.empty:
-        md.append(f"- Trades: {len(result.trades)}")
-        md.append(
-            f"- Partial fills: {int(result.trades['partial'].sum())}"
-        )
+    n_trades = sink.num_rows("trades")
+    if n_trades:
+        partials = sum(int(c["partial"].sum()) for c in sink.chunks("trades", columns=["partial"]))
+        md.append(f"- Trades: {n_trades}")
+        md.append(f"- Partial fills: {partials}")
+        first_trades = next(sink.chunks("trades", rows=5))
         try:
-            trade_table = result.trades.head(5).to_markdown(index=False)
+            trade_table = first_trades.to_markdown(index=False)
         except Exception:
-            trade_table = result.trades.head(5).to_string(index=False)
+            trade_table = first_trades.to_string(index=False)
         md.append(f"- First 5 trades:\n\n{trade_table}")
     else:
         md.append("- No trades executed.")
@@ -425,12 +914,23 @@ def render_report(result: BacktestResult, report_path: Path, equity_path: Path):
     if equity_path.exists():
         md.append(f"\n## Equity Curve\n![Equity Curve]({equity_path})")
 
+    if result.profile is not None:
+        profile_path = report_path.with_name(f"{report_path.stem}_profile.json")
+        profile_path.write_text(json.dumps(result.profile, indent=2))
+        md.append("\n" + profile_markdown(result.profile, "Profile (backtest run)"))
+        md.append(f"\n[Profile JSON]({profile_path})")
+
     report_path.write_text("\n".join(md))
 
 
-def render_comparison(entries: List[Dict[str, object]], report_path: Path):
+def render_comparison(
+    entries: List[Dict[str, object]], report_path: Path, profile: Optional[Dict[str, object]] = None
+):
     """
     Build a side-by-side comparison markdown for multiple strategy results.
+    An entry may carry "monte_carlo" (a MonteCarloResult from monte_carlo.py); its metric
+    distributions and confidence intervals get their own section.
+    profile: a Profiler.snapshot() (e.g. the session's PROFILER) shown as a stage latency table.
     """
     report_path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -440,11 +940,13 @@ def render_comparison(entries: List[Dict[str, object]], report_path: Path):
         name = entry["name"]
         result: BacktestResult = entry["result"]
         metrics = result.metrics
-        trades_count = len(result.trades)
+        trades_count = result.sink.num_rows("trades")
         rows.append(
             {
                 "strategy": name,
                 "sharpe": metrics.get("sharpe"),
+                "sortino": metrics.get("sortino"),
+                "calmar": metrics.get("calmar"),
                 "total_return_pct": metrics.get("total_return_pct"),
                 "max_drawdown_pct": metrics.get("max_drawdown_pct"),
                 "final_equity": metrics.get("final_equity"),
@@ -467,6 +969,21 @@ def render_comparison(entries: List[Dict[str, object]], report_path: Path):
     except Exception:
         table = df.to_string(index=False)
     md.append(f"\n{table}\n")
+    mc_entries = [e for e in entries if e.get("monte_carlo") is not None]
+    if mc_entries:
+        md.append("## Monte Carlo")
+        for entry in mc_entries:
+            mc = entry["monte_carlo"]
+            summary = mc.summary[["metric", "mean", "std", "median", "ci_low", "ci_high"]]
+            md.append(f"\n### {entry['name']} ({len(mc.scenarios)} scenarios)\n")
+            try:
+                md.append(summary.to_markdown(index=False, floatfmt=".4f"))
+            except Exception:
+                md.append(summary.to_string(index=False))
+        md.append("")
+    if profile is not None:
+        md.append(profile_markdown(profile, "Profile (session)"))
+        md.append("")
     md.append("## Links")
     md.extend(links)
 
@@ -475,7 +992,8 @@ def render_comparison(entries: List[Dict[str, object]], report_path: Path):
 
 if __name__ == "__main__":
     SYMBOLS = ["AAPL", "NVDA"]
-    DATA_ENDPOINT = YF_ENDPOINT
+    OFFLINE = False  # True: replay only what is already in the local bar cache
+    DATA_ENDPOINT = partial(YF_ENDPOINT, cache=BarCache(offline=OFFLINE))
     INITIAL_CASH = 80_000
     ORDER_SIZE = 75
     FILL_RATE = 0.85
@@ -484,6 +1002,7 @@ if __name__ == "__main__":
     COMMISSION_PER_SHARE = 0.0
     DATA_PERIOD = "365d"
     DATA_INTERVAL = "60m"
+    MONTE_CARLO_SCENARIOS = 200  # 0 skips the execution-noise runs
 
     strategies = [
         ("MeanReversion", strat.MeanReversion(symbol="AAPL", window=10, z_thresh=1.3)),
@@ -491,25 +1010,48 @@ if __name__ == "__main__":
         ("RandomStrategy", strat.RandomStrategy(symbol="AAPL")),
     ]
 
+    print(f"Loading {DATA_PERIOD} of {DATA_INTERVAL} bars for {SYMBOLS}...")
+    market_data = load_market_data(SYMBOLS, DATA_ENDPOINT, DATA_PERIOD, DATA_INTERVAL)
+
+    print(f"Running backtests for {[name for name, _ in strategies]}...")
+    results = run_strategies(
+        strategies,
+        market_data,
+        symbols=SYMBOLS,
+        initial_cash=INITIAL_CASH,
+        order_size=ORDER_SIZE,
+        fill_rate=FILL_RATE,
+        cancel_prob=CANCEL_PROB,
+        slippage_bps=SLIPPAGE_BPS,
+        commission_per_share=COMMISSION_PER_SHARE,
+        data_period=DATA_PERIOD,
+        data_interval=DATA_INTERVAL,
+    )
+
+    monte_carlo = {}
+    if MONTE_CARLO_SCENARIOS:
+        from monte_carlo import run_monte_carlo
+
+        print(f"Running {MONTE_CARLO_SCENARIOS} Monte Carlo execution scenarios per strategy...")
+        for name, strategy in strategies:
+            monte_carlo[name] = run_monte_carlo(
+                strategy,
+                market_data,
+                n_scenarios=MONTE_CARLO_SCENARIOS,
+                symbols=SYMBOLS,
+                cancel_prob=(0.0, 2 * CANCEL_PROB),
+                fill_rate=(FILL_RATE / 2, 1.0),
+                slippage_bps=(0.0, 2 * SLIPPAGE_BPS),
+                initial_cash=INITIAL_CASH,
+                order_size=ORDER_SIZE,
+                commission_per_share=COMMISSION_PER_SHARE,
+                data_period=DATA_PERIOD,
+                data_interval=DATA_INTERVAL,
+            )
+
     report_dir = Path("reports")
     comparison_entries = []
-    for name, strategy in strategies:
-        print(f"Starting backtest for {name}...")
-        engine = BACKTESTING_ENGINE(
-            symbols=SYMBOLS,
-            strategy=strategy,
-            data_endpoint=DATA_ENDPOINT,
-            initial_cash=INITIAL_CASH,
-            order_size=ORDER_SIZE,
-            fill_rate=FILL_RATE,
-            cancel_prob=CANCEL_PROB,
-            slippage_bps=SLIPPAGE_BPS,
-            commission_per_share=COMMISSION_PER_SHARE,
-            data_period=DATA_PERIOD,
-            data_interval=DATA_INTERVAL,
-        )
-
-        result = engine.run()
+    for name, result in results.items():
         print(f"Backtest complete for {name}.")
 
         report_path = report_dir / f"{name.lower()}_performance_report.md"
@@ -517,10 +1059,19 @@ if __name__ == "__main__":
         render_report(result, report_path=report_path, equity_path=equity_path)
 
         comparison_entries.append(
-            {"name": name, "result": result, "report": report_path, "equity": equity_path}
+            {
+                "name": name,
+                "result": result,
+                "report": report_path,
+                "equity": equity_path,
+                "monte_carlo": monte_carlo.get(name),
+            }
         )
 
         print(f"Report written to {report_path}")
 
-    render_comparison(comparison_entries, report_dir / "comparison_report.md")
+    profile = PROFILER.snapshot() if PROFILER.enabled else None
+    render_comparison(comparison_entries, report_dir / "comparison_report.md", profile=profile)
     print(f"Comparison report written to {report_dir / 'comparison_report.md'}")
+    if profile is not None:
+        print(f"Profile written to {PROFILER.write_json(report_dir / 'profile.json')}")
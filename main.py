@@ -1,71 +1,146 @@
 import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import os 
-from systems.equity import Equity
-from systems.strategy import MeanReversion, AutoRegresion
-from systems.gateway_in import ALPACA_ENDPOINT
+from systems.equity import MarketState
+from systems.strategy import MeanReversion, AutoRegresion, StrategyEnsemble
+from systems.gateway_in import ALPACA_ASYNC_ENDPOINT, ALPACA_STREAM_ENDPOINT
 from systems.order_manager import OrderManager
+from systems.order_dispatch import OrderDispatcher
+from systems.sim_broker import SIM_ORDER_MANAGER
+from systems.scheduler import LiveScheduler
+from systems.profiler import PROFILER
+from pathlib import Path
 
 # CONFIGURATION
 load_dotenv()
 KEY = os.getenv('ALPACA_API_KEY')
 SECRET = os.getenv('ALPACA_SECRET')
 SYMBOLS = ["AAPL", "NVDA", "MSFT"]
-LOOP_DELAY = 25   
+LOOP_DELAY = 25   # quote fetch cadence in seconds (fixed schedule, not sleep-after-work)
+STRATEGY_WORKERS = 4
+ENSEMBLE_VOTE = "weighted"      # "majority", "unanimous" or "weighted"
+ENSEMBLE_WEIGHTS = [0.6, 0.4]   # MeanReversion, AutoRegresion
+ENSEMBLE_THRESHOLD = 0.5        # weighted: net vote needed to trade
 TRADE_QTY = 75    
+STREAM_MODE = os.getenv("STREAM_MODE", "0") == "1"  # push quotes over websocket instead of polling
+SIM_BROKER = os.getenv("SIM_BROKER", "0") == "1"  # send orders to the in-process simulated broker
+SYMBOL_URGENCY = {}  # e.g. {"NVDA": "high"}; unlisted symbols dispatch at "normal"
+PROFILE_DIR = Path("reports")  # PROFILE=1: stage latencies go to live_profile.md / .json here on exit
 
 # CREATE OBJECTS
-alpaca_feed = ALPACA_ENDPOINT(KEY, SECRET, SYMBOLS)
-strategies = {sym: [MeanReversion(sym, window=10, z_thresh=1.3),
-                    AutoRegresion(sym)] for sym in SYMBOLS}
-order_manager = OrderManager(KEY, SECRET)
+state = MarketState()
+alpaca_feed = ALPACA_ASYNC_ENDPOINT(KEY, SECRET, SYMBOLS)
+member_pool = ThreadPoolExecutor(STRATEGY_WORKERS, thread_name_prefix="ensemble")
+strategies = {
+    sym: [StrategyEnsemble(
+        sym,
+        [MeanReversion(sym, window=10, z_thresh=1.3, state=state), AutoRegresion(sym, state=state)],
+        weights=ENSEMBLE_WEIGHTS,
+        vote=ENSEMBLE_VOTE,
+        threshold=ENSEMBLE_THRESHOLD,
+        executor=member_pool,
+    )]
+    for sym in SYMBOLS
+}
+sim_broker = SIM_ORDER_MANAGER(ack_latency=0.05) if SIM_BROKER else None
+order_manager = OrderManager(KEY, SECRET, gateway=sim_broker)
+dispatcher = OrderDispatcher(order_manager, rate_per_min=200)  # Alpaca REST limit
 
 # HANDLER FUNC: UPDATE EQUITY CLASS WITH QUOTES
-def update_equity_handler(symbol, q):
+def make_equity_handler(state: MarketState):
     """
-    Incoming quote from Alpaca, store in Equity singleton
+    Builds a quote handler bound to one MarketState
     """
-    e = Equity(symbol)
-    e.update_quote(
-        bp=q["bid"],
-        bsz=q["bid_size"],
-        ap=q["ask"],
-        asksz=q["ask_size"])
-    mid_price = (q["bid"] + q["ask"]) / 2
-    e.update_trade(price=mid_price, size=1, timestamp=q["timestamp"])
+    def update_equity_handler(symbol, q):
+        """
+        Incoming quote from Alpaca, store in the session's Equity
+        """
+        e = state.equity(symbol)
+        e.update_quote(
+            bp=q["bid"],
+            bsz=q["bid_size"],
+            ap=q["ask"],
+            asksz=q["ask_size"])
+        mid_price = (q["bid"] + q["ask"]) / 2
+        e.update_trade(price=mid_price, size=1, timestamp=q["timestamp"])
+    return update_equity_handler
 
+update_equity_handler = make_equity_handler(state)
 alpaca_feed.register_handler(update_equity_handler)
+if sim_broker is not None:
+    alpaca_feed.register_handler(sim_broker.on_quote)
+    sim_broker.register_trade_handler(order_manager.on_trade_update)
 
-# MAIN TRADING LOOP
-def main():
-    print("Live Trading System Started.")
-
-    while True:
-        try:
-            alpaca_feed.grab_quotes()
-
-            for sym in SYMBOLS:
-                strat = strategies[sym]
-                signal = strat.compute_signal()
-
-                if signal is None:
-                    continue
-
-                print(f"[{sym}] SIGNAL: {signal}")
-
-                order_manager.place_order(sym, signal, TRADE_QTY)
+# SIGNAL HANDLER: QUEUE ORDERS FROM EVERY STRATEGY RUN
+def on_signal(symbol, strat, signal):
+    """
+    Called by the scheduler's workers for each non-None signal
+    """
+    print(f"[{symbol}] {type(strat).__name__} SIGNAL: {signal} votes={getattr(strat, 'last_votes', None)}")
+    dispatcher.submit(symbol, signal, TRADE_QTY, urgency=SYMBOL_URGENCY.get(symbol, "normal"))
 
+def run_until_interrupted(scheduler):
+    dispatcher.start()
+    scheduler.start()
+    order_manager.start_reconciler()
+    try:
+        while True:
             time.sleep(LOOP_DELAY)
+    except KeyboardInterrupt:
+        print("Keyboard Interrupt — stopping system.")
+    finally:
+        scheduler.stop()
+        member_pool.shutdown()
+        dispatcher.stop()
+        order_manager.stop_reconciler()
+        for sym, row in scheduler.report().items():
+            print(f"[{sym}] {row}")
+        if PROFILER.enabled:
+            write_profile(scheduler)
 
-        except KeyboardInterrupt:
-            print("Keyboard Interrupt — stopping system.")
-            break
+def write_profile(scheduler):
+    """
+    Exports the session's stage latencies (fetch, compute_signal, on_signal, order_ack, ...)
+    """
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    md = ["# Live Loop Profile\n", PROFILER.markdown("Stage latencies"), "\n## Pipelines"]
+    md.extend(f"- **{sym}**: {row}" for sym, row in scheduler.report().items())
+    md.append(f"- **dispatcher**: {dispatcher.latency_stats()}")
+    (PROFILE_DIR / "live_profile.md").write_text("\n".join(md))
+    print(PROFILER.markdown("Stage latencies"))
+    print(f"Profile written to {PROFILER.write_json(PROFILE_DIR / 'live_profile.json')}")
 
-        except Exception as e:
-            print(f"System Error @ {datetime.now()}: {e}")
-            time.sleep(5)
+# PUSH MODE: EACH QUOTE TRIGGERS ITS SYMBOL'S PIPELINE
+def main_stream():
+    print("Live Trading System Started (stream mode).")
+    scheduler = LiveScheduler(on_signal, max_workers=STRATEGY_WORKERS)
+    for sym in SYMBOLS:
+        scheduler.add(sym, strategies[sym])
+    stream = ALPACA_STREAM_ENDPOINT(KEY, SECRET, SYMBOLS)
+    stream.register_handler(update_equity_handler)
+    if sim_broker is not None:
+        stream.register_handler(sim_broker.on_quote)
+    stream.register_handler(scheduler.on_quote)
+    stream.start()
+    try:
+        run_until_interrupted(scheduler)
+    finally:
+        stream.stop()
+
+# POLLING MODE: ONE BATCHED QUOTE FETCH PER CADENCE TRIGGERS THE PER-SYMBOL PIPELINES
+def main():
+    print("Live Trading System Started.")
+    scheduler = LiveScheduler(on_signal, max_workers=STRATEGY_WORKERS)
+    for sym in SYMBOLS:
+        scheduler.add(sym, strategies[sym])
+    # multi-symbol requests: ceil(len(SYMBOLS) / batch_size) per cadence, not one per symbol
+    scheduler.add_feed(SYMBOLS, period=LOOP_DELAY, fetch=alpaca_feed.grab_quotes)
+    run_until_interrupted(scheduler)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if STREAM_MODE:
+        main_stream()
+    else:
+        main()
\ No newline at end of file
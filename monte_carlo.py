@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+import systems.strategy as strat
+from backtester import BACKTESTING_ENGINE, StrategySpec, load_market_data
+from sweep import SharedMarketData, attach_market_data
+from systems.gateway_in import MarketData
+from systems.results_sink import MemorySink
+
+# execution settings a scenario may vary: a (low, high) range is drawn uniformly per scenario
+SCENARIO_PARAMS = ("cancel_prob", "fill_rate", "slippage_bps")
+SUMMARY_METRICS = ("sharpe", "sortino", "total_return_pct", "max_drawdown_pct", "win_rate", "final_equity")
+
+
+@dataclass
+class MonteCarloResult:
+    """
+    scenarios: one row per scenario (seed, drawn execution settings, every metric).
+    summary: per-metric distribution (mean, std, quantiles) and confidence interval.
+    """
+
+    scenarios: pd.DataFrame
+    summary: pd.DataFrame
+
+
+def draw_scenarios(
+    n: int,
+    seed: int = 0,
+    cancel_prob: Union[float, Tuple[float, float]] = 0.05,
+    fill_rate: Union[float, Tuple[float, float]] = 0.9,
+    slippage_bps: Union[float, Tuple[float, float]] = 1.5,
+) -> pd.DataFrame:
+    """
+    n seeded scenarios drawn in one vectorized call per parameter. Each row also carries
+    the seed of that scenario's order-level cancel draws.
+    """
+    rng = np.random.default_rng(seed)
+    table = {"scenario": np.arange(n)}
+    for name, spec in zip(SCENARIO_PARAMS, (cancel_prob, fill_rate, slippage_bps)):
+        if isinstance(spec, tuple):
+            table[name] = rng.uniform(spec[0], spec[1], n)
+        else:
+            table[name] = np.full(n, float(spec))
+    table["seed"] = rng.integers(0, 2**63 - 1, n, dtype=np.int64)
+    return pd.DataFrame(table)
+
+
+def summarize(scenarios: pd.DataFrame, metrics: Sequence[str] = SUMMARY_METRICS, ci: float = 0.95) -> pd.DataFrame:
+    """
+    Distribution of each metric across scenarios; ci_low / ci_high bound the central `ci` mass
+    """
+    tail = (1 - ci) / 2
+    rows = []
+    for name in metrics:
+        if name not in scenarios:
+            continue
+        values = scenarios[name].to_numpy(dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            continue
+        q = np.quantile(values, [tail, 0.05, 0.5, 0.95, 1 - tail])
+        rows.append(
+            {
+                "metric": name,
+                "mean": values.mean(),
+                "std": values.std(ddof=1) if len(values) > 1 else 0.0,
+                "p5": q[1],
+                "median": q[2],
+                "p95": q[3],
+                "ci_low": q[0],
+                "ci_high": q[4],
+                "n": len(values),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+# per-process state set up once by the pool initializer
+_WORKER: Dict[str, object] = {}
+
+
+def _init_worker(handle, strategy, signals, symbols, engine_kwargs):
+    data, blocks = attach_market_data(handle)
+    _WORKER.update(
+        market_data=data,
+        blocks=blocks,
+        strategy=strategy,
+        signals=signals,
+        symbols=symbols,
+        engine_kwargs=engine_kwargs,
+    )
+
+
+def _run_scenarios(rows: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    out = []
+    for row in rows:
+        engine = BACKTESTING_ENGINE(
+            symbols=_WORKER["symbols"],
+            strategy=_WORKER["strategy"],
+            market_data=_WORKER["market_data"],
+            signals=_WORKER["signals"],
+            rng=np.random.default_rng(int(row["seed"])),
+            results_sink=MemorySink(batch_size=1024),
+            **{name: row[name] for name in SCENARIO_PARAMS},
+            **_WORKER["engine_kwargs"],
+        )
+        out.append({**row, **engine.run().metrics})
+    return out
+
+
+def run_monte_carlo(
+    strategy: Union[strat.Strategy, Dict[str, StrategySpec]],
+    market_data: MarketData,
+    n_scenarios: int = 1000,
+    symbols: Optional[List[str]] = None,
+    cancel_prob: Union[float, Tuple[float, float]] = 0.05,
+    fill_rate: Union[float, Tuple[float, float]] = 0.9,
+    slippage_bps: Union[float, Tuple[float, float]] = 1.5,
+    n_workers: Optional[int] = None,
+    seed: int = 0,
+    ci: float = 0.95,
+    **engine_kwargs,
+) -> MonteCarloResult:
+    """
+    Replays one strategy's signals under n_scenarios seeded execution scenarios.
+
+    The signals are recorded once (BACKTESTING_ENGINE.signal_matrix) and every scenario
+    replays that matrix, so only execution varies: cancel_prob, fill_rate and slippage_bps
+    are fixed values or (low, high) ranges drawn per scenario, and each scenario's cancel
+    draws come from its own numpy Generator in vectorized blocks. Scenarios run in batches
+    over a process pool sharing the market data; results do not depend on n_workers.
+    """
+    symbols = symbols or market_data.symbols
+    signals = BACKTESTING_ENGINE(
+        symbols, strategy, market_data=market_data, **engine_kwargs
+    ).signal_matrix()
+    table = draw_scenarios(n_scenarios, seed, cancel_prob, fill_rate, slippage_bps)
+    rows = table.to_dict("records")
+
+    n_workers = min(n_workers or os.cpu_count() or 1, max(len(rows), 1))
+    batch = max(1, len(rows) // (n_workers * 4))
+    batches = [rows[i : i + batch] for i in range(0, len(rows), batch)]
+    with SharedMarketData(market_data) as shared:
+        initargs = (shared.handle, strategy, signals, symbols, engine_kwargs)
+        if n_workers == 1:
+            _init_worker(*initargs)
+            try:
+                outputs = [_run_scenarios(b) for b in batches]
+            finally:
+                _WORKER.clear()
+        else:
+            with ProcessPoolExecutor(
+                max_workers=n_workers, initializer=_init_worker, initargs=initargs
+            ) as pool:
+                outputs = list(pool.map(_run_scenarios, batches))
+
+    scenarios = pd.DataFrame([row for b in outputs for row in b])
+    return MonteCarloResult(scenarios=scenarios, summary=summarize(scenarios, ci=ci))
+
+
+if __name__ == "__main__":
+    from functools import partial
+    from pathlib import Path
+
+    from systems.bar_cache import BarCache
+    from systems.gateway_in import YF_ENDPOINT
+
+    SYMBOLS = ["AAPL", "NVDA"]
+    DATA_ENDPOINT = partial(YF_ENDPOINT, cache=BarCache())
+    DATA_PERIOD = "365d"
+    DATA_INTERVAL = "60m"
+
+    market_data = load_market_data(SYMBOLS, DATA_ENDPOINT, DATA_PERIOD, DATA_INTERVAL)
+    result = run_monte_carlo(
+        strat.MeanReversion(symbol="AAPL", window=10, z_thresh=1.3),
+        market_data,
+        n_scenarios=1000,
+        symbols=SYMBOLS,
+        cancel_prob=(0.0, 0.15),
+        fill_rate=(0.5, 1.0),
+        slippage_bps=(0.5, 5.0),
+        data_interval=DATA_INTERVAL,
+        data_period=DATA_PERIOD,
+        seed=42,
+    )
+    out = Path("reports") / "meanreversion_monte_carlo.csv"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    result.scenarios.to_csv(out, index=False)
+    print(result.summary.to_string(index=False))
+    print(f"Scenario table written to {out}")
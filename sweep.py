@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import inspect
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+
+import numpy as np
+import pandas as pd
+
+import systems.strategy as strat
+from backtester import BACKTESTING_ENGINE, load_market_data
+from systems.gateway_in import MarketData
+
+ENGINE_PARAMS = {
+    name
+    for name in inspect.signature(BACKTESTING_ENGINE.__init__).parameters
+    if name not in ("self", "symbols", "strategy", "data_endpoint", "market_data")
+}
+
+
+@dataclass(frozen=True)
+class SharedArraySpec:
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+@dataclass(frozen=True)
+class SharedMarketHandle:
+    """
+    Picklable description of a MarketData living in shared memory.
+    """
+
+    symbols: Tuple[str, ...]
+    tz: Optional[str]
+    timestamps: SharedArraySpec
+    close: SharedArraySpec
+    volume: SharedArraySpec
+
+
+class SharedMarketData:
+    """
+    Copies MarketData into shared memory once; workers attach to it without pickling arrays.
+    Use as a context manager so the blocks are unlinked when the sweep ends.
+    """
+
+    def __init__(self, market_data: MarketData):
+        self._blocks: List[shared_memory.SharedMemory] = []
+        ts = market_data.timestamps
+        self.handle = SharedMarketHandle(
+            symbols=tuple(market_data.symbols),
+            tz=str(ts.tz) if ts.tz is not None else None,
+            timestamps=self._share(ts.as_unit("ns").asi8),
+            close=self._share(market_data.close),
+            volume=self._share(market_data.volume),
+        )
+
+    def _share(self, arr: np.ndarray) -> SharedArraySpec:
+        block = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=block.buf)[...] = arr
+        self._blocks.append(block)
+        return SharedArraySpec(block.name, arr.shape, arr.dtype.str)
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> "SharedMarketData":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach_market_data(
+    handle: SharedMarketHandle,
+) -> Tuple[MarketData, List[shared_memory.SharedMemory]]:
+    """
+    Rebuilds a zero-copy MarketData over the shared blocks (keep the blocks referenced).
+    """
+    blocks = []
+
+    def view(spec: SharedArraySpec) -> np.ndarray:
+        block = shared_memory.SharedMemory(name=spec.name)
+        blocks.append(block)
+        return np.ndarray(spec.shape, dtype=np.dtype(spec.dtype), buffer=block.buf)
+
+    ts = pd.DatetimeIndex(view(handle.timestamps).view("datetime64[ns]"))
+    ts = ts.tz_localize("UTC").tz_convert(handle.tz) if handle.tz else ts
+    data = MarketData(ts, list(handle.symbols), view(handle.close), view(handle.volume))
+    return data, blocks
+
+
+# per-process state set up once by the pool initializer
+_WORKER: Dict[str, object] = {}
+
+
+def _init_worker(handle: SharedMarketHandle):
+    data, blocks = attach_market_data(handle)
+    _WORKER["market_data"] = data
+    _WORKER["blocks"] = blocks
+
+
+def split_params(params: Dict[str, object]) -> Tuple[Dict[str, object], Dict[str, object]]:
+    """
+    Splits one parameter set into (strategy kwargs, BACKTESTING_ENGINE kwargs).
+    """
+    engine = {k: v for k, v in params.items() if k in ENGINE_PARAMS}
+    strategy = {k: v for k, v in params.items() if k not in ENGINE_PARAMS}
+    return strategy, engine
+
+
+def _run_one(task) -> Tuple[int, int, Dict[str, float]]:
+    run_id, seed, strategy_cls, strategy_kwargs, engine_kwargs, symbols = task
+    # MatchingEngine draws from the global RNGs, so seed both per run
+    random.seed(seed)
+    np.random.seed(seed % 2**32)
+    strategy = strategy_cls(**strategy_kwargs)
+    engine = BACKTESTING_ENGINE(
+        symbols=symbols,
+        strategy=strategy,
+        market_data=_WORKER["market_data"],
+        **engine_kwargs,
+    )
+    return run_id, seed, engine.run().metrics
+
+
+def grid(space: Dict[str, Sequence]) -> List[Dict[str, object]]:
+    """
+    Cartesian product of parameter values, in a deterministic order.
+    """
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*space.values())]
+
+
+def random_search(space: Dict[str, object], n: int, seed: int = 0) -> List[Dict[str, object]]:
+    """
+    n seeded draws: lists are sampled uniformly, (low, high) tuples uniformly in range
+    (integers if both bounds are ints).
+    """
+    rng = np.random.default_rng(seed)
+    samples = []
+    for _ in range(n):
+        params = {}
+        for key, choices in space.items():
+            if isinstance(choices, tuple):
+                low, high = choices
+                if isinstance(low, int) and isinstance(high, int):
+                    params[key] = int(rng.integers(low, high + 1))
+                else:
+                    params[key] = float(rng.uniform(low, high))
+            else:
+                params[key] = choices[int(rng.integers(len(choices)))]
+        samples.append(params)
+    return samples
+
+
+def run_sweep(
+    strategy_cls: Type[strat.Strategy],
+    param_sets: List[Dict[str, object]],
+    market_data: MarketData,
+    symbols: Optional[List[str]] = None,
+    fixed_params: Optional[Dict[str, object]] = None,
+    n_workers: Optional[int] = None,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    Runs one backtest per parameter set across a process pool and returns a results table
+    (one row per run: params, seed, and every BacktestResult.metrics entry).
+
+    fixed_params are merged into every set (e.g. symbol, data_interval). Strategy and engine
+    parameters may be mixed freely; engine ones are recognised by BACKTESTING_ENGINE's signature.
+    Each run gets its own seed spawned from `seed`, so the table is identical for any n_workers.
+    """
+    symbols = symbols or market_data.symbols
+    fixed_params = fixed_params or {}
+    seeds = [
+        int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(len(param_sets))
+    ]
+    tasks = []
+    for run_id, (params, run_seed) in enumerate(zip(param_sets, seeds)):
+        strategy_kwargs, engine_kwargs = split_params({**fixed_params, **params})
+        tasks.append((run_id, run_seed, strategy_cls, strategy_kwargs, engine_kwargs, symbols))
+
+    n_workers = n_workers or os.cpu_count() or 1
+    with SharedMarketData(market_data) as shared:
+        if n_workers == 1:
+            _init_worker(shared.handle)
+            try:
+                outputs = [_run_one(task) for task in tasks]
+            finally:
+                _WORKER.clear()
+        else:
+            chunksize = max(1, len(tasks) // (n_workers * 4))
+            with ProcessPoolExecutor(
+                max_workers=n_workers,
+                initializer=_init_worker,
+                initargs=(shared.handle,),
+            ) as pool:
+                outputs = list(pool.map(_run_one, tasks, chunksize=chunksize))
+
+    rows = []
+    for run_id, run_seed, metrics in sorted(outputs, key=lambda o: o[0]):
+        rows.append({"run_id": run_id, **param_sets[run_id], "seed": run_seed, **metrics})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    from functools import partial
+    from pathlib import Path
+
+    from systems.bar_cache import BarCache
+    from systems.gateway_in import YF_ENDPOINT
+
+    SYMBOLS = ["AAPL", "NVDA"]
+    DATA_ENDPOINT = partial(YF_ENDPOINT, cache=BarCache())
+    DATA_PERIOD = "365d"
+    DATA_INTERVAL = "60m"
+
+    market_data = load_market_data(SYMBOLS, DATA_ENDPOINT, DATA_PERIOD, DATA_INTERVAL)
+    param_sets = grid(
+        {
+            "window": [10, 20, 40],
+            "z_thresh": [0.8, 1.0, 1.3, 1.6],
+            "slippage_bps": [1.0, 2.0],
+            "fill_rate": [0.85, 1.0],
+        }
+    )
+    table = run_sweep(
+        strat.MeanReversion,
+        param_sets,
+        market_data,
+        symbols=SYMBOLS,
+        fixed_params={"symbol": "AAPL", "data_interval": DATA_INTERVAL, "data_period": DATA_PERIOD},
+        seed=42,
+    )
+    out = Path("reports") / "meanreversion_sweep.csv"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    table.sort_values("sharpe", ascending=False).to_csv(out, index=False)
+    print(table.sort_values("sharpe", ascending=False).head(10).to_string(index=False))
+    print(f"Sweep results written to {out}")
@@ -0,0 +1,313 @@
+## Local on-disk bar store for YF_ENDPOINT (backtests only)
+
+# imports
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+#-----------------------------------------------------------------------------------#
+# Layout under root:
+#   manifest.json                 (symbol, interval) -> segment digest + covered range
+#   objects/<digest>/<col>.npy    one column per file, read back with mmap_mode="r"
+#
+# Segments are content-addressed: the directory name is a hash of the stored arrays,
+# so refreshing a symbol writes a new segment and drops the old one. Only the missing
+# head/tail of a requested range is fetched; offline=True never touches the network.
+# Single-process cache: concurrent writers in separate processes are not coordinated.
+#-----------------------------------------------------------------------------------#
+
+COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+_INTERVALS = {"m": "min", "h": "h", "d": "D", "wk": "W"}
+_PERIODS = {"d": 1, "wk": 7, "mo": 30, "y": 365}
+
+def interval_delta(interval: str) -> pd.Timedelta:
+    """
+    "60m" -> 60 minutes, "1d" -> 1 day, "1wk" -> 7 days ...
+    """
+    for suffix in ("wk", "mo", "m", "h", "d"):
+        if interval.endswith(suffix):
+            n = int(interval[: -len(suffix)])
+            if suffix == "mo":
+                return pd.Timedelta(days=30 * n)
+            return pd.Timedelta(n, unit=_INTERVALS[suffix])
+    raise ValueError(f"Unknown interval: {interval}")
+
+def period_start(period: str, now: pd.Timestamp):
+    """
+    Start of a yfinance-style period ending at now, None for "max"
+    """
+    if period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=now.year, month=1, day=1, tz="UTC")
+    for suffix in ("wk", "mo", "y", "d"):
+        if period.endswith(suffix):
+            return now - pd.Timedelta(days=int(period[: -len(suffix)]) * _PERIODS[suffix])
+    raise ValueError(f"Unknown period: {period}")
+
+def _yf_fetch(symbol: str, start, end, interval: str) -> pd.DataFrame:
+    import yfinance as yf
+    return yf.download(symbol, start=start, end=end, interval=interval, progress=False)
+
+def _to_utc_ns(index: pd.DatetimeIndex) -> np.ndarray:
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    return index.tz_convert("UTC").as_unit("ns").asi8.copy()
+
+class BarCache:
+    """
+    Persistent bar store keyed by symbol, interval and covered date range.
+    fetch(symbol, start, end, interval) -> DataFrame is injectable (defaults to yfinance).
+    """
+
+    def __init__(self, root = ".bar_cache", max_bytes = 2 * 1024**3, max_entries = None,
+                 offline = False, fetch = None, clock = None):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.offline = offline
+        self.fetch = fetch or _yf_fetch
+        self.clock = clock or (lambda: pd.Timestamp.now(tz="UTC"))
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    # manifest ------------------------------------------------------------------
+    def _manifest_path(self):
+        return os.path.join(self.root, "manifest.json")
+
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path()) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _save_manifest(self):
+        tmp = self._manifest_path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, self._manifest_path())
+
+    @staticmethod
+    def key(symbol: str, interval: str):
+        return f"{symbol.upper()}|{interval}"
+
+    # segments ------------------------------------------------------------------
+    def _object_dir(self, digest):
+        return os.path.join(self.root, "objects", digest)
+
+    def _write_segment(self, frame: pd.DataFrame):
+        arrays = {"timestamp": _to_utc_ns(frame.index)}
+        for col in COLUMNS:
+            arrays[col] = frame[col].to_numpy(dtype=np.float64)
+        h = hashlib.sha256()
+        for name in sorted(arrays):
+            h.update(name.encode())
+            h.update(arrays[name].tobytes())
+        digest = h.hexdigest()[:24]
+
+        path = self._object_dir(digest)
+        if not os.path.exists(path):
+            tmp = path + ".tmp"
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.makedirs(tmp)
+            for name, arr in arrays.items():
+                np.save(os.path.join(tmp, f"{name}.npy"), arr)
+            os.replace(tmp, path)
+        nbytes = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+        return digest, nbytes
+
+    def _read_segment(self, entry, start = None) -> pd.DataFrame:
+        """
+        Bars of a segment from `start` (a UTC Timestamp, None for all); the columns are
+        memory-mapped and sliced before the frame is built, so only those rows are read
+        """
+        path = self._object_dir(entry["digest"])
+        mode = "r" if entry["rows"] else None  # empty files cannot be memory-mapped
+        ts = np.load(os.path.join(path, "timestamp.npy"), mmap_mode=mode)
+        lo = int(np.searchsorted(ts, start.value)) if start is not None else 0
+        index = pd.DatetimeIndex(np.asarray(ts[lo:]).view("datetime64[ns]")).tz_localize("UTC")
+        index = index.tz_convert(entry["tz"]) if entry["tz"] else index.tz_localize(None)
+        data = {col: np.load(os.path.join(path, f"{col}.npy"), mmap_mode=mode)[lo:] for col in COLUMNS}
+        return pd.DataFrame(data, index=index)
+
+    def _drop_object(self, digest):
+        if not any(e["digest"] == digest for e in self.manifest.values()):
+            shutil.rmtree(self._object_dir(digest), ignore_errors=True)
+
+    # fetching ------------------------------------------------------------------
+    def _fetch(self, symbol, start, end, interval) -> pd.DataFrame:
+        frame = self.fetch(symbol, start, end, interval)
+        if frame is None or frame.empty:
+            return pd.DataFrame(columns=list(COLUMNS), index=pd.DatetimeIndex([]))
+        if isinstance(frame.columns, pd.MultiIndex):
+            # yf.download returns (field, ticker) columns
+            frame = frame.droplevel(1, axis=1)
+        return frame[list(COLUMNS)].astype(np.float64)
+
+    def get(self, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        """
+        Bars for symbol over the period ending now, fetching only what the cache is missing
+        """
+        symbol = symbol.upper()
+        now = self.clock()
+        start = period_start(period, now)
+        key = self.key(symbol, interval)
+        step = interval_delta(interval)
+
+        with self._lock:
+            entry = self.manifest.get(key)
+
+        if entry is None:
+            if self.offline:
+                raise KeyError(f"{key} not cached and cache is offline")
+            frame = self._fetch(symbol, start, now, interval)
+            frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+            return self._store(key, symbol, interval, frame, start, now, start)
+
+        # covered_start None means the entry already holds the full ("max") history
+        covered_start, covered_end = entry["covered_start"], entry["covered_end"]
+        missing_head = covered_start is not None and (start is None or start.value < covered_start)
+        missing_tail = now.value - covered_end >= step.value
+
+        if self.offline:
+            if missing_head or missing_tail:
+                have = self._describe(entry)
+                print(f"Cache Warning @ {datetime.now()}: {key} offline cache covers "
+                      f"{have['covered_start']} .. {have['covered_end']}, requested "
+                      f"{'max' if start is None else start} .. {now}; returning the cached part")
+        elif (missing_head and start is not None) or missing_tail:
+            with self._lock:
+                pieces = [self._read_segment(entry)]
+            if missing_head and start is not None:
+                pieces.insert(0, self._fetch(symbol, start, pd.Timestamp(covered_start, tz="UTC") + step, interval))
+                covered_start = start
+            if missing_tail:
+                # refetch the last cached bar too, it may have been in progress
+                pieces.append(self._fetch(symbol, pd.Timestamp(covered_end, tz="UTC") - step, now, interval))
+                covered_end = now
+            frames = [p for p in pieces if not p.empty]
+            merged = pd.concat(frames) if frames else pieces[0]
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            return self._store(key, symbol, interval, merged, covered_start, covered_end, start)
+
+        with self._lock:
+            self.manifest[key]["last_access"] = now.value
+            self._save_manifest()
+            return self._read_segment(self.manifest[key], start)
+
+    def _store(self, key, symbol, interval, frame, covered_start, covered_end, start = None):
+        tz = str(frame.index.tz) if frame.index.tz is not None else ""
+        digest, nbytes = self._write_segment(frame)
+        with self._lock:
+            old = self.manifest.get(key)
+            self.manifest[key] = {
+                "symbol": symbol,
+                "interval": interval,
+                "digest": digest,
+                "tz": tz,
+                "rows": len(frame),
+                "bytes": nbytes,
+                "covered_start": covered_start.value if isinstance(covered_start, pd.Timestamp) else covered_start,
+                "covered_end": covered_end.value if isinstance(covered_end, pd.Timestamp) else covered_end,
+                "last_access": self.clock().value,
+            }
+            if old and old["digest"] != digest:
+                self._drop_object(old["digest"])
+            self._evict(keep=key)
+            self._save_manifest()
+            return self._read_segment(self.manifest[key], start)
+
+    # eviction ------------------------------------------------------------------
+    def total_bytes(self):
+        return sum(e["bytes"] for e in self.manifest.values())
+
+    def _evict(self, keep = None):
+        ## least recently accessed first, never the entry just written
+        order = sorted(self.manifest, key=lambda k: self.manifest[k]["last_access"])
+        for k in order:
+            over_bytes = self.max_bytes is not None and self.total_bytes() > self.max_bytes
+            over_entries = self.max_entries is not None and len(self.manifest) > self.max_entries
+            if not (over_bytes or over_entries):
+                break
+            if k == keep:
+                continue
+            digest = self.manifest.pop(k)["digest"]
+            self._drop_object(digest)
+
+    def evict(self, max_bytes = None, max_entries = None):
+        with self._lock:
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if max_entries is not None:
+                self.max_entries = max_entries
+            self._evict()
+            self._save_manifest()
+
+    def clear(self):
+        with self._lock:
+            for entry in list(self.manifest.values()):
+                shutil.rmtree(self._object_dir(entry["digest"]), ignore_errors=True)
+            self.manifest = {}
+            self._save_manifest()
+
+    @staticmethod
+    def _describe(e):
+        return {
+            "symbol": e["symbol"],
+            "interval": e["interval"],
+            "rows": e["rows"],
+            "bytes": e["bytes"],
+            "covered_start": pd.Timestamp(e["covered_start"], tz="UTC") if e["covered_start"] is not None else "max",
+            "covered_end": pd.Timestamp(e["covered_end"], tz="UTC"),
+            "digest": e["digest"],
+        }
+
+    def inspect(self) -> pd.DataFrame:
+        return pd.DataFrame([self._describe(e) for _, e in sorted(self.manifest.items())])
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog="python -m systems.bar_cache", description="Warm or inspect the local bar cache")
+    parser.add_argument("--root", default=".bar_cache")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    warm = sub.add_parser("warm", help="fetch (or top up) bars for symbols")
+    warm.add_argument("symbols", nargs="+")
+    warm.add_argument("--period", default="365d")
+    warm.add_argument("--interval", default="60m")
+
+    sub.add_parser("inspect", help="list cached entries")
+
+    evict = sub.add_parser("evict", help="evict least recently used entries")
+    evict.add_argument("--max-bytes", type=int)
+    evict.add_argument("--max-entries", type=int)
+
+    sub.add_parser("clear", help="delete every cached entry")
+
+    args = parser.parse_args(argv)
+    cache = BarCache(root=args.root)
+
+    if args.command == "warm":
+        for sym in args.symbols:
+            frame = cache.get(sym, args.period, args.interval)
+            print(f"{sym.upper()} {args.interval}: {len(frame)} bars")
+    elif args.command == "inspect":
+        table = cache.inspect()
+        print(table.to_string(index=False) if not table.empty else "cache is empty")
+        print(f"total bytes: {cache.total_bytes()}")
+    elif args.command == "evict":
+        cache.evict(max_bytes=args.max_bytes, max_entries=args.max_entries)
+        print(f"total bytes: {cache.total_bytes()}")
+    elif args.command == "clear":
+        cache.clear()
+
+if __name__ == "__main__":
+    main()
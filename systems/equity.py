@@ -1,63 +1,275 @@
 ## ingests and builds 'book' of quotes from gateway_in
 
 # imports
-from collections import deque
+import math
+import threading
 import numpy as np
 
+class RollingStats:
+    """
+    O(1) sliding-window mean / population std using Welford's update with removal.
+    Drift is bounded by re-syncing from the raw window once every `window` pushes (amortized O(1)).
+    """
+    __slots__ = ("window", "n", "mean", "m2", "_pushes")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._pushes = 0
+
+    def push(self, x, dropped = None):
+        """
+        Adds x to the window; `dropped` is the value leaving it once the window is full
+        """
+        if dropped is None:
+            self.n += 1
+            delta = x - self.mean
+            self.mean += delta / self.n
+            self.m2 += delta * (x - self.mean)
+        else:
+            old_mean = self.mean
+            self.mean += (x - dropped) / self.n
+            self.m2 += (x - dropped) * (x - self.mean + dropped - old_mean)
+        if self.m2 < 0.0:
+            self.m2 = 0.0
+        self._pushes += 1
+
+    def resync(self, values):
+        """
+        Recomputes the accumulators exactly from the current window
+        """
+        self.n = len(values)
+        self.mean = float(np.mean(values)) if self.n else 0.0
+        self.m2 = float(np.sum((values - self.mean) ** 2)) if self.n else 0.0
+        self._pushes = 0
+
+    @property
+    def ready(self):
+        return self.n >= self.window
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / self.n) if self.n else 0.0
+
+class TradeHistory:
+    """
+    Read-only, deque-like view of an Equity's trade ring buffer.
+    Rows are materialized as {"Price", "Size", "Timestamp"} dicts on access only,
+    so legacy code that indexes or iterates `equity.trades` keeps working.
+    """
+
+    def __init__(self, equity):
+        self._equity = equity
+
+    @property
+    def maxlen(self):
+        return self._equity.capacity
+
+    def __len__(self):
+        return len(self._equity)
+
+    def _row(self, i):
+        eq = self._equity
+        return {
+            "Price": float(eq._prices[i]),
+            "Size": float(eq._sizes[i]),
+            "Timestamp": eq._timestamps[i],
+        }
+
+    def __getitem__(self, idx):
+        n = len(self)
+        start = self._equity._window_start(n)
+        if isinstance(idx, slice):
+            return [self._row(start + i) for i in range(*idx.indices(n))]
+        if idx < 0:
+            idx += n
+        if not 0 <= idx < n:
+            raise IndexError("trade index out of range")
+        return self._row(start + idx)
+
+    def __iter__(self):
+        n = len(self)
+        start = self._equity._window_start(n)
+        for i in range(start, start + n):
+            yield self._row(i)
+
+    def append(self, trade):
+        self._equity.update_trade(trade["Price"], trade["Size"], trade["Timestamp"])
+
+    def __repr__(self):
+        return f"TradeHistory({self._equity.symbol}, len={len(self)}, maxlen={self.maxlen})"
+
 class Equity:
     """
-    Equity class stores deque of last trades, most recent quotes, and contains methods to update
+    Equity class stores a ring buffer of last trades, most recent quotes, and contains methods to update.
+    Trades are kept in preallocated price/size/timestamp columns; every row is written twice
+    (at i and i + capacity) so the last N observations are always one contiguous, zero-copy slice.
+    Instances are owned by a MarketState; use state.equity(symbol) to share one per symbol.
+    A reentrant lock guards updates against readers on other threads (stream handler vs
+    scheduler / ensemble workers): memo, snapshot, since and the rolling stats never see a
+    half-applied trade. Views from last() alias the buffer, so threaded readers copy.
     """
-    _instances = {}  
 
-    def __new__(cls, symbol):
-        symbol = symbol.upper()
-        if symbol not in cls._instances:
-            instance = super().__new__(cls)
-            cls._instances[symbol] = instance
-        return cls._instances[symbol]
-
-    def __init__(self, symbol: str):
-        if not hasattr(self, "_initialized"):
-            self.symbol = symbol.upper()
-            self.trades = deque(maxlen = 1000)
+    def __init__(self, symbol: str, capacity: int = 1000):
+        self.symbol = symbol.upper()
+        self.capacity = capacity
+        self._prices = np.zeros(2 * capacity, dtype=np.float64)
+        self._sizes = np.zeros(2 * capacity, dtype=np.float64)
+        self._timestamps = np.empty(2 * capacity, dtype=object)
+        self._head = 0    # next write slot, in [0, capacity)
+        self.count = 0    # total trades ever recorded
+        self._stats = {}  # window -> RollingStats
+        self._memo = {}   # per-tick cache shared by strategies, see memo()
+        self._memo_count = 0
+        self._lock = threading.RLock()
+        self.last_trade = None
+        self.quotes = {"Bid": None,"Bid Size": None, "Ask": None,"Ask Size": None, "Mid": None, "Spread": None}
+
+    @property
+    def trades(self):
+        return TradeHistory(self)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def _window_start(self, n):
+        """
+        Index into the doubled buffers where the last n rows begin
+        """
+        return self._head + self.capacity - n
+
+    def reset(self):
+        """
+        Drops trade history and quotes (registered rolling windows stay registered, emptied)
+        """
+        with self._lock:
+            self._head = 0
+            self.count = 0
             self.last_trade = None
-            self.quotes = {"Bid": None,"Bid Size": None, "Ask": None,"Ask Size": None, "Mid": None, "Spread": None}
-            self._initialized = True
+            self.quotes = {k: None for k in self.quotes}
+            self._memo = {}
+            self._memo_count = 0
+            for stats in self._stats.values():
+                stats.resync(self.last(stats.window))
+
+    def register_window(self, window: int):
+        """
+        Registers an O(1) rolling mean/std accumulator for `window`, seeded from existing history
+        """
+        if window > self.capacity:
+            raise ValueError(f"window {window} exceeds buffer capacity {self.capacity}")
+        with self._lock:
+            if window not in self._stats:
+                stats = RollingStats(window)
+                stats.resync(self.last(window))
+                self._stats[window] = stats
+            return self._stats[window]
 
     def update_trade(self, price, size, timestamp):
         """
-        Updates recent trades deque
+        Updates recent trades ring buffer and any registered rolling stats
         mode 0 -> trading bot
         mode 1 -> backtesting
         """
-        dic = {"Price": price, "Size": size, "Timestamp": timestamp}
-        self.trades.append(dic)
-        self.last_trade = price 
+        with self._lock:
+            h = self._head
+            cap = self.capacity
+            size_before = len(self)
+            for window, stats in self._stats.items():
+                # read the outgoing value before the write below can overwrite it
+                dropped = self._prices[h + cap - window] if size_before >= window else None
+                stats.push(price, dropped)
+            self._prices[h] = self._prices[h + cap] = price
+            self._sizes[h] = self._sizes[h + cap] = size
+            self._timestamps[h] = self._timestamps[h + cap] = timestamp
+            self._head = h + 1 if h + 1 < cap else 0
+            self.count += 1
+            self.last_trade = price
+            for window, stats in self._stats.items():
+                if stats._pushes >= window:
+                    stats.resync(self.last(window))
 
     def update_quote(self, bp, bsz, ap, asksz):
         """
         Updates quotes to top-of-book
         """
-        self.quotes["Bid"] = bp
-        self.quotes["Bid Size"] = bsz
-        self.quotes["Ask"] = ap
-        self.quotes["Ask Size"] = asksz
-        self.quotes["Mid"] = (bp + ap) / 2
-        self.quotes["Spread"] = (ap - bp)
+        with self._lock:
+            self.quotes["Bid"] = bp
+            self.quotes["Bid Size"] = bsz
+            self.quotes["Ask"] = ap
+            self.quotes["Ask Size"] = asksz
+            self.quotes["Mid"] = (bp + ap) / 2
+            self.quotes["Spread"] = (ap - bp)
+
+    def last(self, n = None, field = "price"):
+        """
+        Zero-copy, read-only view of the last n observations of one column (all history if n is None).
+        The view aliases the ring buffer, so copy it if it must outlive the next update_trade.
+        """
+        with self._lock:
+            size = len(self)
+            n = size if n is None else min(n, size)
+            column = {"price": self._prices, "size": self._sizes, "timestamp": self._timestamps}[field]
+            start = self._window_start(n)
+            view = column[start:start + n]
+        view.flags.writeable = False
+        return view
+
+    def since(self, seen):
+        """
+        (copy of the prices recorded after the first `seen` trades, current count), read
+        atomically; at most the buffer capacity is returned if more were recorded since
+        """
+        with self._lock:
+            return np.array(self.last(self.count - seen)), self.count
+
+    def memo(self, key, compute):
+        """
+        Per-tick cache for values derived from this Equity (price windows, z-scores, fits).
+        compute(equity) runs at most once between two update_trade calls, however many
+        strategies ask for the same key; results must not be mutated by callers.
+        compute runs under the Equity's lock, so concurrent callers wait for the first one
+        and updates wait until the tick's value is stored.
+        """
+        with self._lock:
+            memo = self._memo
+            if self._memo_count != self.count:
+                memo = self._memo = {}
+                self._memo_count = self.count
+            try:
+                return memo[key]
+            except KeyError:
+                value = memo[key] = compute(self)
+                return value
+
+    def snapshot(self, n = None):
+        """
+        Copy of the last n prices, taken once per tick and shared; safe to hold across updates
+        """
+        def take(e):
+            view = np.array(e.last(n))
+            view.flags.writeable = False
+            return view
+        return self.memo(("snapshot", n), take)
 
     def get_prices(self,window = 20):
         """
-        Grabs prices for signal generation
+        Grabs the last `window` prices for signal generation
         """
-        if len(self.trades) < window:
+        if len(self) < window:
             return None
-        return np.array([t["Price"] for t in list(self.trades)])
-    
+        return self.last(window)
+
     def mean_price(self, window=10):
         """
-        Compute rolling mean price
+        Compute rolling mean price (O(1) if window is registered)
         """
+        stats = self._stats.get(window)
+        if stats is not None:
+            with self._lock:
+                return stats.mean if stats.ready else None
         prices = self.get_prices(window)
         if prices is None:
             return None
@@ -65,15 +277,70 @@ class Equity:
 
     def std_price(self, window=20):
         """
-        Compute rolling std of prices
+        Compute rolling std of prices (O(1) if window is registered)
         """
+        stats = self._stats.get(window)
+        if stats is not None:
+            with self._lock:
+                return stats.std if stats.ready else None
         prices = self.get_prices(window)
         if prices is None:
             return None
         return float(np.std(prices))
-    
+
+    def zscore(self, window=20):
+        """
+        Z-score of the last trade against the rolling window, None if not enough data or flat prices
+        """
+        with self._lock:
+            mean = self.mean_price(window)
+            std = self.std_price(window)
+            if mean is None or not std:
+                return None
+            return (self.last_trade - mean) / std
+
     def __repr__(self):
         bid = self.quotes["Bid"]
         ask = self.quotes["Ask"]
         mid = self.quotes["Mid"]
-        return f"{self.symbol}: Bid @ {bid}, Ask @ {ask}, Mid @ {mid}"
\ No newline at end of file
+        return f"{self.symbol}: Bid @ {bid}, Ask @ {ask}, Mid @ {mid}"
+
+class MarketState:
+    """
+    Scoped registry of Equity objects, one per symbol.
+    Create one per backtest / live session and drop it when done; nothing is kept at class level,
+    so thousands of short-lived states can coexist in one process or thread pool.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._equities = {}
+        self._lock = threading.Lock()
+
+    def equity(self, symbol: str) -> Equity:
+        """
+        Get-or-create the Equity for symbol in this state
+        """
+        symbol = symbol.upper()
+        eq = self._equities.get(symbol)
+        if eq is None:
+            with self._lock:
+                eq = self._equities.get(symbol)
+                if eq is None:
+                    eq = self._equities[symbol] = Equity(symbol, capacity=self.capacity)
+        return eq
+
+    def __contains__(self, symbol):
+        return symbol.upper() in self._equities
+
+    def __len__(self):
+        return len(self._equities)
+
+    def symbols(self):
+        return list(self._equities)
+
+    def clear(self):
+        self._equities = {}
+
+# process-wide state used when no explicit MarketState is passed (live loop default)
+DEFAULT_STATE = MarketState()
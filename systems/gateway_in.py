@@ -7,8 +7,15 @@ import yfinance as yf
 from dotenv import load_dotenv
 from time import time
 from datetime import datetime
+from collections import deque
+import asyncio
+import json
 import threading
 import pandas as pd
+import numpy as np
+import websockets
+from systems.http_pool import AsyncHTTPPool
+from systems.profiler import PROFILER
 
 # alpaca imports 
 import alpaca_trade_api as tradeapi
@@ -17,18 +24,107 @@ import alpaca_trade_api as tradeapi
 # Use YF_ENDPOINT to grab historical data for backtests. See parameter specs below.
 #
 # Use ALPACA_ENDPOINT for 15m delayed quotes and to send orders. 
+#
+# Use ALPACA_ASYNC_ENDPOINT for the same quotes over batched, pooled asyncio requests.
+#
+# Use ALPACA_STREAM_ENDPOINT to have quotes pushed over a websocket as they arrive.
 #-----------------------------------------------------------------------------------#
 
+# aligned bar matrices shared by the columnar stream and vectorized consumers
+class MarketData:
+    """
+    Immutable bar data aligned once onto a shared timestamp vector.
+    close / volume are contiguous (timestamps x symbols) float64 matrices, read-only.
+    """
+
+    def __init__(self, timestamps, symbols: list, close, volume):
+        self.timestamps = pd.DatetimeIndex(timestamps)
+        self.symbols = list(symbols)
+        self.close = np.ascontiguousarray(close, dtype=np.float64)
+        self.volume = np.ascontiguousarray(volume, dtype=np.float64)
+        self.close.flags.writeable = False
+        self.volume.flags.writeable = False
+        self.col = {sym: j for j, sym in enumerate(self.symbols)}
+
+    @classmethod
+    def from_frames(cls, data_dict: dict, symbols: list):
+        """
+        Aligns per-symbol OHLCV frames onto the first symbol's index
+        (close forward-filled, missing volume treated as 0)
+        """
+        timestamps = data_dict[symbols[0]].index
+        close = np.empty((len(timestamps), len(symbols)))
+        volume = np.empty((len(timestamps), len(symbols)))
+        for j, sym in enumerate(symbols):
+            frame = data_dict[sym].reindex(timestamps)
+            close[:, j] = _first_column(frame["Close"]).ffill().to_numpy(dtype=np.float64)
+            volume[:, j] = _first_column(frame["Volume"]).fillna(0).to_numpy(dtype=np.float64)
+        return cls(timestamps, symbols, close, volume)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def slice(self, start: int, stop: int) -> "MarketData":
+        """
+        Bars [start, stop) as a MarketData over views of the same arrays (no copy)
+        """
+        return MarketData(
+            self.timestamps[start:stop], self.symbols, self.close[start:stop], self.volume[start:stop]
+        )
+
+    def column(self, symbol: str, field: str = "close"):
+        """
+        Zero-copy column view for one symbol
+        """
+        return getattr(self, field.lower())[:, self.col[symbol]]
+
+    def rows(self):
+        """
+        Yields (timestamp, BarRow) per bar without per-symbol boxing
+        """
+        for i, ts in enumerate(self.timestamps):
+            yield ts, BarRow(self, i, ts)
+
+    def chunks(self, chunk_size: int = 4096):
+        """
+        Yields (timestamps, close, volume) blocks of up to chunk_size bars for vectorized consumers
+        """
+        for start in range(0, len(self), chunk_size):
+            stop = start + chunk_size
+            yield self.timestamps[start:stop], self.close[start:stop], self.volume[start:stop]
+
+class BarRow:
+    """
+    Lightweight view of one bar across all symbols.
+    row.close / row.volume are row views into MarketData; row[sym] gives the legacy bar dict.
+    """
+    __slots__ = ("data", "index", "timestamp", "close", "volume")
+
+    def __init__(self, data: MarketData, index: int, timestamp):
+        self.data = data
+        self.index = index
+        self.timestamp = timestamp
+        self.close = data.close[index]
+        self.volume = data.volume[index]
+
+    def __getitem__(self, symbol):
+        j = self.data.col[symbol]
+        return {"close": float(self.close[j]), "volume": float(self.volume[j]), "timestamp": self.timestamp}
+
+def _first_column(values):
+    ## yf.download returns (field, ticker) MultiIndex columns, so a field may come back as a frame
+    return values.iloc[:, 0] if isinstance(values, pd.DataFrame) else values
+
+async def _cancel_tasks():
+    ## Cancels every other task on the running loop and waits for them to unwind
+    tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
 # yf data function (STRICTLY FOR BACKTESTS)
 class YF_ENDPOINT:
-    _instance = None
-
-    def __new__(cls, symbols, period, interval):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
-    
-    def __init__(self,symbols: list, period: str, interval: str):
+    def __init__(self,symbols: list, period: str, interval: str, cache = None):
         """
         Parameters for period & interval:
             "1m" Max 7 days, only for recent data
@@ -39,13 +135,17 @@ class YF_ENDPOINT:
             "60m" Max 730 days (~2 years)
             "90m" Max 60 days
             "1d" No Max
+
+        cache: optional systems.bar_cache.BarCache; only missing bars are downloaded
         """
         self.symbols = symbols
         self.period = period
         self.interval = interval
+        self.cache = cache
         self.errors = []
         self.handlers = []
         self.data_dict = {}
+        self.market_data = None
 
     def register_handler(self,func):
         """
@@ -58,7 +158,11 @@ class YF_ENDPOINT:
         Grabs YF data for one ticker
         """    
         try:
-            data = yf.download(ticker, period= self.period, interval= self.interval)
+            with PROFILER.stage("data_fetch.symbol"):
+                if self.cache is not None:
+                    data = self.cache.get(ticker, self.period, self.interval)
+                else:
+                    data = yf.download(ticker, period= self.period, interval= self.interval)
             self.data_dict[ticker] = data
         except Exception as e:
             self.errors.append(f"Error @ {datetime.now()}: {e}")
@@ -68,16 +172,26 @@ class YF_ENDPOINT:
         """
         Downloads all ticker data using multithreading
         """
-        threads = []
+        with PROFILER.stage("data_fetch"):
+            threads = []
 
-        for ticker in self.symbols:
-            t = threading.Thread(target = self._fetch_single, args = (ticker,))
-            t.daemon = True
-            threads.append(t)
-            t.start()
+            for ticker in self.symbols:
+                t = threading.Thread(target = self._fetch_single, args = (ticker,))
+                t.daemon = True
+                threads.append(t)
+                t.start()
 
-        for t in threads:
-            t.join()
+            for t in threads:
+                t.join()
+        self.market_data = None
+
+    def align(self):
+        """
+        Aligns all symbols once into contiguous close/volume matrices (cached until the next download)
+        """
+        if self.market_data is None:
+            self.market_data = MarketData.from_frames(self.data_dict, self.symbols)
+        return self.market_data
 
     def get_timestamps(self):
         """
@@ -86,12 +200,23 @@ class YF_ENDPOINT:
         sample = self.symbols[0]
         return self.data_dict[sample].index
     
-    def stream(self):
+    def column(self, symbol: str, field: str = "Close"):
+        """
+        Returns one field for one symbol as a float array aligned to the master timestamps
+        """
+        return self.align().column(symbol, field)
+
+    def stream(self, columnar = False):
         """
         Uses lazy execution for vectorized backtesting
         Returns (timestamp, quotes for all symbols)
         Price size timestamp
+        columnar=True yields (timestamp, BarRow) from the aligned matrices instead of per-bar .loc lookups
         """
+        if columnar:
+            yield from self.align().rows()
+            return
+
         timestamps = self.get_timestamps()
 
         for ts in timestamps:
@@ -106,15 +231,14 @@ class YF_ENDPOINT:
 
             yield ts, bars
 
+    def stream_chunks(self, chunk_size: int = 4096):
+        """
+        Chunked columnar iteration: (timestamps, close, volume) blocks
+        """
+        return self.align().chunks(chunk_size)
+
 # Alpaca API endpoint for 15m delayed quotes
 class ALPACA_ENDPOINT:
-    _instance = None
-
-    def __new__(cls, key, secret, symbols):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
-    
     def __init__(self,key,secret,symbols: list):
         self.api = tradeapi.REST(
             key, 
@@ -167,4 +291,238 @@ class ALPACA_ENDPOINT:
 
         for t in threads:
             t.join()
-            
\ No newline at end of file
+            
+# asyncio Alpaca quote gateway: multi-symbol requests over a keep-alive connection pool
+class ALPACA_ASYNC_ENDPOINT:
+    """
+    Drop-in replacement for ALPACA_ENDPOINT (register_handler / grab_quotes).
+    Symbols are batched into /v2/stocks/quotes/latest?symbols=... requests, at most
+    max_concurrency in flight, over at most max_connections reused sockets.
+    The event loop lives on a background thread so connections survive between cycles.
+    """
+
+    def __init__(self, key, secret, symbols: list, base_url = "https://data.alpaca.markets",
+                 feed = "delayed_sip", batch_size = 100, max_connections = 4, max_concurrency = 4,
+                 timeout = 10.0, latency_window = 10_000):
+        self.symbols = symbols
+        self.feed = feed
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.data_dict = {}
+        self.errors = []
+        self.handlers = []
+        self.latencies = deque(maxlen=latency_window)  # seconds per HTTP request
+        self.pool = AsyncHTTPPool(
+            base_url,
+            max_connections=max_connections,
+            headers={"APCA-API-KEY-ID": key or "", "APCA-API-SECRET-KEY": secret or ""},
+            timeout=timeout,
+        )
+        self._loop = None
+        self._thread = None
+        self._sem = None
+        self._loop_lock = threading.Lock()
+
+    def register_handler(self,func):
+        """
+        Registers handler functions for our data
+        """
+        self.handlers.append(func)
+
+    def _batches(self, symbols = None):
+        symbols = self.symbols if symbols is None else symbols
+        for i in range(0, len(symbols), self.batch_size):
+            yield symbols[i:i + self.batch_size]
+
+    async def _fetch_batch(self, symbols):
+        """
+        Fetches latest quotes for a batch of symbols in one request
+        """
+        async with self._sem:
+            try:
+                payload, elapsed = await self.pool.get_json(
+                    "/v2/stocks/quotes/latest",
+                    {"symbols": ",".join(symbols), "feed": self.feed},
+                )
+                self.latencies.append(elapsed)
+            except Exception as e:
+                self.errors.append(f"Datastream Error @ {datetime.now()}: {e}")
+                print(f"Datastream Error @ {datetime.now()}: {e}")
+                return
+
+        # one malformed quote or failing handler must not cost the rest of the batch its update
+        for symbol, quote in payload.get("quotes", {}).items():
+            try:
+                self.data_dict[symbol] = {
+                    "ask": quote["ap"],
+                    "ask_size": quote["as"],
+                    "bid": quote["bp"],
+                    "bid_size": quote["bs"],
+                    "timestamp": pd.Timestamp(quote["t"]),
+                    }
+                for h in self.handlers:
+                    h(symbol, self.data_dict[symbol])
+            except Exception as e:
+                self.errors.append(f"Datastream Error @ {datetime.now()}: {symbol}: {e!r}")
+                print(f"Datastream Error @ {datetime.now()}: {symbol}: {e!r}")
+
+    async def grab_quotes_async(self, symbols = None):
+        """
+        Fetches every batch concurrently (bounded by max_concurrency)
+        symbols: subset to refresh, default all
+        """
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+        await asyncio.gather(*(self._fetch_batch(b) for b in self._batches(symbols)))
+
+    def _ensure_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def grab_quotes(self, symbols = None):
+        """
+        Blocking wrapper for the polling loop; safe to call from several threads at once
+        """
+        loop = self._ensure_loop()
+        asyncio.run_coroutine_threadsafe(self.grab_quotes_async(symbols), loop).result()
+
+    def latency_stats(self):
+        """
+        Per-request latency summary in milliseconds
+        """
+        if not self.latencies:
+            return {"count": 0}
+        ms = np.fromiter(self.latencies, dtype=np.float64) * 1000
+        return {
+            "count": len(ms),
+            "mean_ms": float(ms.mean()),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p99_ms": float(np.percentile(ms, 99)),
+            "max_ms": float(ms.max()),
+            "connections_opened": self.pool.connections_opened,
+        }
+
+    def close(self):
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self.pool.close(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+
+# Alpaca websocket quote stream: push mode alongside the polling endpoints
+class ALPACA_STREAM_ENDPOINT:
+    """
+    Pushes quotes to registered handlers as they arrive instead of polling.
+    Speaks Alpaca's market-data stream protocol (auth -> subscribe -> [{"T": "q", ...}] batches)
+    and reconnects with exponential backoff. Handlers run on the stream's background thread.
+    """
+
+    def __init__(self, key, secret, symbols: list, url = None, feed = "delayed_sip",
+                 reconnect_delay = 1.0, max_reconnect_delay = 30.0, open_timeout = 10.0):
+        self.key = key
+        self.secret = secret
+        self.symbols = symbols
+        self.url = url or f"wss://stream.data.alpaca.markets/v2/{feed}"
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.open_timeout = open_timeout
+        self.data_dict = {}
+        self.errors = []
+        self.handlers = []
+        self.quotes_received = 0
+        self.connected = threading.Event()
+        self._stopped = False
+        self._ws = None
+        self._loop = None
+        self._thread = None
+
+    def register_handler(self,func):
+        """
+        Registers handler functions for our data
+        """
+        self.handlers.append(func)
+
+    def _error(self, msg):
+        self.errors.append(f"Datastream Error @ {datetime.now()}: {msg}")
+        print(f"Datastream Error @ {datetime.now()}: {msg}")
+
+    def _on_quote(self, msg):
+        symbol = msg["S"]
+        self.data_dict[symbol] = {
+            "ask": msg["ap"],
+            "ask_size": msg["as"],
+            "bid": msg["bp"],
+            "bid_size": msg["bs"],
+            "timestamp": pd.Timestamp(msg["t"]),
+            }
+        self.quotes_received += 1
+        for h in self.handlers:
+            try:
+                h(symbol, self.data_dict[symbol])
+            except Exception as e:
+                self._error(f"handler {getattr(h, '__name__', h)} failed on {symbol}: {e}")
+
+    async def _session(self):
+        async with websockets.connect(self.url, open_timeout=self.open_timeout) as ws:
+            self._ws = ws
+            await ws.recv()  # [{"T": "success", "msg": "connected"}]
+            await ws.send(json.dumps({"action": "auth", "key": self.key, "secret": self.secret}))
+            reply = json.loads(await ws.recv())
+            if not any(m.get("msg") == "authenticated" for m in reply):
+                raise ConnectionError(f"auth rejected: {reply}")
+            await ws.send(json.dumps({"action": "subscribe", "quotes": list(self.symbols)}))
+            self.connected.set()
+
+            try:
+                while not self._stopped:
+                    for msg in json.loads(await ws.recv()):
+                        kind = msg.get("T")
+                        if kind == "q":
+                            self._on_quote(msg)
+                        elif kind == "error":
+                            self._error(msg)
+            finally:
+                self.connected.clear()
+
+    async def run_async(self):
+        """
+        Runs sessions until stop(), reconnecting with exponential backoff
+        """
+        delay = self.reconnect_delay
+        while not self._stopped:
+            try:
+                await self._session()
+                delay = self.reconnect_delay
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self._stopped:
+                    break
+                self._error(e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    def start(self):
+        """
+        Starts streaming on a background thread
+        """
+        self._stopped = False
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.run_async(), self._loop)
+
+    def stop(self):
+        self._stopped = True
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(_cancel_tasks(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
@@ -0,0 +1,52 @@
+## Pooled asyncio JSON client: a thin wrapper over aiohttp (installed with alpaca_trade_api)
+
+# imports
+import time
+import aiohttp
+
+class AsyncHTTPPool:
+    """
+    GET-only JSON client that keeps up to max_connections keep-alive sockets open and reuses them.
+    The aiohttp session is created lazily, so the pool belongs to the event loop that first uses it.
+    """
+
+    def __init__(self, base_url: str, max_connections: int = 4, headers: dict = None, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.headers = dict(headers or {})
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_connections = max_connections
+        self._session = None
+        self.connections_opened = 0
+        self.requests_sent = 0
+
+    async def _on_connection_created(self, session, ctx, params):
+        self.connections_opened += 1
+
+    def _get_session(self):
+        if self._session is None:
+            trace = aiohttp.TraceConfig()
+            trace.on_connection_create_end.append(self._on_connection_created)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                headers=self.headers,
+                timeout=self.timeout,
+                raise_for_status=True,
+                trace_configs=[trace],
+            )
+        return self._session
+
+    async def get_json(self, path: str, params: dict = None):
+        """
+        GET base_url + path and decode the JSON body. Returns (payload, seconds elapsed).
+        Raises aiohttp.ClientResponseError on a 4xx / 5xx status.
+        """
+        start = time.perf_counter()
+        async with self._get_session().get(self.base_url + path, params=params) as resp:
+            payload = await resp.json()
+        self.requests_sent += 1
+        return payload, time.perf_counter() - start
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
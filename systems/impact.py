@@ -0,0 +1,207 @@
+## Slippage and market impact models for the backtester's MatchingEngine
+
+# imports
+import argparse
+import math
+import time
+import numpy as np
+
+#-----------------------------------------------------------------------------------#
+# MatchingEngine first decides how much each marketable order takes from a bar (FIFO /
+# price-time, capped by fill_rate * volume per side and by order_cap() per order), then
+# prices all of that bar's fills on one side with a single cost_bps() call over the
+# array of fill quantities. Costs are adverse: BUY fills pay price * (1 + bps / 1e4),
+# SELL fills receive price * (1 - bps / 1e4). Models compose with `+`: costs add up and
+# the tightest per-order cap wins.
+#-----------------------------------------------------------------------------------#
+
+class ImpactModel:
+    """
+    Base model: no cost, no per-order cap.
+    uses_spread: True if cost_bps needs the symbol's current spread (Equity.quotes["Spread"]).
+    size_dependent: False if the cost is the same for every fill of a bar; the engine then
+    makes one scalar call (qty=None) instead of building the quantity array.
+    """
+    uses_spread = False
+    size_dependent = False
+
+    def cost_bps(self, qty, price, volume, spread = None):
+        """
+        qty: float array of this bar's fill quantities on one side (None for models that are
+        not size_dependent); returns bps per fill, an array or a scalar applying to all
+        """
+        return 0.0
+
+    def order_cap(self, volume):
+        """
+        Largest quantity one order may fill this bar, None for no per-order limit
+        """
+        return None
+
+    def __add__(self, other):
+        return CombinedImpact(self, other)
+
+    def __repr__(self):
+        params = ", ".join(f"{k}={v!r}" for k, v in vars(self).items() if k not in ("uses_spread", "size_dependent"))
+        return f"{type(self).__name__}({params})"
+
+class FixedSlippage(ImpactModel):
+    """
+    Same cost for every fill whatever its size (the engine's default, from slippage_bps)
+    """
+
+    def __init__(self, bps = 1.5):
+        self.bps = bps
+
+    def cost_bps(self, qty, price, volume, spread = None):
+        return self.bps
+
+class SquareRootImpact(ImpactModel):
+    """
+    Square-root law: base_bps + eta_bps * sqrt(qty / bar volume).
+    eta_bps plays the role of Y * sigma: the cost of trading a whole bar's volume.
+    """
+    size_dependent = True
+
+    def __init__(self, eta_bps = 50.0, base_bps = 0.0):
+        self.eta_bps = eta_bps
+        self.base_bps = base_bps
+
+    def cost_bps(self, qty, price, volume, spread = None):
+        return self.base_bps + self.eta_bps * np.sqrt(qty / max(volume, 1.0))
+
+class SpreadCost(ImpactModel):
+    """
+    Pays `fraction` of the quoted spread (half by default: crossing from mid to the touch).
+    Uses Equity.quotes["Spread"] when quotes are being fed, default_spread_bps otherwise
+    (bar replays carry no quotes).
+    """
+    uses_spread = True
+
+    def __init__(self, fraction = 0.5, default_spread_bps = 2.0):
+        self.fraction = fraction
+        self.default_spread_bps = default_spread_bps
+
+    def cost_bps(self, qty, price, volume, spread = None):
+        if spread is None or not price or (isinstance(spread, float) and math.isnan(spread)):
+            return self.fraction * self.default_spread_bps
+        return self.fraction * spread / price * 10_000
+
+class ParticipationCap(ImpactModel):
+    """
+    An order fills at most max_participation * bar volume per bar; the rest waits for
+    later bars. Costs come from `inner` (none by default).
+    """
+
+    def __init__(self, max_participation = 0.1, inner = None):
+        self.max_participation = max_participation
+        self.inner = inner if inner is not None else ImpactModel()
+        self.uses_spread = self.inner.uses_spread
+        self.size_dependent = self.inner.size_dependent
+
+    def cost_bps(self, qty, price, volume, spread = None):
+        return self.inner.cost_bps(qty, price, volume, spread)
+
+    def order_cap(self, volume):
+        inner = self.inner.order_cap(volume)
+        cap = max(int(volume * self.max_participation), 0)
+        return cap if inner is None else min(cap, inner)
+
+class CombinedImpact(ImpactModel):
+    """
+    Sum of the members' costs, tightest of their per-order caps
+    """
+
+    def __init__(self, *models):
+        self.models = [m for model in models for m in (model.models if isinstance(model, CombinedImpact) else [model])]
+        self.uses_spread = any(m.uses_spread for m in self.models)
+        self.size_dependent = any(m.size_dependent for m in self.models)
+
+    def cost_bps(self, qty, price, volume, spread = None):
+        total = 0.0
+        for m in self.models:
+            total = total + m.cost_bps(qty, price, volume, spread)
+        return total
+
+    def order_cap(self, volume):
+        caps = [c for c in (m.order_cap(volume) for m in self.models) if c is not None]
+        return min(caps) if caps else None
+
+    def __repr__(self):
+        return " + ".join(map(repr, self.models))
+
+IMPACT_MODELS = {
+    "fixed": FixedSlippage,
+    "sqrt": SquareRootImpact,
+    "spread": SpreadCost,
+    "participation": ParticipationCap,
+}
+
+def make_impact(spec, slippage_bps = 1.5):
+    """
+    ImpactModel from a backtest config value: None -> FixedSlippage(slippage_bps), a name from
+    IMPACT_MODELS (joined with "+", e.g. "sqrt+spread") -> default instances, a model -> itself
+    """
+    if spec is None:
+        return FixedSlippage(slippage_bps)
+    if isinstance(spec, ImpactModel):
+        return spec
+    models = []
+    for name in str(spec).split("+"):
+        name = name.strip().lower()
+        if name not in IMPACT_MODELS:
+            raise ValueError(f"unknown impact model {name!r}, expected one of {sorted(IMPACT_MODELS)}")
+        models.append(FixedSlippage(slippage_bps) if name == "fixed" else IMPACT_MODELS[name]())
+    return models[0] if len(models) == 1 else CombinedImpact(*models)
+
+def bench(models = None, orders_per_bar = (1, 10, 100), bars = 2000, seed = 0):
+    """
+    Per-order cost of MatchingEngine.match under each impact model: `orders_per_bar` market
+    orders of random size rest on one symbol and are matched against synthetic bars.
+    Returns rows of {"model", "orders_per_bar", "fills", "us_per_fill"}.
+    """
+    import pandas as pd
+    from backtester import MatchingEngine, Order
+    # the engine checks models against systems.impact's classes, also when run as __main__
+    from systems.impact import FixedSlippage, ParticipationCap, SpreadCost, SquareRootImpact
+
+    models = models or {
+        "fixed": FixedSlippage(1.5),
+        "sqrt": SquareRootImpact(),
+        "spread": SpreadCost(),
+        "participation+sqrt": ParticipationCap(0.05, SquareRootImpact()),
+        "sqrt+spread": SquareRootImpact() + SpreadCost(),
+    }
+    rng = np.random.default_rng(seed)
+    prices = 100 + np.cumsum(rng.normal(0, 0.05, bars))
+    ts = pd.Timestamp("2024-01-02 14:30", tz="UTC")
+    rows = []
+    for k in orders_per_bar:
+        sizes = rng.integers(10, 500, size=(bars, k))
+        for name, model in models.items():
+            me = MatchingEngine(fill_rate=1.0, cancel_prob=0.0, impact=model, spread=lambda sym: 0.02)
+            fills, elapsed = 0, 0.0
+            for i in range(bars):
+                for j in range(k):
+                    me.submit(Order(f"{i}-{j}", "SIM", "BUY" if j % 2 else "SELL", int(sizes[i, j]), ts))
+                start = time.perf_counter()
+                fills += len(me.match("SIM", float(prices[i]), 1e6, ts))
+                elapsed += time.perf_counter() - start
+            rows.append({"model": name, "orders_per_bar": k, "fills": fills,
+                         "us_per_fill": elapsed / max(fills, 1) * 1e6})
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m systems.impact", description="Impact model benchmarks")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("bench", help="time MatchingEngine.match per fill under each impact model")
+    b.add_argument("--bars", type=int, default=2000)
+    b.add_argument("--orders-per-bar", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args(argv)
+
+    for row in bench(orders_per_bar=args.orders_per_bar, bars=args.bars):
+        print(f"{row['model']:>20} {row['orders_per_bar']:>5} orders/bar {row['fills']:>8} fills "
+              f"{row['us_per_fill']:>8.2f} us/fill")
+
+if __name__ == "__main__":
+    main()
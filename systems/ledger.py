@@ -0,0 +1,156 @@
+## Array-backed portfolio ledger for the backtester: positions, cash, fill log and equity curve
+
+# imports
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from systems.metrics import MetricsAccumulator
+from systems.results_sink import MemorySink, ResultsSink, TableSchema
+
+_NAT = pd.NaT.value
+
+
+class Ledger:
+    """
+    Portfolio state for one backtest as flat arrays indexed by symbol position.
+    positions / avg_price are float64 vectors and mark() values the book with one dot
+    product per bar. Fills and the equity curve stream into the "trades" and "equity"
+    tables of a ResultsSink (in memory by default), so the ledger itself never grows.
+    Every bar and fill also updates `metrics`, a MetricsAccumulator readable mid-run.
+    Commissions are accumulated separately and not deducted from cash (as before).
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        initial_cash: float,
+        sink: Optional[ResultsSink] = None,
+        periods_per_year: float = 252,
+    ):
+        self.symbols = list(symbols)
+        self.index = {sym: j for j, sym in enumerate(self.symbols)}
+        self.initial_cash = initial_cash
+        self.sink = sink if sink is not None else MemorySink()
+        self.metrics = MetricsAccumulator(periods_per_year)
+        self.reset()
+
+    def reset(self):
+        n = len(self.symbols)
+        self.cash = float(self.initial_cash)
+        self.positions = np.zeros(n, dtype=np.float64)
+        self.avg_price = np.zeros(n, dtype=np.float64)
+        self.realized_pnl = 0.0
+        self.total_commissions = 0.0
+        self.metrics.reset()
+        self.sink.create("equity", TableSchema({"timestamp": "ts", "equity": "f8"}))
+        self.sink.create(
+            "trades",
+            TableSchema(
+                {
+                    "timestamp": "ts",
+                    "symbol": "cat",
+                    "side": "cat",
+                    "qty": "i8",
+                    "price": "f8",
+                    "partial": "bool",
+                    "realized_pnl": "f8",
+                    "commission": "f8",
+                    "position_after": "f8",
+                },
+                categories={"symbol": self.symbols, "side": ["BUY", "SELL"]},
+            ),
+        )
+        # fills booked since the last mark; they take that bar's timestamp when it is marked
+        self._pending: List[dict] = []
+        self._last_ts = _NAT
+        self._tz = None
+
+    def position(self, symbol: str) -> float:
+        return float(self.positions[self.index[symbol]])
+
+    def apply_fill(
+        self,
+        symbol: str,
+        side: str,
+        qty: float,
+        price: float,
+        commission: float = 0.0,
+        partial: bool = False,
+    ) -> float:
+        """
+        Books one fill and returns its realized P&L. Average-cost accounting: reducing a
+        position realizes against avg_price, adding re-averages, crossing zero restarts at price.
+        """
+        j = self.index[symbol]
+        q = qty if side == "BUY" else -qty
+        pos = self.positions[j]
+        avg = self.avg_price[j]
+        new_pos = pos + q
+
+        realized = 0.0
+        if pos * q < 0:  # trade against the open position
+            closing = min(abs(q), abs(pos))
+            realized = closing * (price - avg) * (1.0 if pos > 0 else -1.0)
+        if new_pos == 0:
+            avg = 0.0
+        elif pos * new_pos < 0 or pos == 0:
+            avg = price
+        elif abs(new_pos) > abs(pos):
+            avg = (avg * abs(pos) + price * abs(q)) / abs(new_pos)
+
+        self.positions[j] = new_pos
+        self.avg_price[j] = avg
+        self.cash -= q * price
+        self.realized_pnl += realized
+        self.total_commissions += commission
+        self.metrics.on_fill(qty, price, realized)
+        self._pending.append(
+            dict(
+                symbol=self.symbols[j],
+                side="BUY" if q > 0 else "SELL",
+                qty=qty,
+                price=price,
+                partial=partial,
+                realized_pnl=realized,
+                commission=commission,
+                position_after=new_pos,
+            )
+        )
+        return realized
+
+    def mark(self, ts: pd.Timestamp, prices: np.ndarray) -> float:
+        """
+        Appends cash + positions . prices to the equity curve; prices follow self.symbols order
+        """
+        equity = self.cash + float(self.positions @ prices)
+        self.metrics.on_mark(equity, float(np.abs(self.positions) @ prices))
+        if self._tz is None and getattr(ts, "tzinfo", None) is not None:
+            self._tz = ts.tzinfo
+            self.sink.set_tz("equity", self._tz)
+            self.sink.set_tz("trades", self._tz)
+        self._last_ts = pd.Timestamp(ts).value
+        self._drain()
+        self.sink.append("equity", timestamp=self._last_ts, equity=equity)
+        return equity
+
+    def _drain(self):
+        # a fill on bar i is booked before bar i is marked, so it shares that bar's timestamp
+        for row in self._pending:
+            self.sink.append("trades", timestamp=self._last_ts, **row)
+        self._pending.clear()
+
+    def close(self):
+        """
+        Writes out fills booked after the last mark and flushes the sink
+        """
+        self._drain()
+        self.sink.close()
+
+    def equity_frame(self) -> pd.DataFrame:
+        return self.sink.frame("equity")
+
+    def trades_frame(self) -> pd.DataFrame:
+        self._drain()
+        return self.sink.frame("trades")
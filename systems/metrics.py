@@ -0,0 +1,130 @@
+## Incremental performance metrics for backtests: updated per bar and per fill, read in O(1)
+
+# imports
+import math
+from functools import lru_cache
+from typing import Dict
+
+#-----------------------------------------------------------------------------------#
+# MetricsAccumulator sees every marked bar and every fill exactly once. It keeps running
+# return moments (Welford), downside squares, peak equity / deepest drawdown, traded
+# notional, gross exposure and the win/loss tally, so summary() is a handful of
+# arithmetic operations and can be read at any point of a replay.
+#-----------------------------------------------------------------------------------#
+
+
+@lru_cache(maxsize=None)
+def periods_per_year(interval: str) -> float:
+    """
+    Bars per trading year for a yfinance-style interval ("60m", "1h", "1d"); parsed once per interval
+    """
+    if interval.endswith("m"):
+        bars_per_day = max(1, 390 // int(interval[:-1]))
+    elif interval.endswith("h"):
+        bars_per_day = max(1, int(6.5 // int(interval[:-1])))
+    else:
+        bars_per_day = 1
+    return bars_per_day * 252
+
+
+class MetricsAccumulator:
+    """
+    Running performance metrics of one backtest.
+    on_mark(equity, gross_exposure) once per bar, on_fill(qty, price, realized_pnl) once per fill.
+    """
+
+    def __init__(self, periods_per_year: float = 252):
+        self.periods_per_year = periods_per_year
+        self.reset()
+
+    def reset(self):
+        self.bars = 0
+        self.first_equity = math.nan
+        self.last_equity = math.nan
+        # bar returns: count, mean, sum of squared deviations, sum of squared losses
+        self.n_returns = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.downside_sq = 0.0
+        self.peak = -math.inf
+        self.max_drawdown = 0.0  # deepest (equity - peak) / peak, <= 0
+        self.equity_sum = 0.0
+        self.exposure_sum = 0.0
+        self.fills = 0
+        self.wins = 0
+        self.losses = 0
+        self.win_sum = 0.0
+        self.loss_sum = 0.0
+        self.notional = 0.0
+
+    def on_mark(self, equity: float, gross_exposure: float = 0.0):
+        if self.bars:
+            prev = self.last_equity
+            r = equity / prev - 1 if prev else math.nan
+            if not math.isnan(r):
+                self.n_returns += 1
+                delta = r - self.mean
+                self.mean += delta / self.n_returns
+                self.m2 += delta * (r - self.mean)
+                if r < 0:
+                    self.downside_sq += r * r
+        else:
+            self.first_equity = equity
+        self.bars += 1
+        self.last_equity = equity
+        if equity > self.peak:
+            self.peak = equity
+        if self.peak > 0:
+            drawdown = (equity - self.peak) / self.peak
+            if drawdown < self.max_drawdown:
+                self.max_drawdown = drawdown
+        self.equity_sum += equity
+        if equity:
+            self.exposure_sum += gross_exposure / abs(equity)
+
+    def on_fill(self, qty: float, price: float, realized_pnl: float):
+        self.fills += 1
+        self.notional += abs(qty * price)
+        if realized_pnl > 0:
+            self.wins += 1
+            self.win_sum += realized_pnl
+        elif realized_pnl < 0:
+            self.losses += 1
+            self.loss_sum += realized_pnl
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Metrics so far; empty before the first bar. Ratios that are undefined are NaN.
+        """
+        if not self.bars:
+            return {}
+        nan = float("nan")
+        n = self.n_returns
+        annualizer = math.sqrt(self.periods_per_year)
+        std = math.sqrt(self.m2 / (n - 1)) if n > 1 else nan
+        downside = math.sqrt(self.downside_sq / n) if n else nan
+
+        first, last = self.first_equity, self.last_equity
+        cagr = nan
+        if n and first > 0 and last > 0:
+            cagr = (last / first) ** (self.periods_per_year / n) - 1
+        mean_equity = self.equity_sum / self.bars
+
+        metrics: Dict[str, float] = {
+            "sharpe": annualizer * self.mean / std if n > 1 and std != 0 else nan,
+            "sortino": annualizer * self.mean / downside if n and downside != 0 else nan,
+            "max_drawdown_pct": self.max_drawdown * 100,
+            "calmar": cagr / abs(self.max_drawdown) if self.max_drawdown != 0 else nan,
+            "final_equity": last,
+            "total_return_pct": (last - first) / first * 100 if first else nan,
+            "turnover": self.notional / mean_equity if mean_equity else nan,
+            "exposure_pct": self.exposure_sum / self.bars * 100,
+        }
+        if self.fills:
+            avg_win = self.win_sum / self.wins if self.wins else 0.0
+            avg_loss = self.loss_sum / self.losses if self.losses else 0.0
+            metrics["win_rate"] = self.wins / self.fills
+            metrics["avg_win"] = avg_win
+            metrics["avg_loss"] = avg_loss
+            metrics["win_loss_ratio"] = abs(avg_win / avg_loss) if self.wins and self.losses else nan
+        return metrics
@@ -0,0 +1,237 @@
+## Concurrent, rate-limit aware order submission on top of OrderManager
+
+# imports
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime
+import numpy as np
+import requests
+from systems.profiler import PROFILER
+
+#-----------------------------------------------------------------------------------#
+# OrderDispatcher queues orders by urgency and submits them from a worker pool.
+# A token bucket keeps the submit rate under the broker's limit (Alpaca: 200 req/min),
+# transient failures (timeouts, 429, 5xx) are retried with exponential backoff, and
+# every order's submit-to-ack latency is recorded. Every attempt carries the reservation's
+# client id as client_order_id, and a retry first checks whether the broker already has it.
+#-----------------------------------------------------------------------------------#
+
+URGENCY = {"high": 0, "normal": 1, "low": 2}
+_NETWORK_ERRORS = (ConnectionError, TimeoutError,
+                   requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, up to `burst` banked
+    """
+
+    def __init__(self, rate: float, burst: int, clock = time.monotonic, sleep = time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.clock = clock
+        self.sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens: float = 1.0):
+        """
+        Blocks until `tokens` are available, returns seconds waited
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                wait = (tokens - self.tokens) / self.rate
+            self.sleep(wait)
+            waited += wait
+
+def is_transient(exc: Exception) -> bool:
+    """
+    Network errors, timeouts, rate limiting (429) and server errors (5xx) are worth retrying.
+    alpaca_trade_api goes through requests, whose connection errors and timeouts are not the builtins.
+    """
+    if isinstance(exc, _NETWORK_ERRORS):
+        return True
+    status = getattr(exc, "status_code", None) or getattr(exc, "status", None)
+    if status is None and getattr(exc, "response", None) is not None:
+        status = exc.response.status_code
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+@dataclass
+class DispatchResult:
+    symbol: str
+    side: str
+    qty: float
+    urgency: int
+    status: str = "queued"        # acked / failed
+    order_id: str = None
+    attempts: int = 0
+    queue_ms: float = 0.0         # enqueue -> first send attempt
+    ack_ms: float = 0.0           # enqueue -> broker ack (submit-to-ack)
+    error: str = None
+
+@dataclass(order=True)
+class _Job:
+    urgency: int
+    seq: int
+    client_id: str = field(compare=False)
+    result: DispatchResult = field(compare=False)
+    future: Future = field(compare=False)
+    enqueued: float = field(compare=False)
+
+class OrderDispatcher:
+    """
+    Submits orders concurrently through an OrderManager.
+    submit() decides and reserves the order synchronously (so exposure is never double-counted)
+    and returns a Future resolved with a DispatchResult once the broker acks or retries run out.
+    """
+
+    def __init__(self, order_manager, max_workers = 8, rate_per_min = 200, burst = 10,
+                 max_retries = 3, backoff = 0.25, max_backoff = 4.0, urgency = None):
+        self.order_manager = order_manager
+        self.max_workers = max_workers
+        self.bucket = TokenBucket(rate_per_min / 60.0, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.urgency = dict(URGENCY if urgency is None else urgency)
+        self.results = []
+        self.errors = []
+        self._heap = []
+        self._seq = itertools.count()
+        self._cv = threading.Condition()
+        self._inflight = 0
+        self._running = False
+        self._workers = []
+
+    def start(self):
+        with self._cv:
+            if self._running:
+                return
+            self._running = True
+        for i in range(self.max_workers):
+            t = threading.Thread(target=self._worker, name=f"order-dispatch-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+
+    def stop(self, drain = True):
+        """
+        Stops the workers, by default after the queue has drained
+        """
+        if drain:
+            self.flush()
+        with self._cv:
+            self._running = False
+            self._cv.notify_all()
+        for t in self._workers:
+            t.join()
+        self._workers = []
+
+    def submit(self, symbol, action, qty, urgency = "normal"):
+        """
+        Queues a signal. Returns a Future[DispatchResult], or None if no order is needed
+        """
+        level = self.urgency[urgency] if isinstance(urgency, str) else int(urgency)
+        reserved = self.order_manager.reserve_order(symbol, action, qty)
+        if reserved is None:
+            return None
+        client_id, side, order_qty = reserved
+        job = _Job(
+            urgency=level,
+            seq=next(self._seq),
+            client_id=client_id,
+            result=DispatchResult(symbol, side, order_qty, level),
+            future=Future(),
+            enqueued=time.perf_counter(),
+        )
+        with self._cv:
+            heapq.heappush(self._heap, job)
+            self._cv.notify()
+        return job.future
+
+    def flush(self, timeout = None):
+        """
+        Waits until every queued order has been acked or failed
+        """
+        with self._cv:
+            return self._cv.wait_for(lambda: not self._heap and self._inflight == 0, timeout)
+
+    def _worker(self):
+        while True:
+            with self._cv:
+                self._cv.wait_for(lambda: self._heap or not self._running)
+                if not self._heap:
+                    return
+                job = heapq.heappop(self._heap)
+                self._inflight += 1
+            try:
+                self._dispatch(job)
+            finally:
+                with self._cv:
+                    self._inflight -= 1
+                    self._cv.notify_all()
+
+    def _dispatch(self, job: _Job):
+        res = job.result
+        delay = self.backoff
+        while True:
+            self.bucket.acquire()
+            if res.attempts == 0:
+                res.queue_ms = (time.perf_counter() - job.enqueued) * 1000
+            res.attempts += 1
+            try:
+                order = self.order_manager.submit_reserved(
+                    job.client_id, res.symbol, res.side, res.qty, release_on_error=False,
+                    retry=res.attempts > 1,
+                )
+                res.status = "acked"
+                res.order_id = getattr(order, "id", None) or job.client_id
+                break
+            except Exception as e:
+                if is_transient(e) and res.attempts <= self.max_retries:
+                    time.sleep(delay * (1 + random.random() * 0.1))
+                    delay = min(delay * 2, self.max_backoff)
+                    continue
+                self.order_manager.book.release(job.client_id)
+                res.status = "failed"
+                res.error = str(e)
+                self.errors.append(f"Order Error @ {datetime.now()}: {res.symbol} {res.side} {res.qty}: {e}")
+                print(f"Order Error @ {datetime.now()}: {res.symbol} {res.side} {res.qty}: {e}")
+                break
+        res.ack_ms = (time.perf_counter() - job.enqueued) * 1000
+        if PROFILER.enabled:
+            PROFILER.record("order_ack", res.ack_ms / 1000)
+            PROFILER.count(f"orders_{res.status}")
+        self.results.append(res)
+        job.future.set_result(res)
+
+    def latency_stats(self):
+        """
+        Submit-to-ack latency summary (ms) over acked orders
+        """
+        acked = [r.ack_ms for r in self.results if r.status == "acked"]
+        if not acked:
+            return {"count": 0, "failed": len(self.results)}
+        ms = np.asarray(acked)
+        return {
+            "count": len(ms),
+            "failed": len(self.results) - len(ms),
+            "mean_ms": float(ms.mean()),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p99_ms": float(np.percentile(ms, 99)),
+            "max_ms": float(ms.max()),
+        }
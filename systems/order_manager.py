@@ -3,6 +3,9 @@
 # alpaca imports
 import alpaca_trade_api as tradeapi
 from time import time
+from datetime import datetime
+import threading
+import uuid
 
 class ALPACA_ORDER_MANAGER:
     """
@@ -27,10 +30,18 @@ class ALPACA_ORDER_MANAGER:
             out.append((p.symbol, qty))
         return out
 
-    def send_order(self, symbol, side, qty, order_type="market", tif="day"):
+    def get_order(self, order_id):
+        """
+        (status, cumulative filled qty) for one order
+        """
+        order = self.api.get_order(order_id)
+        return order.status, float(order.filled_qty or 0)
+
+    def send_order(self, symbol, side, qty, order_type="market", tif="day", client_order_id=None):
         """
         Places market order
         side: "buy" or "sell"
+        client_order_id: idempotency key; Alpaca refuses a second order with the same one
         """
         return self.api.submit_order(
             symbol=symbol,
@@ -38,65 +49,274 @@ class ALPACA_ORDER_MANAGER:
             qty=qty,
             type=order_type,
             time_in_force=tif,
+            client_order_id=client_order_id,
         )
 
+    def get_order_by_client_order_id(self, client_order_id):
+        """
+        The order sent under client_order_id, None if the broker never received it
+        """
+        try:
+            return self.api.get_order_by_client_order_id(client_order_id)
+        except Exception as e:
+            if getattr(e, "status_code", None) == 404:
+                return None
+            raise
+
+TERMINAL_STATUSES = {"filled", "canceled", "cancelled", "expired", "rejected", "done_for_day"}
+
+class PositionBook:
+    """
+    Locally maintained positions, updated from order acks and fills instead of broker polls.
+    filled: signed filled qty per symbol. pending: acked orders not yet terminal.
+    """
+
+    def __init__(self):
+        self.filled = {}
+        self.pending = {}   # order_id -> {"symbol", "sign", "qty", "filled"}
+        self.drift = []
+        self._lock = threading.Lock()
+
+    def seed(self, positions: dict):
+        with self._lock:
+            self.filled = dict(positions)
+
+    def on_ack(self, order_id, symbol, side, qty):
+        with self._lock:
+            sign = 1 if side.lower() == "buy" else -1
+            self.pending[order_id] = {"symbol": symbol, "sign": sign, "qty": qty, "filled": 0.0}
+
+    def rekey(self, old_id, new_id):
+        """
+        Swaps a provisional (client-side) order id for the broker's id once acked
+        """
+        with self._lock:
+            if old_id in self.pending:
+                self.pending[new_id] = self.pending.pop(old_id)
+
+    def release(self, order_id):
+        """
+        Drops an in-flight order that never reached the broker
+        """
+        with self._lock:
+            self.pending.pop(order_id, None)
+
+    def on_fill(self, order_id, filled_qty, status = None):
+        """
+        filled_qty is cumulative for the order; only the increment is applied
+        """
+        with self._lock:
+            order = self.pending.get(order_id)
+            if order is None:
+                return
+            delta = float(filled_qty) - order["filled"]
+            if delta:
+                sym = order["symbol"]
+                self.filled[sym] = self.filled.get(sym, 0) + order["sign"] * delta
+                order["filled"] = float(filled_qty)
+            if status is not None and status.lower() in TERMINAL_STATUSES:
+                del self.pending[order_id]
+
+    def position(self, symbol):
+        return self.filled.get(symbol, 0)
+
+    def exposure(self, symbol):
+        """
+        Filled position plus the unfilled remainder of in-flight orders
+        """
+        with self._lock:
+            pos = self.filled.get(symbol, 0)
+            for order in self.pending.values():
+                if order["symbol"] == symbol:
+                    pos += order["sign"] * (order["qty"] - order["filled"])
+            return pos
+
+    def reconcile(self, broker_positions: dict):
+        """
+        Compares with the broker for symbols without in-flight orders; adopts the broker's
+        value and returns the drift records where the two disagreed
+        """
+        with self._lock:
+            busy = {o["symbol"] for o in self.pending.values()}
+            found = []
+            for sym in set(self.filled) | set(broker_positions):
+                if sym in busy:
+                    continue
+                local = self.filled.get(sym, 0)
+                broker = broker_positions.get(sym, 0)
+                if local != broker:
+                    found.append({"time": datetime.now(), "symbol": sym, "local": local, "broker": broker})
+                    self.filled[sym] = broker
+            self.drift.extend(found)
+            return found
+
 class OrderManager:
     """
     Keeps track of exposures, executes orders via Alpaca.
     Behaves like IBKR-order manager.
+    Positions come from a local PositionBook; broker positions are only read once at start
+    and by the background reconciler, never on the order hot path.
     """
 
-    def __init__(self, key, secret, gateway=None):
-        self.gateway = ALPACA_ORDER_MANAGER(key, secret)
-        self.local_positions = {}
+    def __init__(self, key, secret, gateway=None, reconcile_interval = 60.0):
+        self.gateway = gateway if gateway is not None else ALPACA_ORDER_MANAGER(key, secret)
+        self.book = PositionBook()
         self.last_trade_time = {}
+        self.reconcile_interval = reconcile_interval
+        self._synced = False
+        self._stop = threading.Event()
+        self._reconciler = None
+        self._plan_lock = threading.Lock()
+        self._unresolved = set()   # acked client ids the broker returned no order id for
+
+    @property
+    def local_positions(self):
+        return dict(self.book.filled)
 
     def sync_positions(self):
         """
-        Sync positions to local storage from Alpaca API
+        Reconcile local book against Alpaca positions, flagging drift
         """
-        positions = self.gateway.get_positions()  
-        self.local_positions = {sym: qty for sym, qty in positions}
+        broker = dict(self.gateway.get_positions())
+        if not self._synced:
+            self.book.seed(broker)
+            self._synced = True
+            return []
+        drift = self.book.reconcile(broker)
+        for d in drift:
+            print(f"Position drift @ {d['time']}: {d['symbol']} local={d['local']} broker={d['broker']}")
+        return drift
+
+    def poll_orders(self):
+        """
+        Refreshes fill state of in-flight orders
+        """
+        for client_id in list(self._unresolved):
+            self._resolve(client_id)
+        for order_id in list(self.book.pending):
+            if order_id in self._unresolved or order_id.startswith("local-"):
+                continue
+            status, filled_qty = self.gateway.get_order(order_id)
+            self.book.on_fill(order_id, filled_qty, status)
+
+    def _resolve(self, client_id):
+        """
+        Looks an id-less ack up by client_order_id: adopts the broker's id, or drops the
+        reservation if the broker has no such order
+        """
+        order = self.gateway.get_order_by_client_order_id(client_id)
+        order_id = getattr(order, "id", None)
+        self._unresolved.discard(client_id)
+        if not order_id:
+            self.book.release(client_id)
+            print(f"Order Error @ {datetime.now()}: broker has no order {client_id}, reservation released")
+            return
+        self.book.rekey(client_id, order_id)
+        self.book.on_fill(order_id, getattr(order, "filled_qty", None) or 0, getattr(order, "status", None))
+
+    def on_trade_update(self, order_id, filled_qty, status, client_order_id = None):
+        """
+        Fill / status push (e.g. from a trade_updates stream). A push can beat the send_order
+        ack; client_order_id then moves the reservation onto order_id before the fill is applied.
+        """
+        if client_order_id is not None:
+            self.book.rekey(client_order_id, order_id)
+        self.book.on_fill(order_id, filled_qty, status)
+
+    def _reconcile_loop(self):
+        while not self._stop.wait(self.reconcile_interval):
+            try:
+                self.poll_orders()
+                self.sync_positions()
+            except Exception as e:
+                print(f"Reconcile Error @ {datetime.now()}: {e}")
+
+    def start_reconciler(self):
+        if self._reconciler is None:
+            self._stop.clear()
+            self._reconciler = threading.Thread(target=self._reconcile_loop, daemon=True)
+            self._reconciler.start()
+
+    def stop_reconciler(self):
+        if self._reconciler is not None:
+            self._stop.set()
+            self._reconciler.join()
+            self._reconciler = None
 
     def get_position(self, symbol):
-        return self.local_positions.get(symbol, 0)
+        return self.book.exposure(symbol)
 
-    def place_order(self, symbol, action, qty):
+    def reserve_order(self, symbol, action, qty):
         """
+        Decides the order for a signal from current exposure and reserves it in the book,
+        so concurrent signals for the same symbol see it immediately.
+        Returns (client_id, side, qty) or None when no order is needed.
         action: "BUY" or "SELL" (upper-case)
-        qty: the intended trade size
         """
-        self.sync_positions()
-        current_pos = self.get_position(symbol)
-
-        now = time()
+        if not self._synced:
+            self.sync_positions()
 
-        if action == "BUY":
-            if current_pos < 0:
-                order_qty = min(abs(current_pos), qty)
-                print(f"BUY {order_qty} {symbol}")
-                self.gateway.send_order(symbol, "buy", order_qty)
-                self.last_trade_time[symbol] = now
+        with self._plan_lock:
+            current_pos = self.get_position(symbol)
+            side, order_qty = None, qty
 
-            elif current_pos == 0:
-                print(f"BUY {qty} {symbol}")
-                self.gateway.send_order(symbol, "buy", qty)
-                self.last_trade_time[symbol] = now
+            if action == "BUY":
+                if current_pos < 0:
+                    side, order_qty = "buy", min(abs(current_pos), qty)
+                elif current_pos == 0:
+                    side = "buy"
+                else:
+                    print("Already long!")
 
-            else:
-                print("Already long!")
+            elif action == "SELL":
+                if current_pos > 0:
+                    side, order_qty = "sell", min(current_pos, qty)
+                elif current_pos == 0:
+                    side = "sell"
+                else:
+                    print("Already short!")
 
-        elif action == "SELL":
-            if current_pos > 0:
-                order_qty = min(current_pos, qty)
-                print(f"SELL {order_qty} {symbol}")
-                self.gateway.send_order(symbol, "sell", order_qty)
-                self.last_trade_time[symbol] = now
+            if side is None:
+                return None
+            client_id = f"local-{uuid.uuid4()}"
+            self.book.on_ack(client_id, symbol, side, order_qty)
+            return client_id, side, order_qty
 
-            elif current_pos == 0:
-                print(f"SELL {qty} {symbol}")
-                self.gateway.send_order(symbol, "sell", qty)
-                self.last_trade_time[symbol] = now
+    def submit_reserved(self, client_id, symbol, side, qty, release_on_error = True, retry = False):
+        """
+        Sends a reserved order with client_id as its client_order_id; on success the
+        reservation becomes the broker's order.
+        retry: an earlier attempt may have reached the broker (e.g. its ack timed out), so look
+        the order up by client_order_id first and adopt it instead of sending a duplicate.
+        """
+        try:
+            order = self.gateway.get_order_by_client_order_id(client_id) if retry else None
+            if order is None:
+                order = self.gateway.send_order(symbol, side, qty, client_order_id=client_id)
+        except Exception:
+            if release_on_error:
+                self.book.release(client_id)
+            raise
+        order_id = getattr(order, "id", None)
+        if order_id:
+            self.book.rekey(client_id, order_id)
+            filled = getattr(order, "filled_qty", None)
+            if filled:
+                self.book.on_fill(order_id, filled, getattr(order, "status", None))
+        else:
+            # the broker knows it only by client_order_id; poll_orders resolves or releases it
+            self._unresolved.add(client_id)
+        self.last_trade_time[symbol] = time()
+        return order
 
-            else:
-                print("Already short!")
\ No newline at end of file
+    def place_order(self, symbol, action, qty):
+        """
+        action: "BUY" or "SELL" (upper-case)
+        qty: the intended trade size
+        """
+        reserved = self.reserve_order(symbol, action, qty)
+        if reserved is None:
+            return None
+        client_id, side, order_qty = reserved
+        print(f"{side.upper()} {order_qty} {symbol}")
+        return self.submit_reserved(client_id, symbol, side, order_qty)
@@ -0,0 +1,269 @@
+## Stage timers, counters and latency histograms for the backtest replay and the live loop
+
+# imports
+import json
+import math
+import os
+import threading
+import time
+from functools import wraps
+from pathlib import Path
+import numpy as np
+
+#-----------------------------------------------------------------------------------#
+# Instrumentation is off unless PROFILE=1 is set in the environment (or enable() is
+# called), so nothing needs editing to turn it on. Call sites check `profiler.enabled`
+# (or go through stage() / timed(), which do) and skip all clock reads when it is off.
+# Each stage keeps count / total / min / max and a fixed log-spaced histogram (20 buckets
+# per decade from 100 ns to 1000 s). Recording a sample is a list append; samples are
+# folded into the histogram in vectorized batches, so memory does not grow with the
+# number of samples, and p50 / p99 are read from the buckets (within ~6%).
+#-----------------------------------------------------------------------------------#
+
+ENV_VAR = "PROFILE"
+_BUCKETS_PER_DECADE = 20
+_MIN_EXP = -7
+_N_BUCKETS = (3 - _MIN_EXP) * _BUCKETS_PER_DECADE
+_FOLD_AT = 4096
+
+def profiling_enabled():
+    """
+    True if the PROFILE environment variable is set to anything but "", "0" or "false"
+    """
+    return os.getenv(ENV_VAR, "").strip().lower() not in ("", "0", "false", "no")
+
+class StageStats:
+    """
+    Latency samples of one stage, in seconds. add() only appends; samples are folded into
+    the histogram with numpy every _FOLD_AT samples and before any read.
+    """
+    __slots__ = ("count", "total", "min", "max", "buckets", "pending")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.buckets = np.zeros(_N_BUCKETS, dtype=np.int64)
+        self.pending = []
+
+    def add(self, seconds):
+        pending = self.pending
+        pending.append(seconds)
+        if len(pending) >= _FOLD_AT:
+            self.fold()
+
+    def fold(self):
+        if not self.pending:
+            return
+        x = np.asarray(self.pending, dtype=np.float64)
+        self.pending = []
+        self.count += len(x)
+        self.total += float(x.sum())
+        self.min = min(self.min, float(x.min()))
+        self.max = max(self.max, float(x.max()))
+        idx = (np.log10(np.maximum(x, 1e-12)) - _MIN_EXP) * _BUCKETS_PER_DECADE
+        idx = np.clip(idx, 0, _N_BUCKETS - 1).astype(np.intp)
+        self.buckets += np.bincount(idx, minlength=_N_BUCKETS)
+
+    def merge(self, other):
+        self.fold()
+        other.fold()
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.buckets += other.buckets
+
+    def percentile(self, q):
+        """
+        q-th percentile (0-100): geometric centre of the bucket holding it, clamped to [min, max]
+        """
+        self.fold()
+        if not self.count:
+            return math.nan
+        rank = max(1, math.ceil(q / 100 * self.count))
+        i = int(np.searchsorted(np.cumsum(self.buckets), rank))
+        value = 10 ** (_MIN_EXP + (i + 0.5) / _BUCKETS_PER_DECADE)
+        return min(max(value, self.min), self.max)
+
+    def summary(self):
+        self.fold()
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1e3,
+            "mean_us": self.total / self.count * 1e6 if self.count else math.nan,
+            "p50_us": self.percentile(50) * 1e6,
+            "p99_us": self.percentile(99) * 1e6,
+            "max_us": self.max * 1e6,
+        }
+
+class _StageTimer:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _NoLock:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class Profiler:
+    """
+    Named stage timers and counters.
+    enabled: None reads the PROFILE environment variable.
+    threadsafe: False drops the lock for a profiler only one thread records into (a backtest run).
+    """
+
+    def __init__(self, enabled = None, threadsafe = True):
+        self.enabled = profiling_enabled() if enabled is None else bool(enabled)
+        self._lock = threading.Lock() if threadsafe else _NoLock()
+        self.stages = {}
+        self.counters = {}
+        if not threadsafe:
+            self.record = self._record
+
+    def enable(self, on = True):
+        self.enabled = bool(on)
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.counters = {}
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self._record(stage, seconds)
+
+    def _record(self, stage, seconds):
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = StageStats()
+        stats.add(seconds)
+
+    def lap(self, stage, start):
+        """
+        Records perf_counter() - start under `stage` and returns the new perf_counter(),
+        for timing consecutive stages of a loop with one clock read each
+        """
+        now = time.perf_counter()
+        self.record(stage, now - start)
+        return now
+
+    def count(self, name, n = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def stage(self, name):
+        """
+        Context manager timing its block under `name`; a shared no-op when disabled
+        """
+        return _StageTimer(self, name) if self.enabled else _NULL_TIMER
+
+    def timed(self, name = None):
+        """
+        Decorator timing every call of a function (named after it unless `name` is given)
+        """
+        def decorate(fn):
+            label = name or fn.__qualname__
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.record(label, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def merge(self, other):
+        """
+        Adds another profiler's samples and counters (e.g. one backtest run) into this one
+        """
+        with other._lock:
+            stages = list(other.stages.items())
+            counters = list(other.counters.items())
+        with self._lock:
+            for name, stats in stages:
+                mine = self.stages.get(name)
+                if mine is None:
+                    mine = self.stages[name] = StageStats()
+                mine.merge(stats)
+            for name, n in counters:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        """
+        {"stages": {stage: {count, total_ms, mean_us, p50_us, p99_us, max_us}}, "counters": {...}}
+        """
+        with self._lock:
+            return {
+                "stages": {name: stats.summary() for name, stats in self.stages.items()},
+                "counters": dict(self.counters),
+            }
+
+    def write_json(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.snapshot(), indent=2))
+        return path
+
+    def markdown(self, title = "Profile"):
+        return profile_markdown(self.snapshot(), title)
+
+def profile_markdown(snapshot, title = "Profile"):
+    """
+    Markdown section (stage latency table + counters) for a Profiler.snapshot()
+    """
+    md = [f"## {title}"]
+    stages = snapshot.get("stages", {})
+    if not stages:
+        md.append("- No stages recorded.")
+    else:
+        md.append("\n| stage | count | total ms | mean us | p50 us | p99 us | max us |")
+        md.append("|---|---:|---:|---:|---:|---:|---:|")
+        for name, s in stages.items():
+            md.append(
+                f"| {name} | {s['count']} | {s['total_ms']:.2f} | {s['mean_us']:.1f} | "
+                f"{s['p50_us']:.1f} | {s['p99_us']:.1f} | {s['max_us']:.1f} |"
+            )
+    counters = snapshot.get("counters", {})
+    if counters:
+        md.append("")
+        for name, n in counters.items():
+            md.append(f"- **{name}**: {n}")
+    return "\n".join(md)
+
+# process-wide profiler: data fetch, report rendering, the live loop, and every backtest run merged in
+PROFILER = Profiler()
+
+def enable(on = True):
+    PROFILER.enable(on)
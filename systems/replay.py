@@ -0,0 +1,110 @@
+## Local websocket server that replays recorded quotes using Alpaca's market-data stream protocol
+
+# imports
+import asyncio
+import json
+import threading
+import pandas as pd
+import websockets
+from websockets.exceptions import ConnectionClosed
+
+class QuoteReplayServer:
+    """
+    Serves recorded quotes to ALPACA_STREAM_ENDPOINT (or any Alpaca stream client) on localhost.
+    quotes: Alpaca wire-format dicts {"S", "bp", "bs", "ap", "as", "t"} in replay order.
+    speed: None replays as fast as possible, otherwise sleeps the recorded gaps / speed.
+    """
+
+    def __init__(self, quotes: list, host = "127.0.0.1", port = 0, speed = None,
+                 key = None, secret = None, batch_size = 1):
+        self.quotes = [dict(q, T="q") for q in quotes]
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.key = key
+        self.secret = secret
+        self.batch_size = batch_size
+        self.sessions = 0
+        self._loop = None
+        self._thread = None
+        self._server = None
+
+    @staticmethod
+    def load(path):
+        """
+        Recorded quotes from a JSON-lines file, one Alpaca quote object per line
+        """
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}/v2/replay"
+
+    async def _handle(self, ws, path = None):
+        self.sessions += 1
+        try:
+            await ws.send(json.dumps([{"T": "success", "msg": "connected"}]))
+            auth = json.loads(await ws.recv())
+            if self.key is not None and (auth.get("key") != self.key or auth.get("secret") != self.secret):
+                await ws.send(json.dumps([{"T": "error", "code": 402, "msg": "auth failed"}]))
+                return
+            await ws.send(json.dumps([{"T": "success", "msg": "authenticated"}]))
+
+            sub = json.loads(await ws.recv())
+            wanted = set(sub.get("quotes", []))
+            await ws.send(json.dumps([{"T": "subscription", "quotes": sorted(wanted)}]))
+            stream = [q for q in self.quotes if "*" in wanted or q["S"] in wanted]
+
+            prev = None
+            for i in range(0, len(stream), self.batch_size):
+                batch = stream[i:i + self.batch_size]
+                if self.speed and prev is not None:
+                    gap = (pd.Timestamp(batch[0]["t"]) - prev).total_seconds() / self.speed
+                    await asyncio.sleep(max(gap, 0.0))
+                prev = pd.Timestamp(batch[-1]["t"])
+                await ws.send(json.dumps(batch))
+
+            # replay done: stay connected like the live feed until the client leaves
+            await ws.wait_closed()
+        except ConnectionClosed:
+            pass
+
+    async def _serve(self):
+        self._server = await websockets.serve(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    def start(self):
+        """
+        Starts serving on a background thread, returns the ws:// url
+        """
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._serve(), self._loop).result()
+        return self.url
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        async def _shutdown():
+            self._server.close()
+            await self._server.wait_closed()
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(_shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,289 @@
+## Results sinks for backtests: equity / trade / order records streamed out in columnar batches
+
+# imports
+import json
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+#-----------------------------------------------------------------------------------#
+# A sink holds named tables with a fixed schema. Rows are appended into a preallocated
+# batch buffer; full batches go to MemorySink (kept as arrays, for small runs) or to
+# DiskSink (one raw binary file per column, appended in place), so memory held by a run
+# is bounded by batch_size, not by run length. chunks() reads a table back in row blocks.
+# Column kinds: "f8", "i8", "i1", "bool", "ts" (int64 ns, tz kept in the schema) and
+# "cat" (int16 codes into a fixed category list, decoded back to strings).
+#-----------------------------------------------------------------------------------#
+
+_STORAGE = {"f8": np.float64, "i8": np.int64, "i1": np.int8, "bool": np.bool_, "ts": np.int64, "cat": np.int16}
+
+
+class TableSchema:
+    def __init__(self, columns: Dict[str, str], categories: Dict[str, Sequence[str]] = None, tz: str = None):
+        self.columns = dict(columns)
+        self.categories = {k: list(v) for k, v in (categories or {}).items()}
+        self.codes = {k: {c: i for i, c in enumerate(v)} for k, v in self.categories.items()}
+        self.tz = tz
+
+    def to_json(self):
+        return {"columns": self.columns, "categories": self.categories, "tz": self.tz}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data["columns"], data["categories"], data["tz"])
+
+    def encode(self, name, value):
+        kind = self.columns[name]
+        if kind == "cat":
+            return self.codes[name][value]
+        if kind == "ts":
+            return value if isinstance(value, (int, np.integer)) else pd.Timestamp(value).value
+        return value
+
+    def decode(self, arrays: Dict[str, np.ndarray]) -> pd.DataFrame:
+        out = {}
+        for name, kind in self.columns.items():
+            arr = arrays[name]
+            if kind == "cat":
+                out[name] = np.asarray(self.categories[name], dtype=object)[arr]
+            elif kind == "ts":
+                index = pd.DatetimeIndex(arr.astype("datetime64[ns]"))
+                out[name] = index.tz_localize("UTC").tz_convert(self.tz) if self.tz else index
+            else:
+                out[name] = arr
+        return pd.DataFrame(out)
+
+
+class _Buffer:
+    """
+    Preallocated batch of rows for one table
+    """
+
+    def __init__(self, schema: TableSchema, batch_size: int):
+        self.schema = schema
+        self.cols = {k: np.empty(batch_size, dtype=_STORAGE[kind]) for k, kind in schema.columns.items()}
+        self.batch_size = batch_size
+        self.size = 0
+
+    def view(self) -> Dict[str, np.ndarray]:
+        return {k: v[: self.size] for k, v in self.cols.items()}
+
+
+class ResultsSink(ABC):
+    """
+    Base sink: create() a table, append() rows, close() to flush, chunks() / frame() to read back
+    """
+
+    def __init__(self, batch_size: int = 65_536):
+        self.batch_size = batch_size
+        self.schemas: Dict[str, TableSchema] = {}
+        self._buffers: Dict[str, _Buffer] = {}
+        self._rows: Dict[str, int] = {}
+
+    def create(self, table: str, schema: TableSchema):
+        """
+        (Re)creates an empty table
+        """
+        self.schemas[table] = schema
+        self._buffers[table] = _Buffer(schema, self.batch_size)
+        self._rows[table] = 0
+        self._reset_table(table)
+
+    def append(self, table: str, **row):
+        buf = self._buffers[table]
+        i = buf.size
+        encode = buf.schema.encode
+        for name, value in row.items():
+            buf.cols[name][i] = encode(name, value)
+        buf.size += 1
+        self._rows[table] += 1
+        if buf.size == buf.batch_size:
+            self._flush(table)
+
+    def _flush(self, table: str):
+        buf = self._buffers[table]
+        if buf.size:
+            self._write_batch(table, buf.view())
+            buf.size = 0
+
+    def flush(self):
+        for table in self._buffers:
+            self._flush(table)
+
+    def close(self):
+        """
+        Flushes every table and releases the write buffers; the sink stays readable
+        """
+        self.flush()
+        for table, buf in self._buffers.items():
+            self._buffers[table] = _Buffer(buf.schema, 0)
+
+    def set_tz(self, table: str, tz):
+        """
+        Timezone for the table's "ts" columns, known only once the first timestamp arrives
+        """
+        self.schemas[table].tz = None if tz is None else str(tz)
+        self._write_schema(table)
+
+    def num_rows(self, table: str) -> int:
+        return self._rows.get(table, 0)
+
+    def chunks(self, table: str, rows: Optional[int] = None, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Decoded DataFrames of up to `rows` rows each (default batch_size), in append order,
+        including rows still sitting in the write buffer
+        """
+        if table not in self.schemas:
+            return
+        schema = self.schemas[table]
+        if columns is not None:
+            schema = TableSchema(
+                {k: schema.columns[k] for k in columns},
+                {k: v for k, v in schema.categories.items() if k in columns},
+                schema.tz,
+            )
+        rows = rows or self.batch_size
+        for block in self._read_blocks(table, rows, list(schema.columns)):
+            yield schema.decode(block)
+
+    def _read_blocks(self, table: str, rows: int, columns: List[str]) -> Iterator[Dict[str, np.ndarray]]:
+        stored = self._stored_rows(table)
+        for start in range(0, stored, rows):
+            yield self._read_range(table, start, min(start + rows, stored), columns)
+        buf = self._buffers[table].view()
+        for start in range(0, len(next(iter(buf.values()))) if buf else 0, rows):
+            yield {k: buf[k][start:start + rows] for k in columns}
+
+    def frame(self, table: str) -> pd.DataFrame:
+        """
+        Whole table as one DataFrame (small runs); an empty frame if the table has no rows
+        """
+        if not self.num_rows(table):
+            return pd.DataFrame()
+        return pd.concat(list(self.chunks(table)), ignore_index=True)
+
+    # storage hooks
+    @abstractmethod
+    def _reset_table(self, table: str):
+        pass
+
+    def _write_schema(self, table: str):
+        pass
+
+    @abstractmethod
+    def _write_batch(self, table: str, arrays: Dict[str, np.ndarray]):
+        pass
+
+    @abstractmethod
+    def _stored_rows(self, table: str) -> int:
+        pass
+
+    @abstractmethod
+    def _read_range(self, table: str, start: int, stop: int, columns: List[str]) -> Dict[str, np.ndarray]:
+        pass
+
+
+class MemorySink(ResultsSink):
+    """
+    Keeps flushed batches as numpy arrays; fine for runs that fit in memory
+    """
+
+    def __init__(self, batch_size: int = 65_536):
+        super().__init__(batch_size)
+        self._batches: Dict[str, List[Dict[str, np.ndarray]]] = {}
+
+    def _reset_table(self, table):
+        self._batches[table] = []
+
+    def _write_batch(self, table, arrays):
+        self._batches[table].append({k: v.copy() for k, v in arrays.items()})
+
+    def _stored_rows(self, table):
+        return sum(len(next(iter(b.values()))) for b in self._batches[table])
+
+    def _read_range(self, table, start, stop, columns):
+        parts, offset = {k: [] for k in columns}, 0
+        for batch in self._batches[table]:
+            n = len(next(iter(batch.values())))
+            lo, hi = max(start - offset, 0), min(stop - offset, n)
+            if lo < hi:
+                for k in columns:
+                    parts[k].append(batch[k][lo:hi])
+            offset += n
+            if offset >= stop:
+                break
+        return {k: np.concatenate(v) for k, v in parts.items()}
+
+
+class DiskSink(ResultsSink):
+    """
+    One append-only binary file per column under root/<table>/, plus schema.json.
+    Reads memory-map the files, so chunked readers never load a whole column.
+    root=None uses a temporary directory removed by cleanup().
+    """
+
+    def __init__(self, root=None, batch_size: int = 65_536):
+        super().__init__(batch_size)
+        self._tmp = root is None
+        self.root = Path(tempfile.mkdtemp(prefix="backtest_")) if root is None else Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._stored: Dict[str, int] = {}
+
+    def _path(self, table, column):
+        return self.root / table / f"{column}.bin"
+
+    def _reset_table(self, table):
+        tdir = self.root / table
+        if tdir.exists():
+            shutil.rmtree(tdir)
+        tdir.mkdir(parents=True)
+        self._write_schema(table)
+        for column in self.schemas[table].columns:
+            self._path(table, column).touch()
+        self._stored[table] = 0
+
+    def _write_schema(self, table):
+        (self.root / table / "schema.json").write_text(json.dumps(self.schemas[table].to_json()))
+
+    def _write_batch(self, table, arrays):
+        for column, arr in arrays.items():
+            with open(self._path(table, column), "ab") as f:
+                f.write(np.ascontiguousarray(arr).tobytes())
+        self._stored[table] += len(next(iter(arrays.values())))
+
+    def _stored_rows(self, table):
+        return self._stored.get(table, 0)
+
+    def _read_range(self, table, start, stop, columns):
+        out = {}
+        for column in columns:
+            dtype = _STORAGE[self.schemas[table].columns[column]]
+            mm = np.memmap(self._path(table, column), dtype=dtype, mode="r", shape=(self._stored[table],))
+            out[column] = np.array(mm[start:stop])
+            del mm
+        return out
+
+    @classmethod
+    def open(cls, root, batch_size: int = 65_536) -> "DiskSink":
+        """
+        Reopens a finished run's directory for reading
+        """
+        sink = cls(root, batch_size)
+        for schema_file in sorted(sink.root.glob("*/schema.json")):
+            table = schema_file.parent.name
+            schema = TableSchema.from_json(json.loads(schema_file.read_text()))
+            sink.schemas[table] = schema
+            sink._buffers[table] = _Buffer(schema, 1)
+            first = next(iter(schema.columns))
+            n = sink._path(table, first).stat().st_size // np.dtype(_STORAGE[schema.columns[first]]).itemsize
+            sink._stored[table] = sink._rows[table] = n
+        return sink
+
+    def cleanup(self):
+        if self._tmp and self.root.exists():
+            shutil.rmtree(self.root)
@@ -0,0 +1,252 @@
+## Event-driven live loop: per-symbol pipelines on drift-free timers or data triggers
+
+# imports
+import heapq
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+import numpy as np
+from systems.profiler import PROFILER
+
+#-----------------------------------------------------------------------------------#
+# Each symbol gets its own pipeline: fetch quotes -> evaluate strategies -> on_signal.
+# Pipelines fire on a fixed cadence (due times are start + k * period, so runtime never
+# shifts the schedule) or whenever new data is pushed. A feed fetches many symbols in
+# one batched call per period and then triggers their pipelines. A symbol has at most one
+# run in flight plus `queue_size` pending ticks; further ticks are coalesced and reported
+# as overruns. Strategies of one tick are evaluated concurrently on a shared worker pool,
+# so a slow fit only delays its own symbol.
+#-----------------------------------------------------------------------------------#
+
+class SymbolPipeline:
+    """
+    Schedule, bounded tick queue and run statistics for one symbol
+    """
+
+    def __init__(self, symbol, strategies, period = None, fetch = None, queue_size = 1,
+                 offset = 0.0, history = 1000):
+        self.symbol = symbol
+        self.strategies = list(strategies)
+        self.period = period
+        self.offset = offset
+        self.fetch = fetch
+        self.queue_size = queue_size
+        self.next_due = None
+        self.pending = deque()
+        self.running = False
+        self.runs = 0
+        self.dropped = 0
+        self.overruns = 0
+        self.errors = 0
+        self.run_ms = deque(maxlen=history)
+        self.lag_ms = deque(maxlen=history)
+        self.targets = []   # feeds: symbols whose pipelines run after each successful fetch
+
+class LiveScheduler:
+    """
+    Drives SymbolPipelines from one timer thread.
+    on_signal(symbol, strategy, signal) is called for every non-None signal, from a worker thread.
+    max_workers: strategy evaluation threads shared by all symbols.
+    """
+
+    def __init__(self, on_signal, max_workers = 4, clock = time.monotonic, overrun_log = 1000):
+        self.on_signal = on_signal
+        self.max_workers = max_workers
+        self.clock = clock
+        self.pipelines = {}
+        self.overrun_log = deque(maxlen=overrun_log)
+        self._heap = []
+        self._cv = threading.Condition()
+        self._running = False
+        self._timer = None
+        self._pipeline_pool = None
+        self._strategy_pool = None
+
+    def add(self, symbol, strategies, period = None, fetch = None, queue_size = 1, offset = 0.0):
+        """
+        period: seconds between runs, None for data-triggered only (see trigger / on_quote).
+        fetch: fetch(symbol) refreshing the symbol's quotes before strategies run.
+        offset: delay of the first run, to stagger symbols sharing a period.
+        """
+        pipe = SymbolPipeline(symbol, strategies, period, fetch, queue_size, offset)
+        with self._cv:
+            self.pipelines[symbol] = pipe
+            if period is not None and self._running:
+                self._schedule(pipe, self.clock() + offset)
+        return pipe
+
+    def add_feed(self, symbols, period, fetch, offset = 0.0, name = "feed"):
+        """
+        One batched fetch(symbols) per period, after which every symbol's pipeline is
+        triggered; the symbols are added with period=None. Keeps the request count per
+        cadence at the endpoint's batch count instead of one request per symbol.
+        """
+        pipe = SymbolPipeline(name, [], period, lambda _: fetch(list(symbols)), 1, offset)
+        pipe.targets = list(symbols)
+        with self._cv:
+            self.pipelines[name] = pipe
+            if self._running:
+                self._schedule(pipe, self.clock() + offset)
+        return pipe
+
+    def _schedule(self, pipe, due):
+        pipe.next_due = due
+        heapq.heappush(self._heap, (due, pipe.symbol))
+        self._cv.notify()
+
+    def start(self):
+        with self._cv:
+            if self._running:
+                return
+            self._running = True
+            self._pipeline_pool = ThreadPoolExecutor(
+                max(len(self.pipelines), self.max_workers), thread_name_prefix="pipeline"
+            )
+            self._strategy_pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="strategy")
+            now = self.clock()
+            for pipe in self.pipelines.values():
+                if pipe.period is not None:
+                    self._schedule(pipe, now + pipe.offset)
+        self._timer = threading.Thread(target=self._timer_loop, name="scheduler-timer", daemon=True)
+        self._timer.start()
+
+    def stop(self):
+        """
+        Stops the timers and waits for in-flight runs to finish
+        """
+        with self._cv:
+            self._running = False
+            self._heap = []
+            for pipe in self.pipelines.values():
+                pipe.pending.clear()
+            self._cv.notify_all()
+        if self._timer is not None:
+            self._timer.join()
+            self._timer = None
+        if self._pipeline_pool is not None:
+            self._pipeline_pool.shutdown(wait=True)
+            self._strategy_pool.shutdown(wait=True)
+            self._pipeline_pool = self._strategy_pool = None
+
+    def _timer_loop(self):
+        while True:
+            with self._cv:
+                if not self._running:
+                    return
+                if not self._heap:
+                    self._cv.wait()
+                    continue
+                due, symbol = self._heap[0]
+                now = self.clock()
+                if due > now:
+                    self._cv.wait(due - now)
+                    continue
+                heapq.heappop(self._heap)
+                pipe = self.pipelines[symbol]
+                # next due time comes from the schedule, not from when this one ran
+                nxt = due + pipe.period
+                if nxt <= now:
+                    missed = int((now - nxt) // pipe.period) + 1
+                    self._overrun(pipe, "timer", f"{missed} tick(s) skipped, {(now - due) * 1000:.1f}ms late")
+                    nxt += missed * pipe.period
+                self._schedule(pipe, nxt)
+                self._enqueue(pipe, due)
+
+    def trigger(self, symbol):
+        """
+        Data trigger: runs the symbol's pipeline now (e.g. on a pushed quote)
+        """
+        with self._cv:
+            if self._running and symbol in self.pipelines:
+                self._enqueue(self.pipelines[symbol], self.clock())
+
+    def on_quote(self, symbol, q):
+        """
+        Quote handler signature, for register_handler on a streaming endpoint
+        """
+        self.trigger(symbol)
+
+    def _enqueue(self, pipe, due):
+        # caller holds self._cv
+        if not pipe.running:
+            pipe.running = True
+            self._pipeline_pool.submit(self._run, pipe, due)
+            return
+        if len(pipe.pending) >= pipe.queue_size:
+            pipe.pending.popleft()  # coalesce: the newest tick reads the freshest data anyway
+            pipe.dropped += 1
+            self._overrun(pipe, "queue", "previous run still in flight, tick coalesced")
+        pipe.pending.append(due)
+
+    def _overrun(self, pipe, stage, detail):
+        pipe.overruns += 1
+        if PROFILER.enabled:
+            PROFILER.count(f"overruns_{stage}")
+        self.overrun_log.append({"time": datetime.now(), "symbol": pipe.symbol, "stage": stage, "detail": detail})
+        print(f"Loop Overrun @ {datetime.now()}: {pipe.symbol} [{stage}] {detail}")
+
+    def _run(self, pipe, due):
+        while True:
+            start = self.clock()
+            pipe.lag_ms.append((start - due) * 1000)
+            prof = PROFILER if PROFILER.enabled else None
+            if prof is not None:
+                prof.record("start_lag", max(start - due, 0.0))
+                t = time.perf_counter()
+            try:
+                if pipe.fetch is not None:
+                    pipe.fetch(pipe.symbol)
+                    if prof is not None:
+                        t = prof.lap("fetch", t)
+                futures = {self._strategy_pool.submit(s.compute_signal): s for s in pipe.strategies}
+                wait(futures)
+                if prof is not None:
+                    t = prof.lap("compute_signal", t)
+                for fut, strat in futures.items():
+                    try:
+                        signal = fut.result()
+                    except Exception as e:
+                        pipe.errors += 1
+                        print(f"Strategy Error @ {datetime.now()}: {pipe.symbol} {type(strat).__name__}: {e}")
+                        continue
+                    if signal is not None:
+                        self.on_signal(pipe.symbol, strat, signal)
+                        if prof is not None:
+                            t = prof.lap("on_signal", t)
+                            prof.count("signals")
+                for sym in pipe.targets:
+                    self.trigger(sym)
+            except Exception as e:
+                pipe.errors += 1
+                print(f"System Error @ {datetime.now()}: {pipe.symbol}: {e}")
+            pipe.runs += 1
+            pipe.run_ms.append((self.clock() - start) * 1000)
+            if prof is not None:
+                prof.record("pipeline", pipe.run_ms[-1] / 1000)
+                prof.count("pipeline_runs")
+
+            with self._cv:
+                if not pipe.pending or not self._running:
+                    pipe.running = False
+                    return
+                due = pipe.pending.popleft()
+
+    def report(self):
+        """
+        Per-symbol runs, coalesced ticks, overruns and run time / start lag percentiles (ms)
+        """
+        out = {}
+        for sym, pipe in self.pipelines.items():
+            row = {"runs": pipe.runs, "dropped": pipe.dropped, "overruns": pipe.overruns, "errors": pipe.errors}
+            if pipe.run_ms:
+                ms = np.fromiter(pipe.run_ms, dtype=np.float64)
+                lag = np.fromiter(pipe.lag_ms, dtype=np.float64)
+                row.update({
+                    "p50_ms": float(np.percentile(ms, 50)),
+                    "p99_ms": float(np.percentile(ms, 99)),
+                    "max_lag_ms": float(lag.max()),
+                })
+            out[sym] = row
+        return out
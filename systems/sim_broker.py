@@ -0,0 +1,351 @@
+## In-process simulated broker with the ALPACA_ORDER_MANAGER surface, for offline latency and load tests
+
+# imports
+import argparse
+import itertools
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+#-----------------------------------------------------------------------------------#
+# SIM_ORDER_MANAGER answers get_positions / get_order / send_order like the Alpaca
+# gateway, so it drops into OrderManager(gateway=...). Orders match against a
+# top-of-book fed by quotes (live handler or recorded replay), acks are delayed by a
+# configurable latency, and a seeded fraction of orders is rejected or throttled.
+#-----------------------------------------------------------------------------------#
+
+class SimulatedRejection(Exception):
+    """
+    Broker-side refusal; status_code mirrors Alpaca's APIError (403/422 fatal, 429 retryable)
+    """
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+@dataclass
+class SimOrder:
+    id: str
+    symbol: str
+    side: str
+    qty: float
+    type: str = "market"
+    time_in_force: str = "day"
+    limit_price: float = None
+    client_order_id: str = None
+    status: str = "accepted"      # accepted / partially_filled / filled / canceled
+    filled_qty: float = 0.0
+    filled_avg_price: float = None
+    submitted_at: datetime = None
+    fills: list = field(default_factory=list)
+
+    @property
+    def remaining(self):
+        return self.qty - self.filled_qty
+
+class SIM_ORDER_MANAGER:
+    """
+    Simulated broker. Register on_quote as a data handler (or call replay) to drive the book.
+    ack_latency: seconds send_order blocks before acking, plus uniform jitter in [0, latency_jitter).
+    reject_rate / throttle_rate: fraction of orders refused with 403 (fatal) / 429 (retryable).
+    max_position: absolute position cap per symbol, orders that would breach it are rejected.
+    """
+
+    def __init__(self, ack_latency = 0.0, latency_jitter = 0.0, reject_rate = 0.0,
+                 throttle_rate = 0.0, max_position = None, cash = 100_000.0, seed = None):
+        self.ack_latency = ack_latency
+        self.latency_jitter = latency_jitter
+        self.reject_rate = reject_rate
+        self.throttle_rate = throttle_rate
+        self.max_position = max_position
+        self.cash = cash
+        self.positions = {}
+        self.orders = {}
+        self.client_ids = {}    # client_order_id -> order id
+        self.book = {}          # symbol -> {"bid", "ask", "bid_size", "ask_size", "timestamp"}
+        self.resting = {}       # symbol -> [SimOrder] awaiting liquidity
+        self.trade_handlers = []
+        self.rejected = 0
+        self.throttled = 0
+        self._ids = itertools.count(1)
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+
+    def register_trade_handler(self, func):
+        """
+        func(order_id, filled_qty, status, client_order_id) on every fill / cancel, e.g.
+        OrderManager.on_trade_update. Called after the broker lock is released; a fill on arrival
+        is pushed before send_order returns, so handlers match it by client_order_id.
+        """
+        self.trade_handlers.append(func)
+
+    # broker surface (same as ALPACA_ORDER_MANAGER)
+    def get_positions(self):
+        """
+        List of (symbol, qty) tuples
+        """
+        with self._lock:
+            return [(sym, qty) for sym, qty in self.positions.items() if qty]
+
+    def get_order(self, order_id):
+        """
+        (status, cumulative filled qty) for one order
+        """
+        with self._lock:
+            order = self.orders[order_id]
+            return order.status, order.filled_qty
+
+    def get_order_by_client_order_id(self, client_order_id):
+        """
+        The order sent under client_order_id, None if there is none
+        """
+        with self._lock:
+            order_id = self.client_ids.get(client_order_id)
+            return self.orders[order_id] if order_id is not None else None
+
+    def send_order(self, symbol, side, qty, order_type="market", tif="day", limit_price=None,
+                   client_order_id=None):
+        """
+        Acks after the configured latency; marketable quantity fills against the current quote.
+        A client_order_id that was already used is refused (422), like Alpaca does.
+        """
+        delay = self.ack_latency + (self._rng.random() * self.latency_jitter if self.latency_jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+        side = side.lower()
+        with self._lock:
+            draw = self._rng.random()
+            if draw < self.throttle_rate:
+                self.throttled += 1
+                raise SimulatedRejection(429, "rate limit exceeded")
+            if draw < self.throttle_rate + self.reject_rate:
+                self.rejected += 1
+                raise SimulatedRejection(403, "insufficient buying power")
+            if client_order_id is not None and client_order_id in self.client_ids:
+                self.rejected += 1
+                raise SimulatedRejection(422, f"client_order_id {client_order_id} must be unique")
+            if self.max_position is not None:
+                sign = 1 if side == "buy" else -1
+                if abs(self._exposure(symbol) + sign * qty) > self.max_position:
+                    self.rejected += 1
+                    raise SimulatedRejection(422, f"order would exceed position limit on {symbol}")
+
+            order = SimOrder(
+                id=f"sim-{next(self._ids)}",
+                symbol=symbol,
+                side=side,
+                qty=float(qty),
+                type=order_type,
+                time_in_force=tif,
+                limit_price=limit_price,
+                client_order_id=client_order_id,
+                submitted_at=datetime.now(),
+            )
+            self.orders[order.id] = order
+            if client_order_id is not None:
+                self.client_ids[client_order_id] = order.id
+            self.resting.setdefault(symbol, []).append(order)
+            touched = self._match(symbol)
+        self._notify(*touched)
+        return order
+
+    def cancel_order(self, order_id):
+        with self._lock:
+            order = self.orders[order_id]
+            if order.status in ("filled", "canceled"):
+                return order
+            order.status = "canceled"
+            self.resting[order.symbol].remove(order)
+        self._notify(order)
+        return order
+
+    # market data
+    def on_quote(self, symbol, q):
+        """
+        Quote handler (same signature as the data endpoints'); re-matches resting orders
+        """
+        touched = []
+        with self._lock:
+            self.book[symbol] = {
+                "bid": q["bid"],
+                "ask": q["ask"],
+                "bid_size": q.get("bid_size"),
+                "ask_size": q.get("ask_size"),
+                "timestamp": q.get("timestamp"),
+            }
+            if self.resting.get(symbol):
+                touched = self._match(symbol)
+        self._notify(*touched)
+
+    def replay(self, quotes):
+        """
+        Drives the book from recorded Alpaca wire-format quotes ({"S", "bp", "bs", "ap", "as", "t"}),
+        e.g. QuoteReplayServer.load(path)
+        """
+        for msg in quotes:
+            self.on_quote(msg["S"], {
+                "bid": msg["bp"],
+                "bid_size": msg.get("bs"),
+                "ask": msg["ap"],
+                "ask_size": msg.get("as"),
+                "timestamp": msg.get("t"),
+            })
+
+    def _exposure(self, symbol):
+        pos = self.positions.get(symbol, 0.0)
+        for o in self.resting.get(symbol, []):
+            pos += (o.remaining if o.side == "buy" else -o.remaining)
+        return pos
+
+    def _match(self, symbol):
+        """
+        Fills resting orders in arrival order against the displayed size at the touch;
+        what is taken stays consumed until the next quote. A missing size is unlimited liquidity.
+        Returns the orders that traded; callers notify them once the lock is released.
+        """
+        quote = self.book.get(symbol)
+        if quote is None:
+            return []
+        size_key = {"buy": "ask_size", "sell": "bid_size"}
+        touched = []
+        for order in list(self.resting[symbol]):
+            price = quote["ask"] if order.side == "buy" else quote["bid"]
+            if order.limit_price is not None:
+                if (order.side == "buy" and price > order.limit_price) or \
+                   (order.side == "sell" and price < order.limit_price):
+                    continue
+            avail = quote[size_key[order.side]]
+            qty = order.remaining if avail is None else min(order.remaining, avail)
+            if qty <= 0:
+                continue
+            if avail is not None:
+                quote[size_key[order.side]] = avail - qty  # consumed until the next quote refreshes it
+            self._fill(order, qty, price)
+            touched.append(order)
+        if touched:
+            self.resting[symbol] = [o for o in self.resting[symbol] if o.remaining > 0]
+        return touched
+
+    def _fill(self, order, qty, price):
+        prev = order.filled_qty
+        order.filled_qty = prev + qty
+        order.filled_avg_price = price if prev == 0 else (order.filled_avg_price * prev + price * qty) / order.filled_qty
+        order.status = "filled" if order.remaining <= 0 else "partially_filled"
+        order.fills.append((qty, price))
+        sign = 1 if order.side == "buy" else -1
+        self.positions[order.symbol] = self.positions.get(order.symbol, 0.0) + sign * qty
+        self.cash -= sign * qty * price
+
+    def _notify(self, *orders):
+        for order in orders:
+            for h in self.trade_handlers:
+                try:
+                    h(order.id, order.filled_qty, order.status, order.client_order_id)
+                except Exception as e:
+                    print(f"Trade Handler Error @ {datetime.now()}: {order.id}: {e}")
+
+def synthetic_quotes(symbols, n, spread = 0.02, size = 500, seed = 0):
+    """
+    Random-walk quotes in Alpaca wire format, interleaved across symbols
+    """
+    rng = np.random.default_rng(seed)
+    mids = 100 + np.cumsum(rng.normal(0, 0.05, size=(n, len(symbols))), axis=0)
+    start = pd.Timestamp("2024-01-02 14:30", tz="UTC")
+    out = []
+    for i in range(n):
+        t = (start + pd.Timedelta(milliseconds=i)).isoformat()
+        for j, sym in enumerate(symbols):
+            m = float(mids[i, j])
+            out.append({"S": sym, "bp": m - spread / 2, "bs": size, "ap": m + spread / 2, "as": size, "t": t})
+    return out
+
+def load_test(n_orders = 5000, n_symbols = 50, workers = 8, ack_latency = 0.001,
+              reject_rate = 0.0, throttle_rate = 0.0, quotes = None, seed = 0):
+    """
+    Pushes alternating BUY/SELL signals for n_symbols (or the symbols in `quotes`) through OrderManager + OrderDispatcher
+    into a SIM_ORDER_MANAGER while quotes replay on a second thread.
+    Returns throughput and submit-to-ack latency stats.
+    """
+    from systems.order_dispatch import OrderDispatcher
+    from systems.order_manager import OrderManager
+
+    if quotes is None:
+        symbols = [f"SIM{i:03d}" for i in range(n_symbols)]
+        quotes = synthetic_quotes(symbols, 200, seed=seed)
+    else:
+        symbols = sorted({q["S"] for q in quotes})
+    broker = SIM_ORDER_MANAGER(ack_latency=ack_latency, reject_rate=reject_rate,
+                               throttle_rate=throttle_rate, seed=seed)
+    broker.replay(quotes)  # opening book
+
+    om = OrderManager(None, None, gateway=broker)
+    broker.register_trade_handler(om.on_trade_update)
+    dispatcher = OrderDispatcher(om, max_workers=workers, rate_per_min=1e9, burst=n_orders, backoff=0.001)
+
+    feeding = threading.Event()
+    feeding.set()
+
+    def feed():
+        while feeding.is_set():
+            broker.replay(quotes)
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    dispatcher.start()
+
+    start = time.perf_counter()
+    submitted = 0
+    rounds = itertools.count()
+    while submitted < n_orders:
+        action = "BUY" if next(rounds) % 2 == 0 else "SELL"
+        for sym in symbols:
+            if dispatcher.submit(sym, action, 100) is not None:
+                submitted += 1
+                if submitted >= n_orders:
+                    break
+        dispatcher.flush()
+    elapsed = time.perf_counter() - start
+
+    dispatcher.stop()
+    feeding.clear()
+    feeder.join()
+    stats = dispatcher.latency_stats()
+    stats.update({
+        "orders": submitted,
+        "seconds": elapsed,
+        "orders_per_sec": submitted / elapsed,
+        "rejected": broker.rejected,
+        "throttled": broker.throttled,
+        "filled": sum(o.status == "filled" for o in broker.orders.values()),
+    })
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m systems.sim_broker", description="Simulated broker load test")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    bench = sub.add_parser("bench", help="push orders through OrderManager + OrderDispatcher into the simulator")
+    bench.add_argument("--orders", type=int, default=5000)
+    bench.add_argument("--symbols", type=int, default=50)
+    bench.add_argument("--workers", type=int, default=8)
+    bench.add_argument("--latency", type=float, default=0.001, help="ack latency in seconds")
+    bench.add_argument("--reject-rate", type=float, default=0.0)
+    bench.add_argument("--throttle-rate", type=float, default=0.0)
+    bench.add_argument("--quotes", help="JSON-lines file of recorded Alpaca quotes (default: synthetic)")
+    args = parser.parse_args(argv)
+
+    quotes = None
+    if args.quotes:
+        from systems.replay import QuoteReplayServer
+        quotes = QuoteReplayServer.load(args.quotes)
+    stats = load_test(args.orders, args.symbols, args.workers, args.latency,
+                      args.reject_rate, args.throttle_rate, quotes)
+    for k, v in stats.items():
+        print(f"{k:>15}: {v:.3f}" if isinstance(v, float) else f"{k:>15}: {v}")
+
+if __name__ == "__main__":
+    main()
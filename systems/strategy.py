@@ -1,24 +1,50 @@
 ## strategy signal generation
 
 # imports 
-from systems.equity import Equity # DO NOT delete 'systems.', needed for upstream imports
+from systems.equity import DEFAULT_STATE, MarketState # DO NOT delete 'systems.', needed for upstream imports
 import numpy as np
 import time
-import statsmodels.api as sm
+from collections import deque
 from datetime import datetime
 from abc import ABC, abstractmethod
 
 # base class
 class Strategy(ABC):
-    def __init__(self,symbol):
+    def __init__(self, symbol, state: MarketState = None):
         self.symbol = symbol.upper()
-        self.equity = Equity(symbol)
+        self.state = state if state is not None else DEFAULT_STATE
+        self.equity = self.state.equity(self.symbol)
         self.strategy_errors = []
+
+    def bind(self, state: MarketState):
+        """
+        Points the strategy at the Equity for its symbol in `state` and resets derived state
+        """
+        self.state = state
+        self.equity = state.equity(self.symbol)
+        self.reset()
     
     @abstractmethod
     def compute_signal(self):
         pass
 
+    def reset(self):
+        """
+        Clears per-run state derived from the Equity history (called before each backtest)
+        """
+        self.strategy_errors = []
+
+    def compute_signals(self, prices: np.ndarray) -> np.ndarray:
+        """
+        Optional batch API: signals ("BUY"/"SELL"/None, object array) for a whole price column.
+        Must match calling compute_signal() after each price is recorded on a fresh Equity.
+        """
+        raise NotImplementedError
+
+    @property
+    def supports_batch(self):
+        return type(self).compute_signals is not Strategy.compute_signals
+
 class MeanReversion(Strategy):
     """
     Simple Z-score mrev intraday strategy
@@ -26,26 +52,29 @@ class MeanReversion(Strategy):
     SELL: price score is above z_thresh
     """
 
-    def __init__(self, symbol, window = 20, z_thresh = 0.1):
-        super().__init__(symbol)
+    def __init__(self, symbol, window = 20, z_thresh = 0.1, state = None):
+        super().__init__(symbol, state)
         self.window = window
         self.z_thresh = z_thresh
+        self.equity.register_window(window)
+
+    def reset(self):
+        super().reset()
+        self.equity.register_window(self.window)
 
     def compute_signal(self):
         try:
-            prices = self.equity.get_prices(self.window)
-            if prices is None or len(prices) < self.window:
+            if len(self.equity) < self.window:
                 print(f"{self.symbol}: waiting for enough data")
                 return None
 
-            mean = np.mean(prices)
-            std = np.std(prices)
-            last = prices[-1]
-
-            if std == 0:
+            # O(1) read from the rolling accumulator, None when std == 0; shared per tick
+            # with any other strategy on this Equity using the same window
+            window = self.window
+            z = self.equity.memo(("zscore", window), lambda e: e.zscore(window))
+            if z is None:
                 return None
 
-            z = (last - mean) / std
             if z < -self.z_thresh:
                 return "BUY"
             elif z > self.z_thresh:
@@ -55,35 +84,147 @@ class MeanReversion(Strategy):
         except Exception as e:
             self.strategy_errors.append(f"[MR] Strategty Error @ {datetime.now()}: {e}")
             print(f"[MR] Strategty Error @ {datetime.now()}: {e}")
+
+    def compute_signals(self, prices):
+        prices = np.asarray(prices, dtype=np.float64)
+        signals = np.full(len(prices), None, dtype=object)
+        if len(prices) < self.window:
+            return signals
+
+        windows = np.lib.stride_tricks.sliding_window_view(prices, self.window)
+        mean = windows.mean(axis=1)
+        std = windows.std(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = (prices[self.window - 1:] - mean) / std
+
+        tail = signals[self.window - 1:]
+        valid = std != 0
+        tail[valid & (z < -self.z_thresh)] = "BUY"
+        tail[valid & (z > self.z_thresh)] = "SELL"
+        return signals
             
 class RandomStrategy(Strategy):
     ## is this acc random
-    def __init__(self, symbol, window = 20, z_thresh = 2.0):
-        super().__init__(symbol)
+    def __init__(self, symbol, window = 20, z_thresh = 2.0, state = None):
+        super().__init__(symbol, state)
         self.window = ["BUY", 'SELL',None]
         self.index = 0
     
+    def reset(self):
+        super().reset()
+        self.index = 0
+
     def compute_signal(self):
         self.index+=1
         return self.window[(self.index-1)%3]  
+
+    def compute_signals(self, prices):
+        idx = self.index + np.arange(len(prices))
+        self.index += len(prices)
+        return np.array(self.window, dtype=object)[idx % 3]
     
+class RecursiveAR:
+    """
+    Recursive least-squares AR(p) estimator, no intercept (same model as AutoReg(trend='n')).
+    O(p^2) per new price. forgetting < 1 exponentially down-weights old observations,
+    forgetting == 1 reproduces the full-history OLS fit.
+    """
+
+    def __init__(self, lags = 1, forgetting = 1.0, delta = 1e6):
+        if not 0 < forgetting <= 1:
+            raise ValueError("forgetting factor must be in (0, 1]")
+        self.lags = lags
+        self.forgetting = forgetting
+        self.theta = np.zeros(lags)
+        self.P = np.eye(lags) * delta
+        self._recent = deque(maxlen=lags)  # most recent price first
+        self.nobs = 0
+
+    def update(self, y):
+        """
+        Feeds one new price and updates coefficients
+        """
+        if len(self._recent) == self.lags:
+            phi = np.fromiter(self._recent, dtype=np.float64, count=self.lags)
+            P_phi = self.P @ phi
+            gain = P_phi / (self.forgetting + phi @ P_phi)
+            err = y - self.theta @ phi
+            self.theta += gain * err
+            self.P = (self.P - np.outer(gain, P_phi)) / self.forgetting
+            self.nobs += 1
+        self._recent.appendleft(y)
+
+    def forecast(self):
+        """
+        One-step-ahead forecast from the latest p prices
+        """
+        if len(self._recent) < self.lags:
+            return None
+        return float(self.theta @ np.fromiter(self._recent, dtype=np.float64, count=self.lags))
+
 class AutoRegresion(Strategy):
-    ## AR1 strategy based on previous bars
+    ## AR(p) strategy based on previous bars, fitted incrementally with RLS
+
+    def __init__(self, symbol, lags = 1, forgetting = 1.0, min_obs = 20,
+                 validate = False, validate_every = 50, validate_tol = 1e-6, state = None):
+        super().__init__(symbol, state)
+        self.lags = lags
+        self.min_obs = min_obs
+        self.model = RecursiveAR(lags=lags, forgetting=forgetting)
+        self._seen = 0  # equity.count already fed into the model
+        self.validate = validate
+        self.validate_every = validate_every
+        self.validate_tol = validate_tol
+        self.validation_log = []
+
+    def reset(self):
+        super().reset()
+        self.model = RecursiveAR(lags=self.lags, forgetting=self.model.forgetting)
+        self._seen = 0
+        self.validation_log = []
 
-    def __init__(self, symbol):
-        super().__init__(symbol)
+    def _sync_model(self):
+        ## Feeds prices recorded since the last call into the RLS model
+        if self.equity.count == self._seen:
+            return
+        new, self._seen = self.equity.since(self._seen)
+        for px in new:
+            self.model.update(float(px))
+
+    def _regression_statsmodels(self):
+        ## Reference fit: full AutoReg on the price history in equity class (slow, used for validation)
+        import statsmodels.api as sm
+        y = self.equity.snapshot()
+        fitted = sm.tsa.AutoReg(y, lags = self.lags, trend='n').fit()
+        return fitted.forecast(steps=1)[0]
+
+    def _validate(self, pred):
+        ## Compares RLS forecast against statsmodels on a sample of bars. The reference fits the
+        ## buffered history only, so it matches the RLS fit while every price seen is still in
+        ## the buffer and forgetting == 1; past that the two fit different data and it is skipped.
+        if self.model.forgetting != 1.0 or self.equity.count > self.equity.capacity:
+            return
+        ref = float(self._regression_statsmodels())
+        err = abs(pred - ref)
+        self.validation_log.append({"count": self.equity.count, "rls": pred, "statsmodels": ref, "abs_err": err})
+        if err > self.validate_tol * max(1.0, abs(ref)):
+            print(f"[AR] Validation drift @ {datetime.now()}: rls={pred:.6f} statsmodels={ref:.6f}")
 
     def _regression(self):
-        ## Runs AR(1) model on historical quotes in equity class 
-        y = self.equity.get_prices()
-        model = sm.tsa.AutoReg(y,lags = 1, trend='n')
-        fitted = model.fit()
-        next_period_pred = fitted.forecast(steps=1)
-        return next_period_pred[0]  
+        ## One-step AR(p) forecast, None until min_obs prices are available
+        self._sync_model()
+        if len(self.equity) < self.min_obs:
+            return None
+        pred = self.model.forecast()
+        if self.validate and self.equity.count % self.validate_every == 0:
+            self._validate(pred)
+        return pred
 
     def compute_signal(self):
         try:
             pred = self._regression()
+            if pred is None:
+                return None
             if pred >= self.equity.last_trade:
                 return "BUY"
             else:
@@ -91,4 +232,111 @@ class AutoRegresion(Strategy):
             
         except Exception as e:
             self.strategy_errors.append(f"[AR] Strategy Error @ {datetime.now()}: {e}")
-            print(f"[AR] Strategy Error @ {datetime.now()}: {e}")
\ No newline at end of file
+            print(f"[AR] Strategy Error @ {datetime.now()}: {e}")
+
+    def compute_signals(self, prices):
+        ## Runs a fresh RLS model over the column, so self.model is left untouched
+        prices = np.asarray(prices, dtype=np.float64)
+        signals = np.full(len(prices), None, dtype=object)
+        model = RecursiveAR(lags=self.lags, forgetting=self.model.forgetting)
+        for i, px in enumerate(prices):
+            model.update(float(px))
+            if i + 1 >= self.min_obs:
+                signals[i] = "BUY" if model.forecast() >= px else "SELL"
+        return signals
+
+class StrategyEnsemble(Strategy):
+    """
+    Combines the signals of several strategies on the same symbol.
+    vote "majority": a side wins with more than half the total weight (equal weights by default)
+    vote "unanimous": every member must give the same signal
+    vote "weighted": net = (buy weight - sell weight) / total weight, BUY if net >= threshold,
+                     SELL if net <= -threshold
+    executor: optional concurrent.futures executor to evaluate members concurrently.
+    Members read their shared windows / z-scores through Equity.memo, so each is computed once per tick.
+    """
+
+    VOTES = ("majority", "unanimous", "weighted")
+
+    def __init__(self, symbol, strategies, weights = None, vote = "majority", threshold = 0.5,
+                 executor = None, state = None):
+        if state is None and strategies:
+            state = strategies[0].state  # default to the members' state rather than DEFAULT_STATE
+        super().__init__(symbol, state)
+        if vote not in self.VOTES:
+            raise ValueError(f"vote must be one of {self.VOTES}, got {vote!r}")
+        for member in strategies:
+            if member.symbol != self.symbol:
+                raise ValueError(f"ensemble for {self.symbol} got a {member.symbol} strategy")
+        self.strategies = list(strategies)
+        self.weights = np.ones(len(self.strategies)) if weights is None else np.asarray(weights, dtype=np.float64)
+        if self.weights.shape != (len(self.strategies),):
+            raise ValueError("need one weight per strategy")
+        self.vote = vote
+        self.threshold = threshold
+        self.executor = executor
+        self.last_votes = []
+        for member in self.strategies:
+            if member.state is not self.state:
+                member.bind(self.state)
+
+    def bind(self, state: MarketState):
+        for member in self.strategies:
+            member.bind(state)
+        super().bind(state)
+
+    def reset(self):
+        super().reset()
+        for member in self.strategies:
+            member.reset()
+        self.last_votes = []
+
+    def _combine(self, votes: np.ndarray):
+        """
+        votes: (n_members,) or (n_bars, n_members) array of +1 / -1 / 0, returns the same in one less dim
+        """
+        total = self.weights.sum()
+        buy = (votes > 0) @ self.weights
+        sell = (votes < 0) @ self.weights
+        if self.vote == "majority":
+            return np.where(buy > total / 2, 1, np.where(sell > total / 2, -1, 0))
+        if self.vote == "unanimous":
+            return np.where(np.isclose(buy, total), 1, np.where(np.isclose(sell, total), -1, 0))
+        net = (buy - sell) / total
+        return np.where(net >= self.threshold, 1, np.where(net <= -self.threshold, -1, 0))
+
+    @staticmethod
+    def _to_votes(signals):
+        signals = np.asarray(signals, dtype=object)
+        return (signals == "BUY").astype(np.int8) - (signals == "SELL").astype(np.int8)
+
+    def _evaluate(self, member):
+        try:
+            return member.compute_signal()
+        except Exception as e:
+            self.strategy_errors.append(f"[ENS] {type(member).__name__} Error @ {datetime.now()}: {e}")
+            print(f"[ENS] {type(member).__name__} Error @ {datetime.now()}: {e}")
+            return None
+
+    def compute_signal(self):
+        if self.executor is not None and len(self.strategies) > 1:
+            signals = list(self.executor.map(self._evaluate, self.strategies))
+        else:
+            signals = [self._evaluate(m) for m in self.strategies]
+        self.last_votes = signals
+        combined = int(self._combine(self._to_votes(signals)))
+        return {1: "BUY", -1: "SELL"}.get(combined)
+
+    @property
+    def supports_batch(self):
+        return all(m.supports_batch for m in self.strategies)
+
+    def compute_signals(self, prices):
+        if not self.supports_batch:
+            raise NotImplementedError("every member needs compute_signals for the batch path")
+        votes = np.column_stack([self._to_votes(m.compute_signals(prices)) for m in self.strategies])
+        combined = self._combine(votes)
+        signals = np.full(len(prices), None, dtype=object)
+        signals[combined > 0] = "BUY"
+        signals[combined < 0] = "SELL"
+        return signals
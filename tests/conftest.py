@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester import Order
+from systems.gateway_in import YF_ENDPOINT
+
+TS = pd.Timestamp("2024-01-02 15:30")
+
+
+def make_order(i, side="BUY", qty=100, limit=None):
+    """Order o<i> on SYM, a market order unless `limit` is given."""
+    return Order(
+        order_id=f"o{i}",
+        symbol="SYM",
+        side=side,
+        qty=qty,
+        submitted_at=TS,
+        order_type="LIMIT" if limit is not None else "MARKET",
+        limit_price=limit,
+    )
+
+
+class SyntheticEndpoint(YF_ENDPOINT):
+    """YF_ENDPOINT that generates a random walk instead of downloading."""
+
+    def _fetch_single(self, ticker):
+        rng = np.random.default_rng(sum(map(ord, ticker)))
+        index = pd.date_range("2024-01-01", periods=400, freq="h")
+        close = 100 + np.cumsum(rng.normal(scale=0.5, size=len(index)))
+        volume = rng.integers(1_000, 5_000, size=len(index)).astype(float)
+        self.data_dict[ticker] = pd.DataFrame(
+            {"Close": close, "Volume": volume}, index=index
+        )
+
+
+@pytest.fixture
+def synthetic_endpoint():
+    return SyntheticEndpoint
+
+
+@pytest.fixture
+def market_data():
+    endpoint = SyntheticEndpoint(["SYNA", "SYNB"], "30d", "60m")
+    endpoint.data_grabber()
+    return endpoint.align()
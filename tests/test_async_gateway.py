@@ -0,0 +1,113 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from systems.gateway_in import ALPACA_ASYNC_ENDPOINT
+
+
+class StubQuotes(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        server = self.server
+        server.requests.append((self.client_address[1], url.path, query))
+        if self.headers["APCA-API-KEY-ID"] != "key":
+            self.send_response(403)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        quotes = {
+            sym: {"ap": 101.0, "as": 3, "bp": 100.0, "bs": 2, "t": "2024-01-02T15:30:00Z"}
+            for sym in query["symbols"][0].split(",")
+        }
+        if "BAD" in quotes:
+            del quotes["BAD"]["ap"]  # malformed: no ask price
+        body = json.dumps({"quotes": quotes}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubQuotes)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_batched_pooled_quotes(stub_server):
+    symbols = ["AAPL", "NVDA", "MSFT", "AMZN", "META"]
+    feed = ALPACA_ASYNC_ENDPOINT(
+        "key",
+        "secret",
+        symbols,
+        base_url=f"http://127.0.0.1:{stub_server.server_port}",
+        batch_size=2,
+        max_connections=2,
+    )
+    seen = []
+    feed.register_handler(lambda sym, q: seen.append((sym, q["bid"], q["ask"])))
+    try:
+        feed.grab_quotes()
+        feed.grab_quotes()
+    finally:
+        feed.close()
+
+    assert len(stub_server.requests) == 6  # 3 batches x 2 cycles
+    assert {path for _, path, _ in stub_server.requests} == {"/v2/stocks/quotes/latest"}
+    assert all(q["feed"] == ["delayed_sip"] for _, _, q in stub_server.requests)
+    assert len({port for port, _, _ in stub_server.requests}) <= 2  # sockets reused
+    assert sorted(seen) == sorted([(s, 100.0, 101.0) for s in symbols] * 2)
+    stats = feed.latency_stats()
+    assert stats["count"] == 6 and stats["connections_opened"] <= 2
+    assert stats["p50_ms"] <= stats["p99_ms"]
+
+
+def test_http_errors_are_recorded(stub_server, capsys):
+    feed = ALPACA_ASYNC_ENDPOINT(
+        "wrong", "secret", ["AAPL"], base_url=f"http://127.0.0.1:{stub_server.server_port}"
+    )
+    try:
+        feed.grab_quotes()
+    finally:
+        feed.close()
+    assert feed.data_dict == {}
+    assert "403" in feed.errors[0]
+
+
+def test_bad_quote_or_handler_does_not_drop_the_batch(stub_server, capsys):
+    symbols = ["AAPL", "BAD", "BOOM", "MSFT"]
+    feed = ALPACA_ASYNC_ENDPOINT(
+        "key", "secret", symbols, base_url=f"http://127.0.0.1:{stub_server.server_port}", batch_size=4
+    )
+    seen = []
+
+    def handler(sym, q):
+        if sym == "BOOM":
+            raise RuntimeError("handler failed")
+        seen.append(sym)
+
+    feed.register_handler(handler)
+    try:
+        feed.grab_quotes()
+    finally:
+        feed.close()
+
+    assert len(stub_server.requests) == 1
+    assert sorted(seen) == ["AAPL", "MSFT"]
+    assert len(feed.errors) == 2
+    assert any("BAD" in e for e in feed.errors) and any("BOOM" in e for e in feed.errors)
@@ -0,0 +1,72 @@
+import random
+
+import pandas as pd
+import pytest
+
+import systems.strategy as strat
+from backtester import run_strategies
+
+
+def _strategies():
+    return [
+        ("mr", strat.MeanReversion("SYNA", window=10, z_thresh=1.0)),
+        ("ar", strat.AutoRegresion("SYNA")),
+    ]
+
+
+def test_run_strategies_shares_data_and_isolates_state(market_data, capsys):
+    random.seed(5)
+    first = run_strategies(_strategies(), market_data)
+    random.seed(5)
+    again = run_strategies(_strategies(), market_data)
+
+    assert set(first) == {"mr", "ar"}
+    for name in first:
+        # the second pass starts from clean Equity history, not the first pass' leftovers
+        pd.testing.assert_frame_equal(first[name].equity_curve, again[name].equity_curve)
+        assert len(first[name].equity_curve) == len(market_data)
+    assert not market_data.close.flags.writeable
+
+
+def test_portfolio_single_pass_matches_event_path_and_shares_cash(market_data, capsys):
+    from backtester import BACKTESTING_ENGINE
+
+    def portfolio():
+        return {
+            "SYNA": [strat.MeanReversion("SYNA", window=10, z_thresh=1.0), strat.RandomStrategy("SYNA")],
+            "SYNB": strat.AutoRegresion("SYNB", lags=2),
+        }
+
+    results = []
+    for batch_signals in (True, False):
+        random.seed(9)
+        engine = BACKTESTING_ENGINE(
+            symbols=market_data.symbols,
+            strategy=portfolio(),
+            market_data=market_data,
+            batch_signals=batch_signals,
+        )
+        results.append((engine, engine.run()))
+    (engine, fast), (_, slow) = results
+
+    assert fast.config["strategy"] == "Portfolio" and fast.config["n_strategies"] == 3
+    assert fast.config["batch_signals"] and not slow.config["batch_signals"]
+    pd.testing.assert_frame_equal(fast.orders, slow.orders)
+    pd.testing.assert_frame_equal(fast.trades, slow.trades)
+    assert set(fast.trades["symbol"]) == {"SYNA", "SYNB"}
+
+    # one cash account: final equity is cash plus both marked positions
+    last = market_data.close[-1]
+    expected = engine.cash + sum(engine.positions[s] * last[market_data.col[s]] for s in market_data.symbols)
+    assert fast.equity_curve["equity"].iloc[-1] == pytest.approx(expected)
+
+
+def test_portfolio_rejects_unknown_symbols(market_data):
+    from backtester import BACKTESTING_ENGINE
+
+    with pytest.raises(ValueError):
+        BACKTESTING_ENGINE(
+            symbols=market_data.symbols,
+            strategy={"NOPE": strat.RandomStrategy("NOPE")},
+            market_data=market_data,
+        )
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from systems.bar_cache import BarCache
+
+
+def _hours(index):
+    return np.asarray((index - pd.Timestamp("2024-01-01", tz="UTC")) / pd.Timedelta(hours=1))
+
+
+class FakeFeed:
+    """Hourly bars with deterministic prices; records every fetch range."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, symbol, start, end, interval):
+        self.calls.append((symbol, start, end))
+        index = pd.date_range(start.ceil("h"), end, freq="h", inclusive="left")
+        close = _hours(index)
+        return pd.DataFrame(
+            {"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1.0},
+            index=index,
+        )
+
+
+def _cache(tmp_path, feed, now, **kwargs):
+    return BarCache(root=tmp_path, fetch=feed, clock=lambda: now[0], **kwargs)
+
+
+def test_cache_hit_and_tail_refresh(tmp_path):
+    feed = FakeFeed()
+    now = [pd.Timestamp("2024-03-01 12:00", tz="UTC")]
+    cache = _cache(tmp_path, feed, now)
+
+    first = cache.get("aapl", "5d", "60m")
+    assert len(feed.calls) == 1
+    assert len(first) == 5 * 24
+
+    again = cache.get("AAPL", "5d", "60m")
+    assert len(feed.calls) == 1
+    pd.testing.assert_frame_equal(first, again)
+
+    now[0] += pd.Timedelta(hours=6)
+    later = cache.get("AAPL", "5d", "60m")
+    assert len(feed.calls) == 2
+    tail_start = feed.calls[-1][1]
+    assert tail_start >= pd.Timestamp("2024-03-01 11:00", tz="UTC")
+    assert later.index[-1] == pd.Timestamp("2024-03-01 17:00", tz="UTC")
+    np.testing.assert_array_equal(later["Close"], _hours(later.index))
+
+
+def test_offline_and_eviction(tmp_path):
+    feed = FakeFeed()
+    now = [pd.Timestamp("2024-03-01", tz="UTC")]
+    cache = _cache(tmp_path, feed, now, max_entries=2)
+    for sym in ("A", "B", "C"):
+        cache.get(sym, "2d", "60m")
+        now[0] += pd.Timedelta(minutes=1)
+    assert sorted(e["symbol"] for e in cache.manifest.values()) == ["B", "C"]
+
+    offline = BarCache(root=tmp_path, offline=True, fetch=feed, clock=lambda: now[0] + pd.Timedelta(days=1))
+    calls = len(feed.calls)
+    assert len(offline.get("C", "3d", "60m")) == 48
+    assert len(feed.calls) == calls
+
+
+def test_offline_warns_when_cache_does_not_cover_request(tmp_path, capsys):
+    feed = FakeFeed()
+    now = [pd.Timestamp("2024-03-01", tz="UTC")]
+    _cache(tmp_path, feed, now).get("A", "2d", "60m")
+
+    offline = _cache(tmp_path, feed, now, offline=True)
+    assert len(offline.get("A", "1d", "60m")) == 24
+    assert capsys.readouterr().out == ""
+    assert len(offline.get("A", "3d", "60m")) == 48
+    assert "Cache Warning" in capsys.readouterr().out
+
+
+def test_reads_only_requested_rows(tmp_path):
+    feed = FakeFeed()
+    now = [pd.Timestamp("2024-03-01", tz="UTC")]
+    cache = _cache(tmp_path, feed, now)
+    cache.get("A", "10d", "60m")
+    entry = cache.manifest[cache.key("A", "60m")]
+    start = now[0] - pd.Timedelta(days=1)
+    part = cache._read_segment(entry, start)
+    assert len(part) == 24 and part.index[0] == start
+    pd.testing.assert_frame_equal(part, cache.get("A", "1d", "60m"))
@@ -0,0 +1,96 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import systems.strategy as strat
+from backtester import BACKTESTING_ENGINE
+from systems.equity import MarketState
+
+
+def _fresh_strategies(symbol):
+    state = MarketState()
+    return {
+        "mr": strat.MeanReversion(symbol, window=10, z_thresh=1.0, state=state),
+        "ar": strat.AutoRegresion(symbol, lags=2, state=state),
+        "rand": strat.RandomStrategy(symbol, state=state),
+        "ens": strat.StrategyEnsemble(
+            symbol,
+            [
+                strat.MeanReversion(symbol, window=10, z_thresh=1.0, state=state),
+                strat.AutoRegresion(symbol, lags=2, state=state),
+                strat.RandomStrategy(symbol, state=state),
+            ],
+            weights=[0.5, 0.3, 0.2],
+            vote="weighted",
+            threshold=0.4,
+        ),
+    }
+
+
+@pytest.mark.parametrize("name", ["mr", "ar", "rand", "ens"])
+def test_batch_signals_match_event_loop(name, capsys):
+    prices = 100 + np.cumsum(np.random.default_rng(3).normal(size=300))
+
+    event = _fresh_strategies("PARITY")[name]
+    expected = []
+    for i, px in enumerate(prices):
+        event.equity.update_trade(price=px, size=1, timestamp=i)
+        expected.append(event.compute_signal())
+
+    batch = _fresh_strategies("PARITY")[name]
+    assert batch.supports_batch
+    assert list(batch.compute_signals(prices)) == expected
+
+
+@pytest.mark.parametrize("name", ["mr", "ar", "rand", "ens"])
+def test_engine_fast_path_matches_event_path(name, synthetic_endpoint, capsys):
+    orders = []
+    for batch_signals in (False, True):
+        strategy = _fresh_strategies("SYNA")[name]
+        random.seed(11)
+        engine = BACKTESTING_ENGINE(
+            symbols=["SYNA", "SYNB"],
+            strategy=strategy,
+            data_endpoint=synthetic_endpoint,
+            batch_signals=batch_signals,
+        )
+        result = engine.run()
+        assert result.config["batch_signals"] is batch_signals
+        orders.append(result.orders)
+
+    assert not orders[0].empty
+    pd.testing.assert_frame_equal(orders[0], orders[1])
+
+
+def test_columnar_stream_matches_legacy_stream(synthetic_endpoint):
+    endpoint = synthetic_endpoint(["SYNA", "SYNB"], "30d", "60m")
+    endpoint.data_grabber()
+
+    legacy = list(endpoint.stream())
+    columnar = list(endpoint.stream(columnar=True))
+    assert len(legacy) == len(columnar)
+    for (ts_a, bars), (ts_b, row) in zip(legacy, columnar):
+        assert ts_a == ts_b
+        for sym in ("SYNA", "SYNB"):
+            assert row[sym]["close"] == bars[sym]["close"]
+            assert row[sym]["volume"] == bars[sym]["volume"]
+
+    chunks = list(endpoint.stream_chunks(chunk_size=128))
+    stacked = np.vstack([close for _, close, _ in chunks])
+    np.testing.assert_array_equal(stacked, endpoint.align().close)
+
+
+def test_ar_validation_past_buffer_capacity(capsys):
+    pytest.importorskip("statsmodels")
+    state = MarketState(capacity=200)
+    ar = strat.AutoRegresion("VAL", validate=True, validate_every=25, state=state)
+    prices = 100 + np.cumsum(np.random.default_rng(5).normal(scale=0.5, size=600))
+    eq = state.equity("VAL")
+    for i, px in enumerate(prices):
+        eq.update_trade(float(px), 1.0, i)
+        ar.compute_signal()
+
+    assert [row["count"] for row in ar.validation_log] == list(range(25, 201, 25))
+    assert "Validation drift" not in capsys.readouterr().out
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import systems.strategy as strat
+from systems.equity import MarketState
+
+
+class Fixed(strat.Strategy):
+    def __init__(self, symbol, signal, state=None):
+        super().__init__(symbol, state)
+        self.signal = signal
+
+    def compute_signal(self):
+        return self.signal
+
+
+@pytest.mark.parametrize(
+    "vote, weights, signals, expected",
+    [
+        ("majority", None, ["BUY", "BUY", "SELL"], "BUY"),
+        ("majority", None, ["BUY", None, "SELL"], None),
+        ("majority", [3, 1, 1], ["SELL", "BUY", "BUY"], "SELL"),
+        ("unanimous", None, ["BUY", "BUY", None], None),
+        ("unanimous", None, ["SELL", "SELL", "SELL"], "SELL"),
+        ("unanimous", [0.1] * 10, ["BUY"] * 10, "BUY"),  # weight sums differ in the last bit
+        ("weighted", [0.6, 0.2, 0.2], ["BUY", "SELL", None], None),  # net 0.4 < 0.5
+        ("weighted", [0.7, 0.2, 0.1], ["BUY", None, "SELL"], "BUY"),  # net 0.6
+    ],
+)
+def test_votes(vote, weights, signals, expected):
+    state = MarketState()
+    members = [Fixed("X", s, state=state) for s in signals]
+    ensemble = strat.StrategyEnsemble("X", members, weights=weights, vote=vote)
+    assert ensemble.state is state
+    assert ensemble.compute_signal() == expected
+    assert ensemble.last_votes == signals
+
+
+def test_members_share_per_tick_cache(capsys):
+    state = MarketState()
+    members = [strat.MeanReversion("X", window=10, z_thresh=t, state=state) for t in (0.5, 1.0, 2.0)]
+    ensemble = strat.StrategyEnsemble("X", members, executor=ThreadPoolExecutor(3))
+    equity = state.equity("X")
+
+    calls = []
+    zscore = equity.zscore
+    equity.zscore = lambda w: calls.append(w) or zscore(w)
+
+    for i, px in enumerate(100 + np.cumsum(np.random.default_rng(0).normal(size=50))):
+        equity.update_trade(price=px, size=1, timestamp=i)
+        ensemble.compute_signal()
+    assert len(calls) == 50 - 9  # one z-score per tick once the window is full, not one per member
+
+    snap = equity.snapshot(10)
+    assert equity.snapshot(10) is snap
+    equity.update_trade(price=1.0, size=1, timestamp=50)
+    assert equity.snapshot(10) is not snap and snap[-1] != 1.0
+
+
+def test_rejects_mismatched_members():
+    with pytest.raises(ValueError):
+        strat.StrategyEnsemble("X", [Fixed("Y", "BUY")])
+    with pytest.raises(ValueError):
+        strat.StrategyEnsemble("X", [Fixed("X", "BUY")], vote="plurality")
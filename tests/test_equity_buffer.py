@@ -0,0 +1,139 @@
+import threading
+import time
+
+import numpy as np
+
+from systems.equity import Equity, MarketState
+
+
+def test_ring_buffer_returns_last_window_as_view():
+    e = Equity("RINGA", capacity=5)
+    for i in range(8):
+        e.update_trade(price=float(i), size=10 * i, timestamp=i)
+
+    assert len(e) == 5
+    assert e.get_prices(6) is None
+    np.testing.assert_array_equal(e.get_prices(3), [5.0, 6.0, 7.0])
+    np.testing.assert_array_equal(e.last(), [3.0, 4.0, 5.0, 6.0, 7.0])
+    assert np.shares_memory(e.last(3), e._prices)
+    assert not e.last(3).flags.writeable
+
+
+def test_trades_compatibility_view():
+    e = Equity("RINGB", capacity=3)
+    for i in range(4):
+        e.update_trade(price=100.0 + i, size=1, timestamp=f"t{i}")
+
+    assert len(e.trades) == 3
+    assert e.trades.maxlen == 3
+    assert e.trades[-1] == {"Price": 103.0, "Size": 1.0, "Timestamp": "t3"}
+    assert [t["Price"] for t in e.trades] == [101.0, 102.0, 103.0]
+
+
+def test_rolling_stats_match_numpy():
+    rng = np.random.default_rng(7)
+    prices = 100 + np.cumsum(rng.normal(size=2500))
+    e = Equity("ROLLA", capacity=50)
+    e.register_window(10)
+    e.register_window(50)
+    for i, px in enumerate(prices):
+        e.update_trade(price=px, size=1, timestamp=i)
+        if i >= 49:
+            for w in (10, 50):
+                window = prices[i - w + 1 : i + 1]
+                assert np.isclose(e.mean_price(w), window.mean(), rtol=1e-12)
+                assert np.isclose(e.std_price(w), window.std(), rtol=1e-9)
+    assert np.isclose(e.zscore(10), (prices[-1] - prices[-10:].mean()) / prices[-10:].std())
+
+
+def test_register_window_seeds_from_history():
+    e = Equity("ROLLB", capacity=20)
+    for i in range(15):
+        e.update_trade(price=float(i), size=1, timestamp=i)
+    stats = e.register_window(5)
+    assert stats.ready
+    assert e.mean_price(5) == 12.0
+    assert e.mean_price(20) is None
+
+
+def test_market_states_are_isolated():
+    a, b = MarketState(), MarketState()
+    assert a.equity("aapl") is a.equity("AAPL")
+    assert a.equity("AAPL") is not b.equity("AAPL")
+    a.equity("AAPL").update_trade(price=1.0, size=1, timestamp=0)
+    assert len(b.equity("AAPL")) == 0
+    assert "AAPL" in a and len(a) == 1
+
+
+def test_concurrent_readers_never_see_torn_updates():
+    eq = Equity("THR", capacity=100)
+    eq.register_window(20)
+    n_trades = 20_000
+    errors = []
+
+    def writer():
+        for i in range(1, n_trades + 1):
+            eq.update_trade(float(i), 1.0, i)
+
+    def reader():
+        seen = 0
+        while seen < n_trades:
+            new, count = eq.since(seen)
+            # price == trade number, so a consistent read is consecutive and ends at count
+            if len(new) and (new[-1] != count or (len(new) > 1 and np.any(np.diff(new) != 1))):
+                errors.append(("since", seen, count))
+            seen = count
+            snap = eq.snapshot(20)
+            if len(snap) > 1 and np.any(np.diff(snap) != 1):
+                errors.append(("snapshot", snap[-1]))
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+
+
+def test_memo_computes_once_per_tick_across_threads():
+    eq = Equity("MEMO")
+    eq.update_trade(1.0, 1.0, 0)
+    calls, results = [], []
+    start = threading.Barrier(4)
+
+    def slow(e):
+        calls.append(1)
+        time.sleep(0.05)
+        return e.count
+
+    def member():
+        start.wait()
+        results.append(eq.memo("fit", slow))
+
+    threads = [threading.Thread(target=member) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == [1, 1, 1, 1]
+
+
+def test_rolling_reads_wait_for_an_update_in_progress():
+    eq = Equity("MEAN")
+    eq.register_window(2)
+    eq.update_trade(1.0, 1.0, 0)
+    eq.update_trade(3.0, 1.0, 1)
+    got = []
+    with eq._lock:  # a writer mid-update_trade
+        readers = [
+            threading.Thread(target=lambda: got.append(("mean", eq.mean_price(2)))),
+            threading.Thread(target=lambda: got.append(("std", eq.std_price(2)))),
+        ]
+        for t in readers:
+            t.start()
+            t.join(timeout=0.2)
+        assert got == [] and all(t.is_alive() for t in readers)
+    for t in readers:
+        t.join()
+    assert sorted(got) == [("mean", 2.0), ("std", 1.0)]
@@ -0,0 +1,111 @@
+import random
+
+import pandas as pd
+import pytest
+
+import systems.strategy as strat
+from backtester import BACKTESTING_ENGINE, MatchingEngine
+from conftest import TS, make_order
+from systems.impact import (
+    CombinedImpact,
+    FixedSlippage,
+    ParticipationCap,
+    SpreadCost,
+    SquareRootImpact,
+    make_impact,
+)
+
+
+def test_square_root_impact_grows_with_order_size():
+    me = MatchingEngine(fill_rate=1.0, cancel_prob=0.0, impact=SquareRootImpact(eta_bps=100.0))
+    me.submit(make_order(0, qty=100))
+    me.submit(make_order(1, qty=2_500))
+    me.submit(make_order(2, side="SELL", qty=400, limit=99.0))
+    fills = {f.order_id: f.price for f in me.match("SYM", 100.0, 10_000, TS)}
+
+    assert fills["o0"] == pytest.approx(100.0 * (1 + 0.01 * (100 / 10_000) ** 0.5))
+    assert fills["o1"] == pytest.approx(100.0 * (1 + 0.01 * 0.5))
+    assert fills["o2"] == pytest.approx(99.8)  # sells receive less, still within the limit
+
+
+def test_participation_cap_spreads_large_orders_over_bars():
+    me = MatchingEngine(fill_rate=1.0, cancel_prob=0.0, impact=ParticipationCap(0.1))
+    big = me.submit(make_order(0, qty=250))
+    behind = me.submit(make_order(1, qty=10))
+    fills = [me.match("SYM", 10.0, 1_000, TS) for _ in range(3)]
+
+    # the cap is per order: o1 trades behind the capped o0 on the same bar
+    assert [[(f.order_id, f.qty) for f in bar] for bar in fills] == [
+        [("o0", 100), ("o1", 10)],
+        [("o0", 100)],
+        [("o0", 50)],
+    ]
+    assert big.status == behind.status == "FILLED"
+    assert all(f.price == 10.0 for bar in fills for f in bar)
+
+
+def test_participation_cap_leaves_side_capacity_to_later_orders():
+    me = MatchingEngine(fill_rate=0.25, cancel_prob=0.0, impact=ParticipationCap(0.1))
+    first = me.submit(make_order(0, side="SELL", qty=300, limit=9.0))
+    second = me.submit(make_order(1, side="SELL", qty=300, limit=9.5))
+    third = me.submit(make_order(2, side="SELL", qty=300))
+    bars = [[(f.order_id, f.qty) for f in me.match("SYM", 10.0, 1_000, TS)] for _ in range(3)]
+
+    # 250 shares of side capacity per bar, at most 100 per order; the capped orders
+    # keep their priority (market first, then best limit) on the next bar
+    assert bars == [
+        [("o2", 100), ("o0", 100), ("o1", 50)],
+        [("o2", 100), ("o0", 100), ("o1", 50)],
+        [("o2", 100), ("o0", 100), ("o1", 50)],
+    ]
+    assert third.status == first.status == "FILLED"
+    assert second.remaining == 150 and second.status == "PARTIALLY_FILLED"
+
+
+def test_spread_cost_uses_quoted_spread_or_default():
+    spreads = {"SYM": 0.1}
+    me = MatchingEngine(fill_rate=1.0, cancel_prob=0.0, impact=SpreadCost(), spread=spreads.get)
+    me.submit(make_order(0))
+    assert me.match("SYM", 100.0, 1_000, TS)[0].price == pytest.approx(100.05)
+
+    spreads["SYM"] = None  # no quotes: default_spread_bps
+    me.submit(make_order(1, side="SELL"))
+    assert me.match("SYM", 100.0, 1_000, TS)[0].price == pytest.approx(100.0 * (1 - 0.0001))
+
+
+def test_make_impact_specs():
+    assert isinstance(make_impact(None, 2.0), FixedSlippage) and make_impact(None, 2.0).bps == 2.0
+    combined = make_impact("sqrt+spread")
+    assert isinstance(combined, CombinedImpact) and combined.size_dependent and combined.uses_spread
+    assert isinstance(SquareRootImpact() + SpreadCost() + ParticipationCap(0.2), CombinedImpact)
+    assert (SquareRootImpact() + ParticipationCap(0.2)).order_cap(1_000) == 200
+    with pytest.raises(ValueError):
+        make_impact("linear")
+
+
+def test_engine_impact_model_makes_large_orders_costlier(market_data):
+    def avg_cost_bps(order_size, impact_model):
+        random.seed(1)
+        result = BACKTESTING_ENGINE(
+            market_data.symbols,
+            strat.MeanReversion("SYNA", window=10, z_thresh=1.0),
+            market_data=market_data,
+            order_size=order_size,
+            cancel_prob=0.0,
+            fill_rate=1.0,
+            impact_model=impact_model,
+        ).run()
+        trades = result.trades
+        close = pd.Series(market_data.column("SYNA"), index=market_data.timestamps)
+        ref = close.loc[trades["timestamp"]].to_numpy()
+        sign = trades["side"].map({"BUY": 1, "SELL": -1}).to_numpy()
+        return (sign * (trades["price"].to_numpy() / ref - 1) * 10_000).mean(), result.config
+
+    fixed_small, _ = avg_cost_bps(10, None)
+    fixed_large, _ = avg_cost_bps(1_000, None)
+    assert fixed_small == pytest.approx(fixed_large) == pytest.approx(1.5)
+
+    sqrt_small, config = avg_cost_bps(10, "sqrt")
+    sqrt_large, _ = avg_cost_bps(1_000, "sqrt")
+    assert sqrt_large > 5 * sqrt_small
+    assert config["impact_model"].startswith("SquareRootImpact(")
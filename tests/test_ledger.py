@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from systems.ledger import Ledger
+from systems.results_sink import MemorySink
+
+
+def test_average_cost_accounting():
+    ledger = Ledger(["A", "B"], initial_cash=10_000)
+    ledger.apply_fill("A", "BUY", 100, 10.0)
+    ledger.apply_fill("A", "BUY", 100, 12.0)
+    assert ledger.avg_price[0] == pytest.approx(11.0)
+
+    assert ledger.apply_fill("A", "SELL", 50, 13.0) == pytest.approx(100.0)
+    assert ledger.avg_price[0] == pytest.approx(11.0)  # reducing keeps the average
+
+    # sell through zero: close 150 long, open 50 short at the fill price
+    assert ledger.apply_fill("A", "SELL", 200, 10.0) == pytest.approx(-150.0)
+    assert ledger.position("A") == -50 and ledger.avg_price[0] == 10.0
+
+    assert ledger.apply_fill("A", "BUY", 50, 9.0) == pytest.approx(50.0)
+    assert ledger.position("A") == 0 and ledger.avg_price[0] == 0.0
+    assert ledger.realized_pnl == pytest.approx(0.0)
+    assert ledger.cash == pytest.approx(10_000 + 0.0)
+
+
+def test_mark_to_market_and_frames():
+    ledger = Ledger(["A", "B"], initial_cash=1_000)
+    ts = pd.date_range("2024-01-02 14:30", periods=3, freq="h", tz="America/New_York")
+    ledger.mark(ts[0], np.array([10.0, 20.0]))
+    ledger.apply_fill("B", "SELL", 10, 21.0, commission=1.0, partial=True)
+    ledger.mark(ts[1], np.array([10.0, 21.0]))
+    ledger.mark(ts[2], np.array([11.0, 19.0]))
+
+    curve = ledger.equity_frame()
+    assert list(curve["equity"]) == [1_000, 1_000, 1_020]
+    assert (curve["timestamp"] == ts).all()
+
+    trades = ledger.trades_frame()
+    assert trades.to_dict("records") == [
+        {
+            "timestamp": ts[1],
+            "symbol": "B",
+            "side": "SELL",
+            "qty": 10,
+            "price": 21.0,
+            "partial": True,
+            "realized_pnl": 0.0,
+            "commission": 1.0,
+            "position_after": -10.0,
+        }
+    ]
+
+
+def test_logs_span_several_sink_batches():
+    ledger = Ledger(["A"], initial_cash=0, sink=MemorySink(batch_size=2))
+    for i in range(10):
+        ledger.apply_fill("A", "BUY", 1, 1.0)
+        ledger.mark(pd.Timestamp("2024-01-01") + pd.Timedelta(minutes=i), np.array([1.0]))
+    assert len(ledger.trades_frame()) == 10 and len(ledger.equity_frame()) == 10
+    assert ledger.position("A") == 10
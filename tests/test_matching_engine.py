@@ -0,0 +1,110 @@
+import heapq
+
+import pytest
+
+import systems.strategy as strat
+from backtester import BACKTESTING_ENGINE, MatchingEngine, _SideBook
+from conftest import TS, make_order
+
+
+def _engine(**kwargs):
+    kwargs.setdefault("cancel_prob", 0.0)
+    kwargs.setdefault("slippage_bps", 0.0)
+    return MatchingEngine(**kwargs)
+
+
+def test_remainder_rests_and_fills_over_later_bars():
+    me = _engine(fill_rate=0.5)
+    order = me.submit(make_order(0, qty=250))
+    fills = [me.match("SYM", 10.0, vol, TS) for vol in (200, 0, 200, 200)]
+
+    assert [sum(f.qty for f in bar) for bar in fills] == [100, 0, 100, 50]
+    assert order.status == "FILLED" and order.filled_qty == 250
+    assert [f.partial for bar in fills for f in bar] == [True, True, False]
+    assert me.open_orders() == []
+
+
+def test_participation_cap_is_shared_fifo_and_per_side():
+    me = _engine(fill_rate=0.1)
+    a, b = me.submit(make_order(0, qty=80)), me.submit(make_order(1, qty=80))
+    s = me.submit(make_order(2, side="SELL", qty=50))
+    fills = me.match("SYM", 10.0, 1000, TS)  # cap 100 per side
+
+    assert {(f.order_id, f.qty) for f in fills} == {("o0", 80), ("o1", 20), ("o2", 50)}
+    assert (a.status, b.status, s.status) == ("FILLED", "PARTIALLY_FILLED", "FILLED")
+
+
+def test_limit_orders_price_time_priority_and_cancel():
+    me = _engine(fill_rate=1.0)
+    low = me.submit(make_order(0, limit=9.0))
+    high = me.submit(make_order(1, limit=9.5))
+    late = me.submit(make_order(2, limit=9.5))
+    assert me.match("SYM", 10.0, 1_000, TS) == []  # nothing marketable
+
+    assert me.cancel("o2") and not me.cancel("o2")
+    fills = me.match("SYM", 9.4, 150, TS)
+    assert [(f.order_id, f.qty, f.price) for f in fills] == [("o1", 100, 9.4)]
+    assert (high.status, low.status, late.status) == ("FILLED", "NEW", "CANCELLED")
+
+
+def test_expiry():
+    me = _engine(expire_after=2)
+    order = me.submit(make_order(0, limit=1.0))
+    for _ in range(3):
+        me.next_bar()
+        me.match("SYM", 10.0, 1_000, TS)
+    assert order.status == "EXPIRED" and me.open_orders() == []
+
+
+def _non_crossing_book_ops(n_orders, bars, monkeypatch):
+    """Book operations spent matching `bars` bars that cross none of n_orders resting bids."""
+    me = _engine(fill_rate=1.0)
+    for i in range(n_orders):
+        me.submit(make_order(i, limit=50.0 + (i % 1000) / 100))
+    counts = {"next_order": 0, "marketable": 0, "heappop": 0}
+
+    def counted(name, fn):
+        def wrapper(*args, **kwargs):
+            counts[name] += 1
+            return fn(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(_SideBook, "next_order", counted("next_order", _SideBook.next_order))
+    monkeypatch.setattr(_SideBook, "marketable", counted("marketable", _SideBook.marketable))
+    monkeypatch.setattr(heapq, "heappop", counted("heappop", heapq.heappop))
+    for _ in range(bars):
+        assert me.match("SYM", 100.0, 10_000, TS) == []
+    monkeypatch.undo()
+    return counts, me
+
+
+def test_matching_scales_with_fills_not_resting_orders(monkeypatch):
+    small, _ = _non_crossing_book_ops(2_000, 100, monkeypatch)
+    large, me = _non_crossing_book_ops(20_000, 100, monkeypatch)
+    # a bar that crosses nothing only looks at the front of the book, whatever its depth
+    assert large == small
+    assert large["next_order"] <= 100 and large["heappop"] == 0
+
+    fills = me.match("SYM", 59.985, 300, TS)  # crosses only the 59.99 bids
+    assert [f.qty for f in fills] == [100, 100, 100]
+    assert all(f.price == pytest.approx(59.985) for f in fills)
+
+
+def test_engine_limit_orders_carry_across_bars(market_data, capsys):
+    strategy = strat.MeanReversion("SYNA", window=10, z_thresh=1.0)
+    engine = BACKTESTING_ENGINE(
+        symbols=market_data.symbols,
+        strategy=strategy,
+        market_data=market_data,
+        cancel_prob=0.0,
+        order_type="limit",
+        limit_offset_bps=5.0,
+        expire_after=5,
+    )
+    result = engine.run()
+    orders = result.orders
+    assert set(orders["order_type"]) == {"LIMIT"}
+    # limits sit below/above the signal bar's close, so every fill comes from a resting order
+    assert not result.trades.empty
+    assert {"FILLED", "EXPIRED"} <= set(orders["status"])
+    assert orders["filled_qty"].sum() == result.trades["qty"].sum()
@@ -0,0 +1,67 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+import systems.strategy as strat
+from backtester import BACKTESTING_ENGINE
+from systems.metrics import MetricsAccumulator, periods_per_year
+
+
+def test_periods_per_year():
+    assert periods_per_year("60m") == 6 * 252
+    assert periods_per_year("1h") == 6 * 252
+    assert periods_per_year("1d") == 252
+
+
+def test_accumulator_matches_batch_formulas():
+    rng = np.random.default_rng(0)
+    equity = 1_000 * np.cumprod(1 + rng.normal(0, 0.01, 500))
+    exposure = rng.uniform(0, 500, 500)
+    acc = MetricsAccumulator(periods_per_year=252)
+    for e, x in zip(equity, exposure):
+        acc.on_mark(float(e), float(x))
+    for qty, price, pnl in [(10, 5.0, 3.0), (10, 6.0, -1.0), (5, 7.0, 0.0), (5, 8.0, 2.0)]:
+        acc.on_fill(qty, price, pnl)
+    m = acc.summary()
+
+    returns = equity[1:] / equity[:-1] - 1
+    peak = np.maximum.accumulate(equity)
+    max_dd = ((equity - peak) / peak).min()
+    downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2))
+    cagr = (equity[-1] / equity[0]) ** (252 / len(returns)) - 1
+    assert m["sharpe"] == pytest.approx(math.sqrt(252) * returns.mean() / returns.std(ddof=1))
+    assert m["sortino"] == pytest.approx(math.sqrt(252) * returns.mean() / downside)
+    assert m["max_drawdown_pct"] == pytest.approx(max_dd * 100)
+    assert m["calmar"] == pytest.approx(cagr / abs(max_dd))
+    assert m["turnover"] == pytest.approx(185.0 / equity.mean())
+    assert m["exposure_pct"] == pytest.approx(np.mean(exposure / equity) * 100)
+    assert m["win_rate"] == 0.5
+    assert m["avg_win"] == 2.5 and m["avg_loss"] == -1.0 and m["win_loss_ratio"] == 2.5
+
+
+def test_metrics_update_during_replay(market_data):
+    random.seed(4)
+    engine = BACKTESTING_ENGINE(market_data.symbols, strat.RandomStrategy("SYNA"), market_data=market_data)
+    seen = []
+    mark = engine.ledger.mark
+
+    def mark_and_read(ts, prices):
+        equity = mark(ts, prices)
+        seen.append(engine.compute_metrics())
+        return equity
+
+    engine.ledger.mark = mark_and_read
+    result = engine.run()
+
+    equity = result.equity_curve["equity"]
+    returns = equity.pct_change().dropna()
+    assert len(seen) == len(market_data)
+    assert seen[10]["final_equity"] == equity.iloc[10]
+    assert seen[-1] == result.metrics
+    assert result.metrics["sharpe"] == pytest.approx(
+        math.sqrt(engine.periods_per_year) * returns.mean() / returns.std()
+    )
+    assert result.metrics["win_rate"] == pytest.approx((result.trades["realized_pnl"] > 0).mean())
+    assert result.metrics["exposure_pct"] > 0
@@ -0,0 +1,57 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import systems.strategy as strat
+from backtester import BACKTESTING_ENGINE, render_comparison
+from monte_carlo import draw_scenarios, run_monte_carlo
+
+
+def test_recorded_signals_replay_the_strategy(market_data):
+    for strategy in (
+        strat.MeanReversion("SYNA", window=10, z_thresh=1.0),
+        strat.AutoRegresion("SYNB", lags=2),
+    ):
+        signals = BACKTESTING_ENGINE(market_data.symbols, strategy, market_data=market_data).signal_matrix()
+        assert signals.shape == (len(market_data), 1) and np.abs(signals).sum() > 0
+        random.seed(7)
+        live = BACKTESTING_ENGINE(market_data.symbols, strategy, market_data=market_data).run()
+        random.seed(7)
+        replay = BACKTESTING_ENGINE(
+            market_data.symbols, strategy, market_data=market_data, signals=signals
+        ).run()
+        pd.testing.assert_frame_equal(live.trades, replay.trades)
+        pd.testing.assert_frame_equal(live.equity_curve, replay.equity_curve)
+
+
+def test_scenarios_are_seeded_and_vectorized():
+    a = draw_scenarios(500, seed=1, cancel_prob=(0.0, 0.2), fill_rate=0.8)
+    pd.testing.assert_frame_equal(a, draw_scenarios(500, seed=1, cancel_prob=(0.0, 0.2), fill_rate=0.8))
+    assert a["cancel_prob"].between(0.0, 0.2).all() and a["cancel_prob"].nunique() == 500
+    assert (a["fill_rate"] == 0.8).all()
+    assert a["seed"].nunique() == 500
+
+
+def test_monte_carlo_distribution_and_report(market_data, tmp_path):
+    kwargs = dict(n_scenarios=12, cancel_prob=(0.0, 0.5), slippage_bps=(0.0, 10.0), seed=5)
+    strategy = strat.MeanReversion("SYNA", window=10, z_thresh=1.0)
+    serial = run_monte_carlo(strategy, market_data, n_workers=1, **kwargs)
+    parallel = run_monte_carlo(strategy, market_data, n_workers=2, **kwargs)
+    pd.testing.assert_frame_equal(serial.scenarios, parallel.scenarios)
+
+    assert len(serial.scenarios) == 12
+    assert serial.scenarios["final_equity"].nunique() > 1  # execution noise moves the outcome
+    sharpe = serial.summary.set_index("metric").loc["sharpe"]
+    assert sharpe["ci_low"] <= sharpe["median"] <= sharpe["ci_high"]
+    assert sharpe["mean"] == pytest.approx(serial.scenarios["sharpe"].mean())
+
+    random.seed(0)
+    result = BACKTESTING_ENGINE(market_data.symbols, strategy, market_data=market_data).run()
+    path = tmp_path / "comparison.md"
+    render_comparison(
+        [{"name": "mr", "result": result, "report": "r.md", "equity": "e.png", "monte_carlo": serial}], path
+    )
+    text = path.read_text()
+    assert "## Monte Carlo" in text and "mr (12 scenarios)" in text and "ci_low" in text
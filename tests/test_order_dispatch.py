@@ -0,0 +1,152 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from systems.order_dispatch import OrderDispatcher, TokenBucket, is_transient
+from systems.order_manager import OrderManager
+
+
+class MockBroker:
+    """Acks after `latency` seconds; the first `fail_first` sends of a symbol raise."""
+
+    def __init__(self, latency=0.05, fail_first=None, fatal=()):
+        self.latency = latency
+        self.fail_first = dict(fail_first or {})
+        self.fatal = set(fatal)
+        self.sent = []
+        self.inflight = 0
+        self.max_inflight = 0
+        self._lock = threading.Lock()
+
+    def get_positions(self):
+        return []
+
+    def send_order(self, symbol, side, qty, order_type="market", tif="day", client_order_id=None):
+        with self._lock:
+            self.inflight += 1
+            self.max_inflight = max(self.max_inflight, self.inflight)
+        time.sleep(self.latency)
+        with self._lock:
+            self.inflight -= 1
+            if symbol in self.fatal:
+                raise ValueError("insufficient buying power")
+            if self.fail_first.get(symbol, 0) > 0:
+                self.fail_first[symbol] -= 1
+                raise ConnectionError("broker timeout")
+            self.sent.append(symbol)
+            return SimpleNamespace(id=f"id-{len(self.sent)}", status="accepted", filled_qty="0")
+
+    def get_order_by_client_order_id(self, client_order_id):
+        return None
+
+
+class LostAckBroker:
+    """Accepts every order, but the first `lose` acks time out after the order is placed."""
+
+    def __init__(self, lose=1, error=lambda: TimeoutError("read timed out")):
+        self.lose = lose
+        self.error = error
+        self.orders = {}  # client_order_id -> order
+
+    def get_positions(self):
+        return []
+
+    def send_order(self, symbol, side, qty, order_type="market", tif="day", client_order_id=None):
+        if client_order_id in self.orders:
+            raise ValueError("client_order_id must be unique")
+        order = SimpleNamespace(id=f"id-{len(self.orders)}", status="accepted", filled_qty="0")
+        self.orders[client_order_id] = order
+        if self.lose > 0:
+            self.lose -= 1
+            raise self.error()
+        return order
+
+    def get_order_by_client_order_id(self, client_order_id):
+        return self.orders.get(client_order_id)
+
+
+def _dispatcher(broker, **kwargs):
+    om = OrderManager(None, None, gateway=broker)
+    kwargs.setdefault("rate_per_min", 60_000)
+    kwargs.setdefault("burst", 100)
+    return om, OrderDispatcher(om, **kwargs)
+
+
+def test_concurrent_submission_with_retries(capsys):
+    broker = MockBroker(latency=0.05, fail_first={"S3": 2}, fatal={"S7"})
+    om, dispatcher = _dispatcher(broker, max_workers=8, backoff=0.01)
+    dispatcher.start()
+    futures = [dispatcher.submit(f"S{i}", "BUY", 10) for i in range(8)]
+    assert dispatcher.submit("S0", "BUY", 10) is None  # reserved exposure -> already long
+    results = [f.result(timeout=5) for f in futures]
+    dispatcher.stop()
+
+    assert 1 < broker.max_inflight <= dispatcher.max_workers  # sends overlapped, within the pool
+    by_sym = {r.symbol: r for r in results}
+    assert by_sym["S3"].status == "acked" and by_sym["S3"].attempts == 3
+    assert by_sym["S7"].status == "failed" and by_sym["S7"].attempts == 1
+    assert om.get_position("S7") == 0  # failed reservation released
+    assert om.get_position("S1") == 10
+    assert dispatcher.latency_stats()["count"] == 7
+
+
+def test_urgent_orders_go_first(capsys):
+    broker = MockBroker(latency=0.0)
+    _, dispatcher = _dispatcher(broker, max_workers=1)
+    for i in range(3):
+        dispatcher.submit(f"LOW{i}", "SELL", 5, urgency="low")
+    dispatcher.submit("HIGH", "BUY", 5, urgency="high")
+    dispatcher.start()
+    dispatcher.stop()
+    assert broker.sent == ["HIGH", "LOW0", "LOW1", "LOW2"]
+
+
+def test_token_bucket_limits_rate():
+    now = [0.0]
+
+    def sleep(dt):
+        now[0] += dt
+
+    bucket = TokenBucket(rate=10, burst=2, clock=lambda: now[0], sleep=sleep)
+    waits = [bucket.acquire() for _ in range(6)]
+    assert waits[:2] == [0.0, 0.0]
+    assert abs(now[0] - 0.4) < 1e-9  # 4 tokens beyond the burst at 10/s
+
+
+def test_requests_errors_are_transient():
+    assert is_transient(requests.exceptions.ConnectionError("connection reset"))
+    assert is_transient(requests.exceptions.ReadTimeout("read timed out"))
+    assert is_transient(requests.exceptions.ConnectTimeout("connect timed out"))
+    response = requests.Response()
+    response.status_code = 503
+    assert is_transient(requests.exceptions.HTTPError(response=response))
+    response = requests.Response()
+    response.status_code = 403
+    assert not is_transient(requests.exceptions.HTTPError(response=response))
+    assert not is_transient(ValueError("insufficient buying power"))
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        lambda: TimeoutError("read timed out"),
+        lambda: requests.exceptions.ReadTimeout("read timed out"),
+        lambda: requests.exceptions.ConnectionError("connection aborted"),
+    ],
+)
+def test_retry_after_lost_ack_does_not_duplicate(capsys, error):
+    broker = LostAckBroker(lose=1, error=error)
+    om, dispatcher = _dispatcher(broker, max_workers=1, backoff=0.01)
+    dispatcher.start()
+    result = dispatcher.submit("AAPL", "BUY", 10).result(timeout=5)
+    dispatcher.stop()
+
+    assert len(broker.orders) == 1
+    (client_id, order), = broker.orders.items()
+    assert client_id.startswith("local-")
+    assert result.status == "acked" and result.attempts == 2 and result.order_id == order.id
+    assert list(om.book.pending) == [order.id]
+    assert om.get_position("AAPL") == 10
@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+
+from systems.order_manager import OrderManager
+
+
+class FakeBroker:
+    """Acks orders unfilled; fills are released by the test through `fill`."""
+
+    def __init__(self, positions=None):
+        self.positions = dict(positions or {})
+        self.orders = {}
+        self.position_calls = 0
+
+    def get_positions(self):
+        self.position_calls += 1
+        return list(self.positions.items())
+
+    def send_order(self, symbol, side, qty, order_type="market", tif="day", client_order_id=None):
+        order_id = f"o{len(self.orders)}"
+        self.orders[order_id] = {"symbol": symbol, "side": side, "qty": qty, "filled": 0, "status": "new"}
+        return SimpleNamespace(id=order_id, status="new", filled_qty="0")
+
+    def get_order(self, order_id):
+        o = self.orders[order_id]
+        return o["status"], o["filled"]
+
+    def fill(self, order_id, qty):
+        o = self.orders[order_id]
+        o["filled"] += qty
+        o["status"] = "filled" if o["filled"] == o["qty"] else "partially_filled"
+        sign = 1 if o["side"] == "buy" else -1
+        self.positions[o["symbol"]] = self.positions.get(o["symbol"], 0) + sign * qty
+
+
+def test_hot_path_uses_local_book(capsys):
+    broker = FakeBroker({"NVDA": -20})
+    om = OrderManager(None, None, gateway=broker)
+
+    om.place_order("AAPL", "BUY", 50)
+    om.place_order("AAPL", "BUY", 50)  # pending buy counts as exposure -> already long
+    om.place_order("NVDA", "BUY", 50)  # covers the seeded short only
+
+    assert broker.position_calls == 1
+    assert [o["qty"] for o in broker.orders.values()] == [50, 20]
+    assert om.get_position("AAPL") == 50
+    assert om.local_positions == {"NVDA": -20}
+
+    broker.fill("o0", 30)
+    om.poll_orders()
+    assert om.local_positions["AAPL"] == 30
+    broker.fill("o0", 20)
+    broker.fill("o1", 20)
+    om.poll_orders()
+    assert om.book.pending == {}
+    assert om.local_positions == {"AAPL": 50, "NVDA": 0}
+    assert om.sync_positions() == []
+
+
+def test_reconcile_flags_drift(capsys):
+    broker = FakeBroker({"AAPL": 10})
+    om = OrderManager(None, None, gateway=broker)
+    om.sync_positions()
+
+    broker.positions["AAPL"] = 0  # e.g. position closed outside this process
+    drift = om.sync_positions()
+    assert [(d["symbol"], d["local"], d["broker"]) for d in drift] == [("AAPL", 10, 0)]
+    assert om.get_position("AAPL") == 0
+    assert "Position drift" in capsys.readouterr().out
+
+
+class IdlessBroker(FakeBroker):
+    """Acks without an order id; orders are only known by client_order_id."""
+
+    def __init__(self, known=True):
+        super().__init__()
+        self.known = known
+        self.by_client = {}
+
+    def send_order(self, symbol, side, qty, order_type="market", tif="day", client_order_id=None):
+        order = super().send_order(symbol, side, qty, order_type, tif, client_order_id)
+        if self.known:
+            self.by_client[client_order_id] = order
+        return SimpleNamespace(status="new", filled_qty="0")
+
+    def get_order_by_client_order_id(self, client_order_id):
+        return self.by_client.get(client_order_id)
+
+
+def test_idless_ack_is_resolved_by_client_order_id(capsys):
+    broker = IdlessBroker(known=True)
+    om = OrderManager(None, None, gateway=broker)
+    om.place_order("AAPL", "BUY", 50)
+    assert [k.startswith("local-") for k in om.book.pending] == [True]
+
+    broker.fill("o0", 50)
+    om.poll_orders()
+    assert om.book.pending == {}
+    assert om.local_positions == {"AAPL": 50}
+
+
+def test_idless_ack_unknown_to_broker_is_released(capsys):
+    broker = IdlessBroker(known=False)
+    om = OrderManager(None, None, gateway=broker)
+    om.place_order("AAPL", "BUY", 50)
+    om.poll_orders()
+    assert om.book.pending == {}
+    assert om.get_position("AAPL") == 0
+    assert "reservation released" in capsys.readouterr().out
+    broker.positions["AAPL"] = 50
+    assert [d["symbol"] for d in om.sync_positions()] == ["AAPL"]  # no longer skipped as busy
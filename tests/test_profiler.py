@@ -0,0 +1,81 @@
+import json
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import systems.strategy as strat
+from backtester import BACKTESTING_ENGINE, render_report
+from systems.profiler import PROFILER, Profiler, StageStats
+
+
+def test_histogram_percentiles_and_merge():
+    samples = np.arange(1, 10_001) * 1e-6  # 1 us .. 10 ms
+    a, b = StageStats(), StageStats()
+    for x in samples[::2]:
+        a.add(float(x))
+    for x in samples[1::2]:
+        b.add(float(x))
+    a.merge(b)
+    s = a.summary()
+    assert s["count"] == len(samples)
+    assert s["total_ms"] == pytest.approx(samples.sum() * 1e3)
+    assert s["p50_us"] == pytest.approx(5_000, rel=0.07)
+    assert s["p99_us"] == pytest.approx(9_900, rel=0.07)
+    assert s["max_us"] == pytest.approx(10_000)
+
+
+def test_toggle(monkeypatch):
+    monkeypatch.setenv("PROFILE", "1")
+    assert Profiler().enabled
+    monkeypatch.setenv("PROFILE", "0")
+    prof = Profiler()
+    assert not prof.enabled
+    with prof.stage("x"):
+        pass
+
+    @prof.timed("f")
+    def f():
+        return 3
+
+    assert f() == 3
+    assert prof.snapshot() == {"stages": {}, "counters": {}}
+    prof.enable()
+    with prof.stage("x"):
+        pass
+    assert f() == 3
+    assert set(prof.snapshot()["stages"]) == {"x", "f"}
+
+
+def test_profiled_backtest_and_report(market_data, tmp_path, monkeypatch):
+    def run():
+        random.seed(3)
+        return BACKTESTING_ENGINE(market_data.symbols, strat.RandomStrategy("SYNA"), market_data=market_data).run()
+
+    plain = run()
+    monkeypatch.setattr(PROFILER, "enabled", True)
+    PROFILER.reset()
+    try:
+        profiled = run()
+        session = PROFILER.snapshot()
+    finally:
+        PROFILER.reset()
+
+    assert plain.profile is None
+    pd.testing.assert_frame_equal(plain.equity_curve, profiled.equity_curve)
+    pd.testing.assert_frame_equal(plain.trades, profiled.trades)
+    stages = profiled.profile["stages"]
+    for name in ("stream", "compute_signal", "submit", "match", "accounting"):
+        assert stages[name]["count"] == len(market_data)
+        assert stages[name]["p50_us"] <= stages[name]["p99_us"]
+    assert stages["run"]["count"] == 1
+    assert profiled.profile["counters"]["bars"] == len(market_data)
+    assert profiled.profile["counters"]["fills"] == len(profiled.trades)
+    assert session["stages"]["match"]["count"] == len(market_data)
+
+    report = tmp_path / "r_performance_report.md"
+    render_report(profiled, report, tmp_path / "r.png")
+    assert "## Profile (backtest run)" in report.read_text()
+    exported = json.loads((tmp_path / "r_performance_report_profile.json").read_text())
+    assert exported["stages"]["match"]["count"] == len(market_data)
@@ -0,0 +1,84 @@
+import random
+
+import pandas as pd
+import pytest
+
+import systems.strategy as strat
+from backtester import BACKTESTING_ENGINE, render_report, run_strategies
+from systems.results_sink import DiskSink, MemorySink, ResultsSink, TableSchema
+
+
+def _fill(sink):
+    sink.create("t", TableSchema({"ts": "ts", "sym": "cat", "x": "f8", "flag": "bool"}, {"sym": ["A", "B"]}))
+    sink.set_tz("t", "America/New_York")
+    stamps = pd.date_range("2024-01-02 09:30", periods=7, freq="min", tz="America/New_York")
+    for i, ts in enumerate(stamps):
+        sink.append("t", ts=ts, sym="AB"[i % 2], x=i * 0.5, flag=i % 3 == 0)
+    return stamps
+
+
+@pytest.mark.parametrize("make", [lambda tmp: MemorySink(batch_size=3), lambda tmp: DiskSink(tmp, batch_size=3)])
+def test_tables_round_trip_across_batches(tmp_path, make):
+    sink = make(tmp_path)
+    stamps = _fill(sink)
+    assert sink.num_rows("t") == 7
+
+    # two full batches are stored, one row is still buffered; chunks see all of them
+    sizes = [len(c) for c in sink.chunks("t", rows=2)]
+    assert sum(sizes) == 7 and max(sizes) == 2
+    frame = sink.frame("t")
+    assert (frame["ts"] == stamps).all()
+    assert list(frame["sym"]) == list("ABABABA")
+    assert list(frame["x"]) == [i * 0.5 for i in range(7)]
+    assert list(sink.chunks("t", columns=["x"]))[0].columns.tolist() == ["x"]
+
+
+def test_base_sink_is_abstract():
+    with pytest.raises(TypeError):
+        ResultsSink()
+    sink = MemorySink()
+    assert sink  # a fresh sink is not falsy
+    assert sink.num_rows("t") == 0
+
+
+def test_disk_sink_reopens_finished_run(tmp_path):
+    sink = DiskSink(tmp_path, batch_size=3)
+    _fill(sink)
+    sink.close()
+    reopened = DiskSink.open(tmp_path)
+    pd.testing.assert_frame_equal(reopened.frame("t"), sink.frame("t"))
+
+
+def test_disk_sink_matches_memory_run(market_data, tmp_path):
+    strategy = lambda: strat.MeanReversion("SYNA", window=10, z_thresh=1.0)
+    kwargs = dict(order_type="limit", limit_offset_bps=2.0, expire_after=3)
+    random.seed(3)
+    memory = BACKTESTING_ENGINE(market_data.symbols, strategy(), market_data=market_data, **kwargs).run()
+    random.seed(3)
+    disk = BACKTESTING_ENGINE(
+        market_data.symbols,
+        strategy(),
+        market_data=market_data,
+        results_sink=DiskSink(tmp_path, batch_size=16),
+        **kwargs,
+    ).run()
+
+    assert not memory.trades.empty
+    for table in ("equity_curve", "trades", "orders"):
+        pd.testing.assert_frame_equal(getattr(memory, table), getattr(disk, table))
+    assert memory.metrics.keys() == disk.metrics.keys()
+    for key, value in memory.metrics.items():
+        assert disk.metrics[key] == pytest.approx(value, nan_ok=True)
+
+
+def test_reports_render_from_disk(market_data, tmp_path):
+    random.seed(2)
+    results = run_strategies(
+        [("rand", strat.RandomStrategy("SYNA"))], market_data, results_dir=tmp_path / "runs"
+    )
+    assert (tmp_path / "runs" / "rand" / "trades" / "qty.bin").exists()
+    report = tmp_path / "report.md"
+    render_report(results["rand"], report, tmp_path / "equity.png")
+    text = report.read_text()
+    assert f"- Trades: {len(results['rand'].trades)}" in text
+    assert (tmp_path / "equity.png").exists()
@@ -0,0 +1,90 @@
+import threading
+import time
+
+from systems.scheduler import LiveScheduler
+
+
+class Probe:
+    """Strategy stand-in: records call times, sleeps `cost` seconds, returns `signal`."""
+
+    def __init__(self, cost=0.0, signal=None):
+        self.cost = cost
+        self.signal = signal
+        self.calls = []
+
+    def compute_signal(self):
+        self.calls.append(time.monotonic())
+        time.sleep(self.cost)
+        return self.signal
+
+
+def test_fixed_cadence_does_not_drift(capsys):
+    period = 0.05
+    probe = Probe(cost=0.02)
+    sched = LiveScheduler(lambda *a: None)
+    sched.add("FAST", [probe], period=period, fetch=lambda sym: time.sleep(0.01))
+    sched.start()
+    time.sleep(period * 10.5)
+    sched.stop()
+
+    calls = probe.calls
+    assert 9 <= len(calls) <= 12
+    # run k starts at t0 + k * period even though each run takes 60% of the period
+    offsets = [(t - calls[0]) - k * period for k, t in enumerate(calls)]
+    assert max(abs(o) for o in offsets) < period / 2
+    assert sched.report()["FAST"]["overruns"] == 0
+
+
+def test_slow_strategy_only_stalls_its_own_symbol(capsys):
+    slow, fast = Probe(cost=0.3), Probe(signal="BUY")
+    signals = []
+    sched = LiveScheduler(lambda sym, strat, sig: signals.append(sym), max_workers=2)
+    sched.add("SLOW", [slow], period=0.05)
+    sched.add("FAST", [fast], period=0.05)
+    sched.start()
+    time.sleep(0.55)
+    sched.stop()
+
+    report = sched.report()
+    assert report["FAST"]["runs"] >= 9 and report["FAST"]["overruns"] == 0
+    assert report["SLOW"]["runs"] <= 3
+    assert report["SLOW"]["dropped"] > 0 and report["SLOW"]["overruns"] >= report["SLOW"]["dropped"]
+    assert "Loop Overrun" in capsys.readouterr().out
+    assert signals.count("FAST") == report["FAST"]["runs"]
+
+
+def test_data_trigger_coalesces_under_backpressure(capsys):
+    gate = threading.Event()
+    probe = Probe()
+    probe.compute_signal = lambda: (gate.wait(1), probe.calls.append(1))[1]
+    sched = LiveScheduler(lambda *a: None)
+    sched.add("SYM", [probe], queue_size=1)
+    sched.start()
+    for _ in range(50):
+        sched.on_quote("SYM", {})
+    gate.set()
+    time.sleep(0.1)
+    sched.stop()
+
+    report = sched.report()["SYM"]
+    assert report["runs"] == 2  # the in-flight run plus one coalesced pending tick
+    assert report["dropped"] == 48
+
+
+def test_feed_fetches_all_symbols_in_one_call(capsys):
+    fetches = []
+    probes = {sym: Probe() for sym in ("A", "B", "C")}
+    sched = LiveScheduler(lambda *a: None, max_workers=2)
+    for sym, probe in probes.items():
+        sched.add(sym, [probe])
+    sched.add_feed(list(probes), period=0.05, fetch=fetches.append)
+    sched.start()
+    time.sleep(0.05 * 5.5)
+    sched.stop()
+
+    assert 5 <= len(fetches) <= 7
+    assert all(batch == ["A", "B", "C"] for batch in fetches)
+    report = sched.report()
+    assert report["feed"]["runs"] == len(fetches)
+    for sym, probe in probes.items():
+        assert len(probe.calls) == report[sym]["runs"] >= len(fetches) - 1
@@ -0,0 +1,87 @@
+import pytest
+
+from systems.order_dispatch import OrderDispatcher
+from systems.order_manager import OrderManager
+from systems.sim_broker import SIM_ORDER_MANAGER, SimulatedRejection, load_test
+
+
+def _quote(bid, ask, size=100):
+    return {"bid": bid, "ask": ask, "bid_size": size, "ask_size": size, "timestamp": None}
+
+
+def test_market_order_consumes_displayed_size_then_rests():
+    broker = SIM_ORDER_MANAGER()
+    broker.on_quote("AAPL", _quote(99.9, 100.1, size=60))
+
+    order = broker.send_order("AAPL", "buy", 100)
+    assert (order.status, order.filled_qty) == ("partially_filled", 60)
+
+    broker.on_quote("AAPL", _quote(100.0, 100.3, size=60))
+    assert broker.get_order(order.id) == ("filled", 100)
+    assert order.filled_avg_price == pytest.approx((60 * 100.1 + 40 * 100.3) / 100)
+    assert broker.get_positions() == [("AAPL", 100)]
+
+
+def test_limit_order_waits_for_price():
+    broker = SIM_ORDER_MANAGER()
+    broker.on_quote("NVDA", _quote(10.0, 10.2))
+    order = broker.send_order("NVDA", "sell", 50, order_type="limit", limit_price=10.5)
+    assert order.status == "accepted"
+    broker.on_quote("NVDA", _quote(10.6, 10.7))
+    assert order.status == "filled" and order.filled_avg_price == 10.6
+
+
+def test_rejections_and_position_limit():
+    broker = SIM_ORDER_MANAGER(throttle_rate=1.0)
+    with pytest.raises(SimulatedRejection) as exc:
+        broker.send_order("AAPL", "buy", 1)
+    assert exc.value.status_code == 429
+
+    broker = SIM_ORDER_MANAGER(max_position=100)
+    broker.send_order("AAPL", "buy", 80)  # no quote yet: rests, still counts toward the limit
+    with pytest.raises(SimulatedRejection) as exc:
+        broker.send_order("AAPL", "buy", 30)
+    assert exc.value.status_code == 422
+
+
+def test_order_manager_tracks_sim_fills(capsys):
+    broker = SIM_ORDER_MANAGER(ack_latency=0.001, throttle_rate=0.3, seed=3)
+    om = OrderManager(None, None, gateway=broker)
+    broker.register_trade_handler(om.on_trade_update)
+    dispatcher = OrderDispatcher(om, rate_per_min=60_000, burst=50, backoff=0.001, max_retries=10)
+    dispatcher.start()
+    futures = [dispatcher.submit(f"S{i}", "SELL", 100) for i in range(10)]
+    assert all(f.result(timeout=5).status == "acked" for f in futures)
+    dispatcher.stop()
+    assert broker.throttled > 0
+
+    for i in range(10):
+        broker.on_quote(f"S{i}", _quote(50.0, 50.1, size=1000))
+    assert not om.book.pending
+    assert om.local_positions == dict(broker.get_positions())
+    assert om.sync_positions() == []
+
+
+def test_fill_on_arrival_reaches_order_manager(capsys):
+    broker = SIM_ORDER_MANAGER()
+    om = OrderManager(None, None, gateway=broker)
+    pushed = []
+
+    def handler(order_id, filled_qty, status, client_order_id):
+        om.on_trade_update(order_id, filled_qty, status, client_order_id)
+        pushed.append((status, om.book.position("AAPL"), set(om.book.pending)))
+
+    broker.register_trade_handler(handler)
+    broker.on_quote("AAPL", _quote(99.9, 100.1, size=60))
+    order = om.place_order("AAPL", "BUY", 100)
+
+    # the push arrives before send_order returns, i.e. before the ack rekeys the reservation
+    assert pushed == [("partially_filled", 60, {order.id})]
+    assert om.get_position("AAPL") == 100  # 60 filled + 40 still working
+    broker.on_quote("AAPL", _quote(100.0, 100.2, size=60))
+    assert pushed[-1] == ("filled", 100, set())
+
+
+def test_load_test_smoke():
+    stats = load_test(n_orders=200, n_symbols=10, workers=4, ack_latency=0.0)
+    assert stats["orders"] == 200 and stats["count"] == 200 and stats["filled"] == 200
@@ -0,0 +1,43 @@
+import threading
+
+from systems.gateway_in import ALPACA_STREAM_ENDPOINT
+from systems.replay import QuoteReplayServer
+
+RECORDED = [
+    {"S": sym, "bp": 100.0 + i, "bs": 1, "ap": 100.5 + i, "as": 2, "t": f"2024-01-02T15:30:{i:02d}Z"}
+    for i, sym in enumerate(["AAPL", "NVDA", "AAPL", "MSFT", "AAPL", "NVDA"])
+]
+
+
+def _collect(url, symbols, expected, key="key", secret="secret", timeout=5):
+    stream = ALPACA_STREAM_ENDPOINT(key, secret, symbols, url=url, reconnect_delay=0.05)
+    got, done = [], threading.Event()
+
+    def handler(symbol, q):
+        got.append((symbol, q["bid"]))
+        if len(got) == expected:
+            done.set()
+
+    stream.register_handler(handler)
+    stream.start()
+    try:
+        done.wait(timeout=timeout)
+    finally:
+        stream.stop()
+    return stream, got
+
+
+def test_stream_pushes_subscribed_quotes_in_order():
+    with QuoteReplayServer(RECORDED, key="key", secret="secret", batch_size=2) as server:
+        stream, got = _collect(server.url, ["AAPL", "NVDA"], expected=5)
+
+    assert got == [("AAPL", 100.0), ("NVDA", 101.0), ("AAPL", 102.0), ("AAPL", 104.0), ("NVDA", 105.0)]
+    assert stream.data_dict["NVDA"]["ask"] == 105.5
+    assert stream.quotes_received == 5
+
+
+def test_stream_reports_auth_failures(capsys):
+    with QuoteReplayServer(RECORDED, key="key", secret="secret") as server:
+        stream, got = _collect(server.url, ["AAPL"], expected=1, secret="wrong", timeout=0.5)
+    assert got == []
+    assert any("auth rejected" in e for e in stream.errors)
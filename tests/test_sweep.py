@@ -0,0 +1,26 @@
+import pandas as pd
+
+import systems.strategy as strat
+from sweep import grid, random_search, run_sweep, split_params
+
+
+def test_grid_and_random_search_are_deterministic():
+    assert grid({"a": [1, 2], "b": ["x"]}) == [{"a": 1, "b": "x"}, {"a": 2, "b": "x"}]
+    space = {"window": (5, 30), "z_thresh": (0.5, 2.0), "fill_rate": [0.8, 1.0]}
+    assert random_search(space, 5, seed=3) == random_search(space, 5, seed=3)
+    assert split_params({"window": 10, "slippage_bps": 2.0}) == (
+        {"window": 10},
+        {"slippage_bps": 2.0},
+    )
+
+
+def test_sweep_is_identical_serial_and_parallel(market_data):
+    params = grid({"window": [5, 20], "z_thresh": [0.5, 1.5], "cancel_prob": [0.3]})
+    kwargs = dict(fixed_params={"symbol": "SYNA"}, seed=9)
+
+    serial = run_sweep(strat.MeanReversion, params, market_data, n_workers=1, **kwargs)
+    parallel = run_sweep(strat.MeanReversion, params, market_data, n_workers=2, **kwargs)
+
+    assert len(serial) == 4
+    assert {"window", "z_thresh", "seed", "sharpe", "final_equity"} <= set(serial.columns)
+    pd.testing.assert_frame_equal(serial, parallel)
@@ -0,0 +1,68 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import systems.strategy as strat
+from backtester import BACKTESTING_ENGINE
+from sweep import grid
+from walk_forward import make_folds, run_walk_forward
+
+
+def test_rolling_and_anchored_folds():
+    rolling = make_folds(100, train_size=40, test_size=20)
+    assert [(f.train_start, f.train_stop, f.test_start, f.test_stop) for f in rolling] == [
+        (0, 40, 40, 60),
+        (20, 60, 60, 80),
+        (40, 80, 80, 100),
+    ]
+    anchored = make_folds(100, train_size=40, test_size=20, anchored=True)
+    assert [f.train_start for f in anchored] == [0, 0, 0]
+    assert [f.train_stop for f in anchored] == [40, 60, 80]
+    with pytest.raises(ValueError):
+        make_folds(100, 40, 20, step=10)
+
+
+def test_warmup_bars_only_build_history(market_data):
+    random.seed(0)
+    result = BACKTESTING_ENGINE(
+        market_data.symbols,
+        strat.MeanReversion("SYNA", window=10, z_thresh=1.0),
+        market_data=market_data,
+        warmup_bars=50,
+    ).run()
+    assert len(result.equity_curve) == len(market_data) - 50
+    assert result.equity_curve["timestamp"].iloc[0] == market_data.timestamps[50]
+    assert (result.orders["timestamp"] >= market_data.timestamps[50]).all()
+
+
+def test_walk_forward_stitches_out_of_sample_folds(market_data):
+    kwargs = dict(
+        train_size=150,
+        test_size=80,
+        warmup=20,
+        param_sets=grid({"window": [5, 15], "z_thresh": [0.8, 1.5]}),
+        fixed_params={"symbol": "SYNA", "cancel_prob": 0.2},
+        seed=3,
+    )
+    serial = run_walk_forward(strat.MeanReversion, market_data, n_workers=1, **kwargs)
+    parallel = run_walk_forward(strat.MeanReversion, market_data, n_workers=2, **kwargs)
+    pd.testing.assert_frame_equal(serial.folds, parallel.folds)
+    pd.testing.assert_frame_equal(serial.equity_curve, parallel.equity_curve)
+
+    folds = serial.folds
+    assert len(folds) == 3
+    assert {"window", "z_thresh", "train_sharpe", "sharpe", "final_equity"} <= set(folds.columns)
+    curve = serial.equity_curve
+    assert len(curve) == 3 * 80
+    assert curve["timestamp"].is_monotonic_increasing
+    assert curve["timestamp"].iloc[0] == market_data.timestamps[150]
+
+    # each fold's test curve is rescaled to start from where the previous one ended
+    growth = np.prod(folds["final_equity"].to_numpy() / 100_000)
+    assert curve["equity"].iloc[-1] == pytest.approx(100_000 * growth)
+    assert serial.metrics["final_equity"] == curve["equity"].iloc[-1]
+    assert serial.metrics["total_return_pct"] == pytest.approx(
+        (curve["equity"].iloc[-1] / curve["equity"].iloc[0] - 1) * 100
+    )
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Type
+
+import numpy as np
+import pandas as pd
+
+import systems.strategy as strat
+from backtester import BACKTESTING_ENGINE, load_market_data
+from sweep import _WORKER, SharedMarketData, _init_worker, split_params
+from systems.gateway_in import MarketData
+from systems.metrics import MetricsAccumulator, periods_per_year
+
+
+@dataclass(frozen=True)
+class Fold:
+    fold: int
+    train_start: int
+    train_stop: int
+    test_start: int
+    test_stop: int
+
+
+@dataclass
+class WalkForwardResult:
+    """
+    folds: one row per fold (bar ranges, chosen params, train score, test metrics).
+    equity_curve: the test windows chained into one out-of-sample curve; each fold
+    restarts from initial_cash, so its curve is rescaled to start where the previous one ended.
+    metrics: computed over that stitched curve and the rescaled test fills.
+    """
+
+    folds: pd.DataFrame
+    equity_curve: pd.DataFrame
+    metrics: Dict[str, float]
+
+
+def make_folds(
+    n_bars: int,
+    train_size: int,
+    test_size: int,
+    step: Optional[int] = None,
+    anchored: bool = False,
+) -> List[Fold]:
+    """
+    Train/test bar ranges over n_bars. Rolling windows move by `step` (default test_size);
+    anchored=True grows every train window from bar 0 instead.
+    """
+    step = step or test_size
+    if step < test_size:
+        raise ValueError("step must be >= test_size so test windows do not overlap")
+    folds = []
+    start = 0
+    while start + train_size + test_size <= n_bars:
+        train_stop = start + train_size
+        folds.append(
+            Fold(
+                fold=len(folds),
+                train_start=0 if anchored else start,
+                train_stop=train_stop,
+                test_start=train_stop,
+                test_stop=train_stop + test_size,
+            )
+        )
+        start += step
+    return folds
+
+
+def _backtest(strategy_cls, strategy_kwargs, engine_kwargs, symbols, market_data, seed, warmup_bars=0):
+    # MatchingEngine draws from the global RNGs, so seed both per run
+    random.seed(seed)
+    np.random.seed(seed % 2**32)
+    engine = BACKTESTING_ENGINE(
+        symbols=symbols,
+        strategy=strategy_cls(**strategy_kwargs),
+        market_data=market_data,
+        warmup_bars=warmup_bars,
+        **engine_kwargs,
+    )
+    return engine.run()
+
+
+def _run_fold(task):
+    fold, seed, strategy_cls, candidates, select_by, warmup, symbols = task
+    data: MarketData = _WORKER["market_data"]
+
+    choice, train_score = 0, float("nan")
+    if len(candidates) > 1:
+        train = data.slice(fold.train_start, fold.train_stop)
+        for i, (strategy_kwargs, engine_kwargs) in enumerate(candidates):
+            score = _backtest(strategy_cls, strategy_kwargs, engine_kwargs, symbols, train, seed).metrics.get(
+                select_by, float("nan")
+            )
+            if not math.isnan(score) and (math.isnan(train_score) or score > train_score):
+                choice, train_score = i, score
+
+    # the test run starts `warmup` bars early so strategies have history, but trades only in the window
+    lo = max(fold.test_start - warmup, 0)
+    strategy_kwargs, engine_kwargs = candidates[choice]
+    result = _backtest(
+        strategy_cls,
+        strategy_kwargs,
+        engine_kwargs,
+        symbols,
+        data.slice(lo, fold.test_stop),
+        seed,
+        warmup_bars=fold.test_start - lo,
+    )
+    curve, trades = result.equity_curve, result.trades
+    fills = (
+        np.column_stack(
+            [trades["qty"].to_numpy(float), trades["price"].to_numpy(), trades["realized_pnl"].to_numpy()]
+        )
+        if not trades.empty
+        else np.empty((0, 3))
+    )
+    return fold.fold, choice, train_score, result.metrics, curve["equity"].to_numpy(), fills
+
+
+def run_walk_forward(
+    strategy_cls: Type[strat.Strategy],
+    market_data: MarketData,
+    train_size: int,
+    test_size: int,
+    step: Optional[int] = None,
+    anchored: bool = False,
+    warmup: int = 0,
+    param_sets: Optional[List[Dict[str, object]]] = None,
+    fixed_params: Optional[Dict[str, object]] = None,
+    select_by: str = "sharpe",
+    symbols: Optional[List[str]] = None,
+    n_workers: Optional[int] = None,
+    seed: int = 0,
+) -> WalkForwardResult:
+    """
+    Walk-forward evaluation over one loaded MarketData; folds slice the same arrays.
+
+    With several param_sets, every fold backtests each set on its train window and runs the
+    best one by `select_by` on its test window; otherwise the train window is not traded.
+    warmup: bars before each test window replayed only to build strategy history.
+    Folds run in parallel over a process pool sharing the market data (see sweep.py); each
+    fold has its own seed spawned from `seed`, so results do not depend on n_workers.
+    """
+    symbols = symbols or market_data.symbols
+    fixed_params = fixed_params or {}
+    param_sets = param_sets or [{}]
+    candidates = [split_params({**fixed_params, **params}) for params in param_sets]
+    folds = make_folds(len(market_data), train_size, test_size, step, anchored)
+    if not folds:
+        raise ValueError(f"{len(market_data)} bars is too short for train_size={train_size}, test_size={test_size}")
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(len(folds))]
+    tasks = [
+        (fold, fold_seed, strategy_cls, candidates, select_by, warmup, symbols)
+        for fold, fold_seed in zip(folds, seeds)
+    ]
+
+    n_workers = min(n_workers or os.cpu_count() or 1, len(tasks))
+    with SharedMarketData(market_data) as shared:
+        if n_workers == 1:
+            _init_worker(shared.handle)
+            try:
+                outputs = [_run_fold(task) for task in tasks]
+            finally:
+                _WORKER.clear()
+        else:
+            with ProcessPoolExecutor(
+                max_workers=n_workers,
+                initializer=_init_worker,
+                initargs=(shared.handle,),
+            ) as pool:
+                outputs = list(pool.map(_run_fold, tasks))
+    outputs.sort(key=lambda o: o[0])
+
+    _, engine_kwargs = candidates[0]
+    initial_cash = engine_kwargs.get("initial_cash", 100_000)
+    acc = MetricsAccumulator(periods_per_year(engine_kwargs.get("data_interval", "60m")))
+    rows, timestamps, equity = [], [], []
+    exposure_bars, scale = 0.0, 1.0
+    for (fold_id, choice, train_score, metrics, curve, fills), fold in zip(outputs, folds):
+        rows.append(
+            {
+                "fold": fold_id,
+                "train_start": market_data.timestamps[fold.train_start],
+                "train_end": market_data.timestamps[fold.train_stop - 1],
+                "test_start": market_data.timestamps[fold.test_start],
+                "test_end": market_data.timestamps[fold.test_stop - 1],
+                **param_sets[choice],
+                f"train_{select_by}": train_score,
+                **metrics,
+            }
+        )
+        if not len(curve):
+            continue
+        for qty, price, pnl in fills:
+            acc.on_fill(qty * scale, price, pnl * scale)
+        scaled = curve * scale
+        for value in scaled:
+            acc.on_mark(float(value))
+        exposure_bars += metrics.get("exposure_pct", 0.0) * len(curve)
+        timestamps.append(market_data.timestamps[fold.test_start : fold.test_stop])
+        equity.append(scaled)
+        scale = scaled[-1] / initial_cash
+
+    oos = pd.DataFrame(
+        {
+            "timestamp": timestamps[0].append(timestamps[1:]) if timestamps else pd.DatetimeIndex([]),
+            "equity": np.concatenate(equity) if equity else np.empty(0),
+        }
+    )
+    metrics = acc.summary()
+    if metrics:
+        # gross exposure is not recoverable from the curve; weight each fold's by its bars
+        metrics["exposure_pct"] = exposure_bars / acc.bars
+    return WalkForwardResult(folds=pd.DataFrame(rows), equity_curve=oos, metrics=metrics)
+
+
+if __name__ == "__main__":
+    from functools import partial
+    from pathlib import Path
+
+    from sweep import grid
+    from systems.bar_cache import BarCache
+    from systems.gateway_in import YF_ENDPOINT
+
+    SYMBOLS = ["AAPL", "NVDA"]
+    DATA_ENDPOINT = partial(YF_ENDPOINT, cache=BarCache())
+    DATA_PERIOD = "365d"
+    DATA_INTERVAL = "60m"
+
+    market_data = load_market_data(SYMBOLS, DATA_ENDPOINT, DATA_PERIOD, DATA_INTERVAL)
+    result = run_walk_forward(
+        strat.MeanReversion,
+        market_data,
+        train_size=500,
+        test_size=150,
+        warmup=40,
+        param_sets=grid({"window": [10, 20, 40], "z_thresh": [1.0, 1.3, 1.6]}),
+        fixed_params={"symbol": "AAPL", "data_interval": DATA_INTERVAL, "data_period": DATA_PERIOD},
+        symbols=SYMBOLS,
+        seed=42,
+    )
+    out = Path("reports") / "meanreversion_walk_forward.csv"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    result.folds.to_csv(out, index=False)
+    print(result.folds.to_string(index=False))
+    for k, v in result.metrics.items():
+        print(f"{k:>18}: {v:.4f}")
+    print(f"Fold table written to {out}")